@@ -1,29 +1,70 @@
 from typing import Optional
-import subprocess
+import asyncio
 import os
 import logging
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Form
 import shutil
-import pandas as pd
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
-from app.models import ModelTrainer
-from app.storage import Storage
+from pydantic import BaseModel, Field
+from app.models import MODEL_TYPES
+from app.storage import model_ref
+from app.async_storage import close_async_storage, get_async_storage
+from app.model_cache import model_cache
+from app.inference import MAX_BATCH_SIZE, ModelNotFoundError, infer, to_matrix
+from app.batching import MICRO_BATCHING, micro_batcher
+from app.executors import run_command, run_dvc, run_io, shutdown_executors
+from app.jobs import JobCancelledError, job_manager, save_in_loop, search_and_save, train_and_save
+from app.preload import (
+    PRELOAD_RETRIES, PRELOAD_RETRY_DELAY, PRELOAD_RETRY_MAX_DELAY, preload_models, readiness
+)
+from app.retry import aretry
+from app.search import parse_space
+from app.tracking import tracker
+from app.metrics import CONTENT_TYPE, REGISTRY, PrometheusMiddleware
 from app.logger import log
 from jose import jwt
-from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
-import warnings
-warnings.filterwarnings("ignore", category=DeprecationWarning, module="passlib")
 
-app = FastAPI(title="MLOps HW2")
+async def connect_async_storage():
+    """Открывает AsyncStorage с повторами, чтобы первый запрос не ждал подключения."""
+    try:
+        await aretry(get_async_storage, PRELOAD_RETRIES, PRELOAD_RETRY_DELAY, PRELOAD_RETRY_MAX_DELAY,
+                     "Async storage connection")
+    except Exception as e:
+        log.error(f"Async storage unavailable at startup: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Подключение к Minio и прогрев моделей идут в фоне: /health отвечает
+    # сразу, а /ready — только после загрузки моделей в кэш. Синхронный и
+    # асинхронный клиенты подключаются одновременно
+    preload = asyncio.create_task(run_io(preload_models))
+    connect = asyncio.create_task(connect_async_storage())
+    # Задачи обучения сохраняют модели через AsyncStorage этого loop
+    save_in_loop(asyncio.get_running_loop())
+    # Фоновая запись в MLflow: id эксперимента разрешается сразу, заодно
+    # повторяется буфер прошлых запусков
+    tracker.start()
+    yield
+    preload.cancel()
+    readiness.stop()
+    connect.cancel()
+    save_in_loop(None)
+    await close_async_storage()
+    job_manager.shutdown(wait=False)
+    await run_io(tracker.close)
+    shutdown_executors(wait=False)
+
+app = FastAPI(title="MLOps HW2", lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-pwd_context = CryptContext(schemes=["bcrypt"])
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "default-dev-key")
 
@@ -43,9 +84,29 @@ class TrainRequest(BaseModel):
     data: dict = None
     dataset_name: str = "data"
 
+class SearchRequest(BaseModel):
+    model_type: str
+    # {параметр: [значения]} или {параметр: {"low", "high", "log", "integer"}}
+    space: dict
+    # Фиксированные параметры модели
+    params: dict = {}
+    # 0 — перебор всей сетки, иначе число случайных кандидатов
+    n_candidates: int = 0
+    factor: int = 3
+    cv: int = 3
+    # Процессов на поиск; не больше SEARCH_N_JOBS
+    n_jobs: Optional[int] = Field(None, ge=1)
+    random_state: Optional[int] = None
+    data: dict = None
+    dataset_name: str = "data"
+
 class PredictRequest(BaseModel):
     features: list
 
+class PredictBatchRequest(BaseModel):
+    features: list
+    proba: bool = False
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to MLOps HW2 API"}
@@ -57,43 +118,166 @@ async def login():
 
 @app.post("/train/", response_model=dict, dependencies=[Depends(get_current_user)])
 async def train_model(request: TrainRequest):
-    trainer = ModelTrainer()      # ← создаём локально
-    storage = Storage()           # ← создаём локально
     log.info(f"Training {request.model_type}")
+    # Синхронный вариант: та же очередь задач, но ждём завершения
+    job = _submit_training(request)
+    try:
+        await job.wait()
+    except JobCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"model_id": request.model_type, "version": job.version, "status": "trained"}
 
-    if request.data:
-        X, y = request.data["X"], request.data["y"]
-    else:
-        X, y = trainer.load_dataset(request.dataset_name or "data")
+def _check_model_type(model_type: str):
+    """422 до постановки в очередь, а не упавшая задача."""
+    if model_type not in MODEL_TYPES:
+        raise HTTPException(status_code=422, detail=f"Unknown model type: {model_type}; expected one of {MODEL_TYPES}")
 
-    model = trainer.train(
+def _submit_training(request: TrainRequest):
+    _check_model_type(request.model_type)
+    X, y = (request.data["X"], request.data["y"]) if request.data else (None, None)
+    return job_manager.submit(
         request.model_type,
-        X=X if request.data else None,
-        y=y if request.data else None,
-        dataset_name=request.dataset_name or "data",
-        **request.params
+        train_and_save,
+        X,
+        y,
+        request.dataset_name or "data",
+        request.params,
     )
-    storage.save(request.model_type, model)
-    return {"model_id": request.model_type, "status": "trained"}
+
+@app.post("/train/jobs", status_code=202, response_model=dict, dependencies=[Depends(get_current_user)])
+async def submit_train_job(request: TrainRequest):
+    """Поставить обучение в очередь; сразу возвращает id задачи."""
+    job = _submit_training(request)
+    log.info(f"Training job {job.job_id} for {request.model_type} submitted")
+    return job.to_dict()
+
+@app.post("/search/", status_code=202, response_model=dict, dependencies=[Depends(get_current_user)])
+async def submit_search(request: SearchRequest):
+    """
+    Подбор гиперпараметров последовательным отсевом как задача обучения.
+
+    Лучшая модель сохраняется новой версией, сводка поиска — в поле
+    result задачи (GET /train/jobs/{job_id}).
+    """
+    _check_model_type(request.model_type)
+    try:
+        parse_space(request.space, request.n_candidates)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    X, y = (request.data["X"], request.data["y"]) if request.data else (None, None)
+    spec = request.model_dump(include={"space", "params", "n_candidates", "factor", "cv", "n_jobs", "random_state"})
+    job = job_manager.submit(
+        request.model_type,
+        search_and_save,
+        X,
+        y,
+        request.dataset_name or "data",
+        spec,
+    )
+    log.info(f"Search job {job.job_id} for {request.model_type} submitted")
+    return job.to_dict()
+
+@app.get("/train/jobs", response_model=dict, dependencies=[Depends(get_current_user)])
+async def list_train_jobs():
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+@app.get("/train/jobs/{job_id}", response_model=dict, dependencies=[Depends(get_current_user)])
+async def get_train_job(job_id: str):
+    """Статус, прогресс, длительность и ключ модели задачи обучения."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.delete("/train/jobs/{job_id}", response_model=dict, dependencies=[Depends(get_current_user)])
+async def cancel_train_job(job_id: str):
+    """Отменить задачу, которая ещё ждёт в очереди."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} and cannot be cancelled")
+    return job.to_dict()
 
 @app.get("/models/", response_model=dict, dependencies=[Depends(get_current_user)])
 async def list_models():
-    trainer = ModelTrainer()
-    return {"available_models": list(trainer.models.keys())}
+    """
+    Типы моделей для обучения и обученные модели (последние версии) из реестра.
+
+    Если хранилище недоступно, типы моделей всё равно возвращаются,
+    а список обученных моделей пуст.
+    """
+    try:
+        storage = await get_async_storage()
+        models = await storage.list_models()
+    except Exception as e:
+        log.warning(f"Cannot list trained models: {e}")
+        models = []
+    return {
+        "available_models": MODEL_TYPES,
+        "models": models,
+    }
+
+@app.get("/models/{model_id}/versions", response_model=dict, dependencies=[Depends(get_current_user)])
+async def list_model_versions(model_id: str):
+    """Версии модели: размер, метрики и время создания."""
+    storage = await get_async_storage()
+    versions = await storage.versions(model_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return {"model_id": model_id, "versions": versions}
 
 @app.post("/predict/{model_id}", response_model=dict, dependencies=[Depends(get_current_user)])
-async def predict(model_id: str, request: PredictRequest):
-    storage = Storage()
-    model = storage.load(model_id)
-    if not model:
+async def predict(model_id: str, request: PredictRequest, version: Optional[int] = Query(None, ge=1)):
+    ref = model_ref(model_id, version)
+    storage = await get_async_storage()
+    try:
+        if MICRO_BATCHING:
+            prediction = await micro_batcher.predict(ref, request.features, storage)
+        else:
+            predictions, _, _ = await infer(ref, to_matrix([request.features]), storage=storage)
+            prediction = predictions[0]
+    except ModelNotFoundError:
         raise HTTPException(status_code=404, detail="Model not found")
-    prediction = model.predict([request.features])[0]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return {"prediction": int(prediction)}
 
+@app.get("/batching/stats", dependencies=[Depends(get_current_user)])
+async def batching_stats():
+    """Глубина очередей и размеры батчей микробатчинга."""
+    return micro_batcher.stats()
+
+@app.post("/predict_batch/{model_id}", response_model=dict, dependencies=[Depends(get_current_user)])
+async def predict_batch(model_id: str, request: PredictBatchRequest, version: Optional[int] = Query(None, ge=1)):
+    if len(request.features) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.features)} rows, max {MAX_BATCH_SIZE}",
+        )
+    try:
+        X = to_matrix(request.features)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    storage = await get_async_storage()
+    try:
+        predictions, probabilities, classes = await infer(model_ref(model_id, version), X, request.proba, storage)
+    except ModelNotFoundError:
+        raise HTTPException(status_code=404, detail="Model not found")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    result = {"predictions": predictions.tolist()}
+    if request.proba:
+        result["probabilities"] = probabilities.tolist()
+        result["classes"] = classes.tolist()
+    return result
+
 @app.delete("/delete/{model_id}", response_model=dict, dependencies=[Depends(get_current_user)])
-async def delete_model(model_id: str):
-    storage = Storage()
-    if storage.delete(model_id):
+async def delete_model(model_id: str, version: Optional[int] = Query(None, ge=1)):
+    """Удалить модель целиком или одну её версию (?version=N)."""
+    storage = await get_async_storage()
+    if await storage.delete(model_ref(model_id, version)):
+        model_cache.invalidate(model_id)
         return {"status": "deleted"}
     raise HTTPException(status_code=404, detail="Model not found")
 
@@ -101,6 +285,22 @@ async def delete_model(model_id: str):
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Готовность принимать трафик: модели загружены в кэш и прогреты."""
+    if not readiness.is_ready:
+        return JSONResponse(status_code=503, content=readiness.to_dict())
+    return readiness.to_dict()
+
+@app.get("/metrics")
+async def metrics():
+    """Метрики в текстовом формате Prometheus."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+def _write_file(path: str, contents: bytes):
+    with open(path, "wb") as f:
+        f.write(contents)
+
 @app.post("/upload_dataset/")
 async def upload_dataset(
     file: UploadFile = File(...),
@@ -112,7 +312,7 @@ async def upload_dataset(
     """
     try:
         #  Локально сохраняем файл
-        os.makedirs("/app/datasets", exist_ok=True)
+        await run_io(os.makedirs, "/app/datasets", exist_ok=True)
 
         if not dataset_name.endswith(".csv"):
             dataset_name += ".csv"
@@ -122,39 +322,23 @@ async def upload_dataset(
         dvc_path = f"datasets/{dataset_name}"
 
         contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        await run_io(_write_file, file_path, contents)
 
         # Добавляем файл в DVC
-        add_result = subprocess.run(
-            ["dvc", "add", dvc_path],
-            capture_output=True,
-            text=True,
-            cwd="/app",
-        )
+        add_result = await run_dvc("add", dvc_path)
         if add_result.returncode != 0:
             raise HTTPException(
                 status_code=500,
                 detail=f"DVC add failed: {add_result.stderr}",
             )
 
-        commit_result = subprocess.run(
-            ["dvc", "commit", "-f"],
-            capture_output=True,
-            text=True,
-            cwd="/app",
-        )
+        commit_result = await run_dvc("commit", "-f")
         if commit_result.returncode != 0:
             # не фейлим запрос, но логируем
             logger.warning(f"DVC commit failed: {commit_result.stderr}")
 
         # Отправляем данные в remote (Minio)
-        push_result = subprocess.run(
-            ["dvc", "push"],
-            capture_output=True,
-            text=True,
-            cwd="/app",
-        )
+        push_result = await run_dvc("push")
         if push_result.returncode != 0:
             # тут уже лучше явно сообщить об ошибке Minio/DVC
             raise HTTPException(
@@ -163,7 +347,8 @@ async def upload_dataset(
             )
 
         try:
-            df = pd.read_csv(file_path)
+            import pandas as pd
+            df = await run_io(pd.read_csv, file_path)
             rows, cols = df.shape
             shape = f"{rows} rows × {cols} columns"
         except Exception as e:
@@ -194,12 +379,7 @@ async def upload_dataset(
 async def get_dvc_version():
     """Получить версию DVC"""
     try:
-        result = subprocess.run(
-            ["dvc", "--version"],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        result = await run_dvc("--version")
         return {"version": result.stdout.strip()}
     except Exception as e:
         logger.error(f"Error getting DVC version: {e}")
@@ -209,12 +389,7 @@ async def get_dvc_version():
 async def get_dvc_status():
     """Получить статус DVC"""
     try:
-        result = subprocess.run(
-            ["dvc", "status"],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        result = await run_dvc("status")
         return {
             "status": "success" if result.returncode == 0 else "error",
             "output": result.stdout if result.stdout else result.stderr
@@ -228,23 +403,13 @@ async def commit_to_dvc(commit_message: Optional[str] = "Dataset update via API"
     """Закоммитить изменения в DVC"""
     try:
         # Проверяем, есть ли изменения
-        status_result = subprocess.run(
-            ["dvc", "status"],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        status_result = await run_dvc("status")
         
         if "cache:" not in status_result.stdout and "nothing to commit" in status_result.stdout:
             return {"message": "No changes to commit", "status": "info"}
         
         # Коммитим изменения
-        commit_result = subprocess.run(
-            ["dvc", "commit", "-f"],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        commit_result = await run_dvc("commit", "-f")
         
         if commit_result.returncode != 0:
             raise HTTPException(
@@ -253,12 +418,7 @@ async def commit_to_dvc(commit_message: Optional[str] = "Dataset update via API"
             )
         
         # Пушим изменения в удаленный репозиторий
-        push_result = subprocess.run(
-            ["dvc", "push"],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        push_result = await run_dvc("push")
         
         if push_result.returncode != 0:
             logger.warning(f"DVC push failed: {push_result.stderr}")
@@ -283,12 +443,7 @@ async def add_to_dvc(filepath: str):
             raise HTTPException(status_code=404, detail=f"File {filepath} not found")
         
         # Добавляем файл в DVC
-        result = subprocess.run(
-            ["dvc", "add", filepath],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        result = await run_dvc("add", filepath)
         
         if result.returncode != 0:
             raise HTTPException(
@@ -299,7 +454,7 @@ async def add_to_dvc(filepath: str):
         # Добавляем .dvc файл в git
         dvc_file = f"{filepath}.dvc"
         if os.path.exists(dvc_file):
-            subprocess.run(["git", "add", dvc_file], cwd="/app")
+            await run_command("git", "add", dvc_file)
         
         return {
             "status": "success",
@@ -316,12 +471,7 @@ async def get_dvc_config():
     """Получить конфигурацию DVC"""
     try:
         # Получаем конфигурацию удаленного репозитория
-        result = subprocess.run(
-            ["dvc", "remote", "list"],
-            capture_output=True,
-            text=True,
-            cwd="/app"
-        )
+        result = await run_dvc("remote", "list")
         
         return {
             "status": "success",
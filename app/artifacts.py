@@ -0,0 +1,126 @@
+# app/artifacts.py
+"""
+Формат артефактов моделей с отображаемыми в память массивами.
+
+Модель сериализуется pickle протокола 5: структура объекта остаётся
+в pickle-потоке, а NumPy-массивы (узлы деревьев, коэффициенты)
+выносятся out-of-band и пишутся в файл сырыми выровненными блоками.
+При загрузке из файла блоки отображаются через mmap, и массивы,
+которые pickle отдаёт объекту как есть (коэффициенты линейных моделей,
+атрибуты-ndarray), ссылаются прямо на страницы файла: процессы делят
+одну копию в page cache, а загрузка не читает их с диска целиком.
+
+Деревья sklearn так не работают: Tree.__setstate__ копирует массивы
+узлов и значений в свою память. Для лесов формат экономит только
+промежуточную копию при чтении файла — каждый процесс по-прежнему
+держит свою копию деревьев, и загрузка растёт с их размером.
+
+Раскладка файла (little-endian):
+
+    0   MAGIC (8 байт)
+    8   uint32  версия формата
+    12  uint32  число буферов N
+    16  uint64  смещение pickle-потока
+    24  uint64  длина pickle-потока
+    32  N × (uint64 смещение, uint64 длина) буферов
+
+Каждый буфер и pickle-поток выровнены на ALIGNMENT байт.
+"""
+import io
+import mmap
+import pickle
+import struct
+
+MAGIC = b"MLOPSART"
+FORMAT_VERSION = 1
+FORMAT_NAME = f"mmap-v{FORMAT_VERSION}"
+ALIGNMENT = 64
+
+_HEADER = struct.Struct("<8sIIQQ")
+_ENTRY = struct.Struct("<QQ")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_artifact(prefix: bytes) -> bool:
+    """Начинаются ли данные с заголовка этого формата (а не с обычного pickle)."""
+    return bytes(prefix[:len(MAGIC)]) == MAGIC
+
+
+def dump(model, f):
+    """
+    Пишет артефакт модели в файловый объект последовательно.
+
+    Массивы модели пишутся прямо из её памяти, без сборки всего
+    артефакта в промежуточном буфере, поэтому f может быть пайпом
+    в загрузку.
+    """
+    buffers = []
+    payload = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+    raw = [b.raw() for b in buffers]
+
+    offset = _align(_HEADER.size + _ENTRY.size * len(raw))
+    payload_offset = offset
+    offset = _align(offset + len(payload))
+    entries = []
+    for view in raw:
+        entries.append((offset, view.nbytes))
+        offset = _align(offset + view.nbytes)
+
+    header = bytearray(payload_offset)
+    _HEADER.pack_into(header, 0, MAGIC, FORMAT_VERSION, len(raw), payload_offset, len(payload))
+    for i, entry in enumerate(entries):
+        _ENTRY.pack_into(header, _HEADER.size + i * _ENTRY.size, *entry)
+    f.write(header)
+    f.write(payload)
+    position = payload_offset + len(payload)
+    for (start, length), view in zip(entries, raw):
+        f.write(bytes(start - position))
+        f.write(view)
+        position = start + length
+    f.write(bytes(offset - position))
+
+
+def dumps(model) -> bytes:
+    """Сериализует модель в артефакт с выровненными out-of-band буферами."""
+    out = io.BytesIO()
+    dump(model, out)
+    return out.getvalue()
+
+
+def loads(data):
+    """
+    Восстанавливает модель из артефакта без копирования буферов.
+
+    data — bytes, memoryview или mmap; массивы модели будут
+    представлениями над ним.
+    """
+    view = memoryview(data)
+    magic, version, count, payload_offset, payload_length = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a model artifact")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {version}")
+    buffers = []
+    for i in range(count):
+        start, length = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+        buffers.append(view[start:start + length])
+    return pickle.loads(view[payload_offset:payload_offset + payload_length], buffers=buffers)
+
+
+def load_file(path: str):
+    """
+    Загружает модель из файла: артефакт — через mmap, иначе как обычный pickle.
+
+    Отображение остаётся живым, пока на него ссылаются массивы модели;
+    массивы, которые объект копирует при распаковке (узлы деревьев),
+    оказываются в памяти процесса.
+    """
+    with open(path, "rb") as f:
+        if not is_artifact(f.read(len(MAGIC))):
+            f.seek(0)
+            return pickle.load(f)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(mapped)
@@ -0,0 +1,444 @@
+# app/async_storage.py
+"""
+Асинхронная реализация ModelStore для процесса FastAPI.
+
+Запросы к S3 идут через aiobotocore прямо в event loop со своим пулом
+соединений aiohttp, поэтому число одновременных обращений к Minio не
+ограничено размером пула потоков: каталог (/models/, /delete/), холодная
+загрузка моделей в кэш и сохранение моделей задач обучения. В потоки
+уходят только работа CPU и файловой системы: сериализация,
+десериализация и дисковый кэш. Синхронный Storage остаётся для
+gRPC-сервера и процессов инференса; ключи, манифест и формат артефактов
+у реализаций общие.
+
+aiobotocore импортируется при открытии клиента, поэтому модуль можно
+импортировать и там, где он не установлен.
+"""
+import asyncio
+import json
+import os
+import tempfile
+from collections import deque
+from contextlib import AsyncExitStack
+from botocore.exceptions import ClientError
+from app import artifacts
+from app.executors import run_io
+from app.logger import log
+from app.metrics import DESERIALIZE, STORAGE_FETCH, register_model
+from app.storage import (
+    MANIFEST_KEY, MANIFEST_RETRIES, MB, MINIO_CONNECT_TIMEOUT, MINIO_MAX_ATTEMPTS,
+    MINIO_MAX_POOL_CONNECTIONS, MINIO_MULTIPART_CHUNK_MB, MINIO_MULTIPART_THRESHOLD_MB,
+    MINIO_READ_TIMEOUT, MINIO_TRANSFER_CONCURRENCY, ManifestConflictError, ModelStore,
+    _copy, _object_size, _PipeReader, connection_params, default_disk_cache, parse_ref,
+)
+
+
+class AsyncStorage(ModelStore):
+    """ModelStore на корутинах; перед использованием нужен await open()."""
+
+    def __init__(self):
+        self.s3 = None
+        self._stack = None
+        self.multipart_threshold = int(MINIO_MULTIPART_THRESHOLD_MB * MB)
+        self.chunk_size = int(MINIO_MULTIPART_CHUNK_MB * MB)
+        # Части multipart и Range GET в полёте, общие для всех передач клиента
+        self._transfers = asyncio.Semaphore(MINIO_TRANSFER_CONCURRENCY)
+        # Последний прочитанный манифест и его ETag
+        self._manifest = ({'models': {}}, None)
+        self.disk_cache = default_disk_cache()
+
+    async def open(self):
+        """Создаёт клиент с пулом соединений и проверяет бакет."""
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+
+        self._stack = AsyncExitStack()
+        self.s3 = await self._stack.enter_async_context(get_session().create_client(
+            's3',
+            **connection_params(),
+            config=AioConfig(
+                signature_version='s3v4',
+                max_pool_connections=MINIO_MAX_POOL_CONNECTIONS,
+                connect_timeout=MINIO_CONNECT_TIMEOUT,
+                read_timeout=MINIO_READ_TIMEOUT,
+                retries={'max_attempts': MINIO_MAX_ATTEMPTS, 'mode': 'adaptive'},
+            ),
+        ))
+        try:
+            await self._ensure_bucket()
+            log.info("Connected to MinIO (async)")
+        except Exception as e:
+            await self.close()
+            log.error(f"Cannot connect to MinIO: {e}")
+            raise Exception(f"MinIO connection failed: {str(e)}")
+        return self
+
+    async def close(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack = self.s3 = None
+
+    async def _ensure_bucket(self):
+        try:
+            await self.s3.head_bucket(Bucket=self.bucket)
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchBucket', 'NotFound'):
+                raise
+        try:
+            await self.s3.create_bucket(Bucket=self.bucket)
+            log.info(f"Bucket {self.bucket} created")
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ['BucketAlreadyOwnedByYou', 'BucketAlreadyExists']:
+                log.warning(f"Could not create bucket: {e}")
+
+    async def save(self, name: str, model, metrics: dict = None) -> dict:
+        """
+        Сохраняет новую версию модели и делает её последней.
+
+        Как у Storage.save: сериализатор пишет в пайп из фонового потока,
+        куски по chunk_size читаются из него в пуле I/O и сразу уходят в
+        S3. Объект не больше multipart-порога — один PUT, больше —
+        multipart с MINIO_TRANSFER_CONCURRENCY частями одновременно, так
+        что в памяти не больше порога плюс части в полёте.
+        """
+        write, metadata = self._serializer()
+        key = self.version_key(name)
+        with _PipeReader(lambda f: write(model, f)) as body:
+            etag, size = await self._upload(key, body, metadata)
+        entry = self._new_entry(key, etag, size, metadata, metrics)
+        try:
+            await self._update_manifest(self._add_version(name, entry))
+        except Exception:
+            # Версия не попала в манифест — артефакт никто не найдёт
+            await self.s3.delete_object(Bucket=self.bucket, Key=key)
+            raise
+        register_model(name)
+        log.info(f"Model {name} v{entry['version']} saved "
+                 f"({metadata['format']}, {metadata['codec']}, {entry['size']} bytes)")
+        return entry
+
+    async def _upload(self, key: str, body, metadata: dict):
+        """(ETag, размер) объекта key с содержимым файла body."""
+        head = deque()
+        size = 0
+        while size <= self.multipart_threshold:
+            chunk = await run_io(body.read, self.chunk_size)
+            if not chunk:
+                data = b''.join(head)
+                response = await self.s3.put_object(
+                    Bucket=self.bucket, Key=key, Body=data, Metadata=metadata
+                )
+                return response['ETag'], len(data)
+            head.append(chunk)
+            size += len(chunk)
+        return await self._upload_multipart(key, head, body, metadata)
+
+    async def _upload_multipart(self, key: str, head: deque, body, metadata: dict):
+        """Multipart-загрузка: сначала прочитанные куски head, затем остаток body."""
+        upload = await self.s3.create_multipart_upload(
+            Bucket=self.bucket, Key=key, Metadata=metadata
+        )
+        upload_id = upload['UploadId']
+
+        async def put_part(number, data):
+            part = await self.s3.upload_part(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data,
+            )
+            return {'PartNumber': number, 'ETag': part['ETag']}
+
+        tasks = []
+        size = 0
+        try:
+            while True:
+                chunk = head.popleft() if head else await run_io(body.read, self.chunk_size)
+                if not chunk:
+                    break
+                # Следующий кусок читается, только когда освободилось место
+                await self._transfers.acquire()
+                task = asyncio.ensure_future(put_part(len(tasks) + 1, chunk))
+                task.add_done_callback(lambda _: self._transfers.release())
+                tasks.append(task)
+                size += len(chunk)
+            parts = await asyncio.gather(*tasks)
+            response = await self.s3.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return response['ETag'], size
+
+    async def manifest(self) -> dict:
+        """Манифест моделей; условный GET, как у Storage.manifest."""
+        return (await self._read_manifest())[0]
+
+    async def _read_manifest(self):
+        cached, cached_etag = self._manifest
+        kwargs = {'IfNoneMatch': cached_etag} if cached_etag else {}
+        try:
+            obj = await self.s3.get_object(Bucket=self.bucket, Key=MANIFEST_KEY, **kwargs)
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == '304':
+                return cached, cached_etag
+            if code == 'NoSuchKey':
+                self._manifest = ({'models': {}}, None)
+                return self._manifest
+            raise
+        async with obj['Body'] as body:
+            self._manifest = (json.loads(await body.read()), obj['ETag'])
+        return self._manifest
+
+    async def _update_manifest(self, mutate):
+        """Условный PUT манифеста с повторами, как у Storage._update_manifest."""
+        for _ in range(MANIFEST_RETRIES):
+            manifest, etag = await self._read_manifest()
+            manifest = _copy(manifest)
+            if not mutate(manifest):
+                return False
+            condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+            try:
+                obj = await self.s3.put_object(
+                    Bucket=self.bucket, Key=MANIFEST_KEY, Body=json.dumps(manifest).encode(),
+                    ContentType='application/json', **condition
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                    continue
+                raise
+            self._manifest = (manifest, obj['ETag'])
+            return True
+        raise ManifestConflictError(f"Manifest update failed after {MANIFEST_RETRIES} attempts")
+
+    async def resolve(self, ref: str):
+        """(key, entry) по ссылке model_ref, см. ModelCatalog._resolve."""
+        return self._resolve(await self.manifest(), ref)
+
+    async def versions(self, name: str):
+        return self._versions(await self.manifest(), name)
+
+    async def load(self, ref: str):
+        model, _ = await self.load_with_etag(ref)
+        return model
+
+    async def load_with_etag(self, ref: str):
+        """
+        Загружает модель вместе с ETag объекта; (None, None), если её нет.
+
+        Как у Storage: дисковый кэш с условным GET, объект больше
+        multipart-порога качается параллельными Range GET с If-Match.
+        Куски пишутся в файл по смещениям и целиком в памяти не
+        собираются: несжатый объект — во временный файл дискового кэша,
+        сжатый — во временный файл, из которого он распаковывается.
+        """
+        with STORAGE_FETCH.time():
+            key, _ = await self.resolve(ref)
+        if key is None:
+            return None, None
+        cache = self.disk_cache
+        local_path, local_etag = await run_io(cache.lookup, key) if cache else (None, None)
+        kwargs = {'IfNoneMatch': local_etag} if local_etag else {}
+        while True:
+            try:
+                with STORAGE_FETCH.time():
+                    obj = await self.s3.get_object(
+                        Bucket=self.bucket, Key=key,
+                        Range=f'bytes=0-{self.chunk_size - 1}', **kwargs
+                    )
+                break
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'NoSuchKey':
+                    return None, None
+                if code != '304':
+                    raise
+            await run_io(cache.touch, local_path)
+            try:
+                with DESERIALIZE.time():
+                    return await run_io(artifacts.load_file, local_path), local_etag
+            except FileNotFoundError:
+                log.info(f"Cached {key} evicted before reading, downloading again")
+                kwargs = {}
+
+        etag = obj['ETag']
+        codec = self._codec(obj)
+        if codec.name != 'none':
+            with STORAGE_FETCH.time():
+                unpacked = await self._download_compressed(key, obj, codec)
+            with DESERIALIZE.time():
+                return await run_io(self._load_unpacked, unpacked), etag
+        if cache:
+            with STORAGE_FETCH.time():
+                path = await self._download_to_cache(key, obj)
+            with DESERIALIZE.time():
+                return await run_io(artifacts.load_file, path), etag
+
+        data = bytearray(_object_size(obj))
+
+        async def write_at(offset, chunk):
+            data[offset:offset + len(chunk)] = chunk
+
+        with STORAGE_FETCH.time():
+            await self._download(key, obj, write_at)
+        with DESERIALIZE.time():
+            return await run_io(self._deserialize, data), etag
+
+    async def _download_to_cache(self, key: str, first) -> str:
+        """Скачивает объект во временный файл и переносит его в дисковый кэш."""
+        cache = self.disk_cache
+        tmp_path = await run_io(cache.temp_path, key, first['ETag'])
+        try:
+            f = await run_io(open, tmp_path, 'wb')
+            try:
+                await self._download(key, first, _pwriter(f))
+            finally:
+                await run_io(f.close)
+            return await run_io(cache.commit, key, first['ETag'], tmp_path)
+        finally:
+            await run_io(_unlink, tmp_path)
+
+    async def _download_compressed(self, key: str, first, codec):
+        """Скачивает сжатый объект во временный файл и распаковывает, см. ModelStore._decompress."""
+        f = await run_io(tempfile.TemporaryFile)
+        try:
+            await self._download(key, first, _pwriter(f))
+            return await run_io(self._decompress, codec, f, key, first['ETag'])
+        finally:
+            await run_io(f.close)
+
+    async def _download(self, key: str, first, write_at):
+        """
+        Как Storage._download, но write_at(offset, bytes) — корутина.
+
+        Остаток объекта качается параллельными Range GET с If-Match на
+        ETag первого ответа, не больше MINIO_TRANSFER_CONCURRENCY сразу.
+        """
+        received = await _copy_body(first['Body'], 0, write_at)
+        size = _object_size(first)
+        if received >= size:
+            return
+        etag = first['ETag']
+
+        async def fetch(start, end):
+            async with self._transfers:
+                part = await self.s3.get_object(
+                    Bucket=self.bucket, Key=key, Range=f'bytes={start}-{end}', IfMatch=etag
+                )
+                await _copy_body(part['Body'], start, write_at)
+
+        await asyncio.gather(*(fetch(*r) for r in self._ranges(received, size)))
+
+    async def head(self, ref: str, etag: str = None):
+        """ETag модели без скачивания тела, как у Storage.head."""
+        key, entry = await self.resolve(ref)
+        if entry is not None or key is None:
+            return entry and entry['etag']
+        kwargs = {'IfNoneMatch': etag} if etag else {}
+        try:
+            obj = await self.s3.head_object(Bucket=self.bucket, Key=key, **kwargs)
+            return obj['ETag']
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == '304':
+                return etag
+            if code in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    async def list_models(self):
+        """Обученные модели по манифесту; без манифеста — перебор {имя}.pkl."""
+        manifest, etag = await self._read_manifest()
+        if etag is not None:
+            return self._list(manifest)
+        models = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        async for page in paginator.paginate(Bucket=self.bucket):
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith('.pkl') and '/' not in obj['Key']:
+                    models.append({
+                        'name': obj['Key'][:-len('.pkl')],
+                        'version': None,
+                        'size': obj['Size'],
+                        'last_modified': obj['LastModified'],
+                    })
+        return models
+
+    async def delete(self, ref: str) -> bool:
+        """Удаляет модель целиком (имя) или одну версию (имя@версия)."""
+        try:
+            name, version = parse_ref(ref)
+            removed = []
+            keys = [e['key'] for e in removed] if await self._update_manifest(self._drop(ref, removed)) else []
+            if version is None and await self.head(name) is not None:
+                keys.append(self.key(name))
+            for key in keys:
+                await self.s3.delete_object(Bucket=self.bucket, Key=key)
+                if self.disk_cache:
+                    await run_io(self.disk_cache.remove, key)
+            return bool(keys)
+        except Exception as e:
+            log.warning(f"Cannot delete model {ref}: {e}")
+            return False
+
+
+async def _copy_body(body, offset: int, write_at) -> int:
+    """Переписывает тело ответа через корутину write_at начиная с offset; возвращает конец."""
+    async with body:
+        async for chunk in body.iter_chunks(1 << 20):
+            await write_at(offset, chunk)
+            offset += len(chunk)
+    return offset
+
+
+def _pwriter(f):
+    """Корутина write_at(offset, bytes) для файла f: os.pwrite в пуле I/O."""
+    fd = f.fileno()
+
+    async def write_at(offset, chunk):
+        await run_io(os.pwrite, fd, chunk, offset)
+    return write_at
+
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Клиент aiohttp привязан к event loop, в котором открыт: свой экземпляр
+# на каждый работающий loop (в сервисе он один, у TestClient без
+# контекста — новый на запрос)
+_storages = {}
+_locks = {}
+
+
+def _forget_closed_loops():
+    for loop in list(_locks):
+        if loop.is_closed():
+            _storages.pop(loop, None)
+            _locks.pop(loop, None)
+
+
+async def get_async_storage() -> AsyncStorage:
+    """Открытый AsyncStorage текущего event loop (создаётся при первом вызове)."""
+    loop = asyncio.get_running_loop()
+    storage = _storages.get(loop)
+    if storage is None:
+        _forget_closed_loops()
+        async with _locks.setdefault(loop, asyncio.Lock()):
+            storage = _storages.get(loop)
+            if storage is None:
+                storage = _storages[loop] = await AsyncStorage().open()
+    return storage
+
+
+async def close_async_storage():
+    """Закрывает экземпляр текущего event loop и его пул соединений (остановка приложения)."""
+    storage = _storages.pop(asyncio.get_running_loop(), None)
+    if storage is not None:
+        await storage.close()
@@ -0,0 +1,107 @@
+# app/batching.py
+import asyncio
+import os
+import numpy as np
+from app.logger import log
+from app.metrics import MICRO_BATCH_QUEUE_DEPTH, MICRO_BATCH_SIZE
+
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+
+class _Batch:
+    __slots__ = ("storage", "rows", "futures", "timer")
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.rows = []
+        self.futures = []
+        self.timer = None
+
+
+class MicroBatcher:
+    """
+    Склеивает одиночные предсказания одной модели в один вызов predict.
+
+    Строки копятся в очереди модели и сбрасываются единым NumPy-батчем,
+    когда набралось max_batch_size строк или с первой строки прошло
+    max_wait_ms миллисекунд. Каждый вызывающий получает свою строку
+    результата. Сам predict выполняется через infer, вне event loop.
+    """
+
+    def __init__(self, max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS, infer=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        if infer is None:
+            from app.inference import infer
+        self.infer = infer
+        self._pending = {}
+        self._tasks = set()
+        self.queue_depth = MICRO_BATCH_QUEUE_DEPTH
+        self.batch_size = MICRO_BATCH_SIZE
+
+    async def predict(self, model_id: str, features, storage=None):
+        """Предсказание для одной строки признаков через общую очередь модели."""
+        row = np.asarray(features, dtype=np.float64)
+        if row.ndim != 1:
+            raise ValueError(f"Expected 1-D feature row, got shape {row.shape}")
+
+        loop = asyncio.get_running_loop()
+        # Длина строки входит в ключ: строка другой формы не должна
+        # уронить чужой батч.
+        key = (model_id, row.shape[0])
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch(storage)
+            batch.timer = loop.call_later(self.max_wait, self._flush, key)
+        future = loop.create_future()
+        batch.rows.append(row)
+        batch.futures.append(future)
+        self.queue_depth.observe(len(batch.rows))
+
+        if len(batch.rows) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(key)
+        return await future
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        self.batch_size.observe(len(batch.rows))
+        task = asyncio.ensure_future(self._run(key[0], batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, model_id, batch):
+        try:
+            predictions, _, _ = await self.infer(model_id, np.vstack(batch.rows), storage=batch.storage)
+        except Exception as e:
+            if not isinstance(e, LookupError):
+                log.error(f"Micro-batch prediction error for {model_id}: {e}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, prediction in zip(batch.futures, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(batch.rows) for batch in self._pending.values())
+
+    def stats(self) -> dict:
+        return {
+            "enabled": MICRO_BATCHING,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": self.pending,
+            "queue_depth": self.queue_depth.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+
+micro_batcher = MicroBatcher()
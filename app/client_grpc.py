@@ -1,8 +1,8 @@
 import grpc
-import pickle
 import numpy as np
 from app import model_service_pb2
 from app import model_service_pb2_grpc
+from app.tensors import to_params, to_tensor
 
 def run():
     with grpc.insecure_channel('localhost:50051') as channel:
@@ -11,12 +11,12 @@ def run():
         # Подготовка реальных данных для forest
         X_forest = np.array([[5.1, 3.5, 1.4, 0.2], [4.9, 3.0, 1.4, 0.2]])
         y_forest = np.array([0, 0])
-        data_forest = pickle.dumps({'X': X_forest, 'y': y_forest})
 
         request_forest = model_service_pb2.TrainRequest(
             name="forest",
-            params={"n_estimators": 10, "max_depth": 5},
-            data=data_forest
+            typed_params=to_params({"n_estimators": 10, "max_depth": 5}),
+            X=to_tensor(X_forest),
+            y=to_tensor(y_forest),
         )
         response_forest = stub.TrainModel(request_forest)
         print(f"Train response for forest: {response_forest.status}")
@@ -24,12 +24,12 @@ def run():
         # Подготовка реальных данных для logreg
         X_logreg = np.array([[5.1, 3.5, 1.4, 0.2], [4.9, 3.0, 1.4, 0.2]])
         y_logreg = np.array([0, 0])
-        data_logreg = pickle.dumps({'X': X_logreg, 'y': y_logreg})
 
         request_logreg = model_service_pb2.TrainRequest(
             name="logreg",
-            params={"max_iter": 100, "C": 1.0},
-            data=data_logreg
+            typed_params=to_params({"max_iter": 100, "C": 1.0}),
+            X=to_tensor(X_logreg),
+            y=to_tensor(y_logreg),
         )
         response_logreg = stub.TrainModel(request_logreg)
         print(f"Train response for logreg: {response_logreg.status}")
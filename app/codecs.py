@@ -0,0 +1,96 @@
+# app/codecs.py
+"""
+Кодеки сжатия артефактов моделей.
+
+Кодек сжимает поток сериализации при сохранении и распаковывает поток
+при загрузке, поэтому ни сжатый, ни исходный артефакт целиком в памяти
+не собирается. Имя кодека пишется в метаданные объекта (codec), и
+загрузка выбирает распаковщик по ним; объекты без метаданных — несжатые.
+
+zstd (пакет zstandard) и lz4 — необязательные зависимости и
+импортируются при первом использовании; gzip есть всегда.
+"""
+import gzip
+
+
+class Codec:
+    """Пара потоковых обёрток: writer(f, level) для записи и reader(f) для чтения."""
+
+    def __init__(self, name: str, writer, reader, default_level=None):
+        self.name = name
+        self._writer = writer
+        self._reader = reader
+        self.default_level = default_level
+
+    def writer(self, f, level: int = None):
+        """
+        Файловый объект, сжимающий записанное в f.
+
+        Его нужно закрыть, чтобы дописать конец потока; сам f при этом
+        остаётся открытым.
+        """
+        return self._writer(f, self.default_level if level is None else level)
+
+    def reader(self, f):
+        """Файловый объект с распакованным содержимым f."""
+        return self._reader(f)
+
+
+class _Passthrough:
+    """Запись без сжатия; close не закрывает f."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        return self._f.write(data)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _zstd_writer(f, level):
+    import zstandard
+    return zstandard.ZstdCompressor(level=level).stream_writer(f, closefd=False)
+
+
+def _zstd_reader(f):
+    import zstandard
+    return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+
+
+def _lz4_writer(f, level):
+    import lz4.frame
+    return lz4.frame.LZ4FrameFile(f, mode="wb", compression_level=level)
+
+
+def _lz4_reader(f):
+    import lz4.frame
+    return lz4.frame.LZ4FrameFile(f, mode="rb")
+
+
+CODECS = {
+    "none": Codec("none", lambda f, level: _Passthrough(f), lambda f: f),
+    "gzip": Codec(
+        "gzip",
+        lambda f, level: gzip.GzipFile(fileobj=f, mode="wb", compresslevel=level, mtime=0),
+        lambda f: gzip.GzipFile(fileobj=f, mode="rb"),
+        default_level=6,
+    ),
+    "zstd": Codec("zstd", _zstd_writer, _zstd_reader, default_level=3),
+    "lz4": Codec("lz4", _lz4_writer, _lz4_reader, default_level=0),
+}
+
+
+def get_codec(name: str = None) -> Codec:
+    """Кодек по имени; пустое имя — без сжатия. ValueError для неизвестного."""
+    codec = CODECS.get(name or "none")
+    if codec is None:
+        raise ValueError(f"Unknown compression codec: {name!r}, expected one of {sorted(CODECS)}")
+    return codec
@@ -0,0 +1,207 @@
+# app/compiled.py
+"""
+Компиляция обученных моделей в плоские массивы для быстрого инференса.
+
+Для одиночных строк и маленьких батчей большая часть времени
+model.predict в sklearn уходит на валидацию входа и диспетчеризацию
+joblib. Здесь RandomForestClassifier превращается в общие для всех
+деревьев массивы узлов (left/right/feature/threshold/leaf-вероятности),
+а LogisticRegression — в матрицу коэффициентов; предсказание считается
+векторизованно на NumPy. Скомпилированная модель подменяет исходную
+только после проверки совпадения ответов со sklearn.
+"""
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+from app.logger import log
+
+if TYPE_CHECKING:
+    # sklearn импортируется в compile_model, а не при импорте модуля
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+NATIVE_INFERENCE = os.getenv("NATIVE_INFERENCE", "1") == "1"
+PARITY_SAMPLES = int(os.getenv("NATIVE_PARITY_SAMPLES", "512"))
+# Начиная с этого размера батча лес считает sklearn: на больших входах
+# его многопоточный обход деревьев выгоднее векторного обхода на NumPy
+NATIVE_FOREST_MAX_ROWS = int(os.getenv("NATIVE_FOREST_MAX_ROWS", "128"))
+
+
+class CompiledModel:
+    """Общий интерфейс скомпилированных моделей, совместимый со sklearn."""
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.classes_ = estimator.classes_
+        self.n_features_in_ = estimator.n_features_in_
+
+    def _check(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, but {type(self.estimator).__name__} "
+                f"is expecting {self.n_features_in_} features as input."
+            )
+        return X
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_proba(self, X):
+        raise NotImplementedError
+
+    def __getattr__(self, name):
+        # Всё остальное (score, get_params, ...) — у исходной модели
+        if name == "estimator":
+            raise AttributeError(name)
+        return getattr(self.estimator, name)
+
+
+class CompiledForest(CompiledModel):
+    """
+    Лес, сведённый к одному массиву узлов всех деревьев.
+
+    Исходная модель остаётся для больших батчей и пропусков, поэтому
+    вероятности хранятся только для листьев: лист ведёт влево сам на себя,
+    а его right — номер строки в таблице вероятностей листьев. Индексы
+    остаются intp: с int32 NumPy переводит их при каждом обходе.
+    """
+
+    def __init__(self, estimator: "RandomForestClassifier", max_rows: int = NATIVE_FOREST_MAX_ROWS):
+        super().__init__(estimator)
+        self.max_rows = max_rows
+        lefts, rights, features, thresholds, probas, roots = [], [], [], [], [], []
+        offset = 0
+        n_leaves = 0
+        depth = 0
+        for tree in (e.tree_ for e in estimator.estimators_):
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            leaf_rows = np.cumsum(leaf) - 1 + n_leaves
+            # Лист ссылается сам на себя: обход можно делать фиксированное
+            # число шагов без ветвлений по "дошли ли до листа"
+            lefts.append(np.where(leaf, np.arange(offset, offset + n), tree.children_left + offset))
+            rights.append(np.where(leaf, leaf_rows, tree.children_right + offset))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            value = tree.value[leaf, 0, :]
+            probas.append(value / value.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += n
+            n_leaves += len(value)
+            depth = max(depth, tree.max_depth)
+
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.proba = np.concatenate(probas)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = depth
+
+    def predict_proba(self, X):
+        X = self._check(X)
+        if len(X) > self.max_rows or np.isnan(X).any():
+            # Большие батчи и маршрутизацию пропусков оставляем sklearn
+            return self.estimator.predict_proba(X)
+        # Деревья sklearn сравнивают признаки во float32
+        X = X.astype(np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            next_nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            if np.array_equal(next_nodes, nodes):
+                break
+            nodes = next_nodes
+        return self.proba[self.right[nodes]].mean(axis=1)
+
+
+class CompiledLogReg(CompiledModel):
+    """Логистическая регрессия как матрица коэффициентов."""
+
+    def __init__(self, estimator: "LogisticRegression"):
+        super().__init__(estimator)
+        self.coef = np.ascontiguousarray(estimator.coef_.T)
+        self.intercept = estimator.intercept_
+        # Схема определяется обученной моделью, а не multi_class: в новых
+        # sklearn это "deprecated" при любом обучении. Бинарная модель — одна
+        # строка coef_ (сигмоида); мультикласс — строка на класс, softmax,
+        # кроме one-vs-rest: liblinear иначе не обучает, а "ovr" задают явно
+        n_classes = len(estimator.classes_)
+        self.ovr = n_classes > 2 and estimator.coef_.shape[0] == n_classes and (
+            estimator.solver == "liblinear" or getattr(estimator, "multi_class", None) == "ovr"
+        )
+
+    def decision_function(self, X):
+        return self._check(X) @ self.coef + self.intercept
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            return self.classes_[(scores[:, 0] > 0).astype(np.intp)]
+        return self.classes_[np.argmax(scores, axis=1)]
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - p, p])
+        if self.ovr:
+            p = 1.0 / (1.0 + np.exp(-scores))
+            return p / p.sum(axis=1, keepdims=True)
+        scores = scores - scores.max(axis=1, keepdims=True)
+        p = np.exp(scores)
+        return p / p.sum(axis=1, keepdims=True)
+
+
+def _probes(compiled, n_samples):
+    """Контрольные входы: случайные точки плюс точные пороги деревьев."""
+    rng = np.random.default_rng(0)
+    n_features = compiled.n_features_in_
+    if isinstance(compiled, CompiledForest):
+        split = compiled.threshold < np.inf
+        X = rng.normal(size=(n_samples, n_features))
+        for f in range(n_features):
+            values = compiled.threshold[split & (compiled.feature == f)]
+            if len(values):
+                X[:, f] = rng.choice(values, n_samples) + rng.choice([-1e-3, 0.0, 1e-3], n_samples)
+        return X
+    return rng.normal(scale=3.0, size=(n_samples, n_features))
+
+
+def check_parity(compiled: CompiledModel, n_samples: int = PARITY_SAMPLES) -> bool:
+    """Совпадают ли ответы скомпилированной модели и sklearn."""
+    X = _probes(compiled, n_samples)
+    estimator = compiled.estimator
+    return bool(
+        np.array_equal(compiled.predict(X), estimator.predict(X))
+        and np.allclose(compiled.predict_proba(X), estimator.predict_proba(X), rtol=1e-7, atol=1e-9)
+    )
+
+
+def compile_model(model):
+    """
+    Скомпилированная версия модели или сама модель.
+
+    Неподдерживаемые модели (и те, что не прошли проверку паритета)
+    возвращаются без изменений.
+    """
+    # sklearn уже загружен: модель только что распакована из pickle
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    if isinstance(model, RandomForestClassifier) and model.n_outputs_ == 1:
+        compiled_cls = CompiledForest
+    elif isinstance(model, LogisticRegression):
+        compiled_cls = CompiledLogReg
+    else:
+        return model
+    try:
+        compiled = compiled_cls(model)
+        if check_parity(compiled):
+            return compiled
+        log.warning(f"Native inference parity check failed for {type(model).__name__}, using sklearn")
+    except Exception as e:
+        log.warning(f"Cannot compile {type(model).__name__}: {e}")
+    return model
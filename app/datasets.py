@@ -0,0 +1,214 @@
+# app/datasets.py
+"""
+Загрузка датасетов для обучения.
+
+Датасет — CSV из DATASETS_DIR (туда его кладёт /upload_dataset/ и
+версионирует DVC) со столбцом target; остальные столбцы — признаки.
+Если файла нет локально, он скачивается из remote командой dvc pull.
+
+Разобранные массивы кэшируются по md5 содержимого, который DVC уже
+посчитал и записал в {файл}.dvc: в памяти процесса и на диске в
+DATASET_CACHE_DIR как {md5}.X.npy / {md5}.y.npy. Повторная загрузка —
+чтение .npy через mmap вместо разбора CSV; новая версия датасета
+получает новый md5, поэтому кэш не нужно инвалидировать.
+"""
+import hashlib
+import os
+import subprocess
+import threading
+import uuid
+from collections import OrderedDict
+import numpy as np
+from app.executors import DVC_CWD
+from app.logger import log
+
+DATASETS_DIR = os.getenv("DATASETS_DIR", "/app/datasets")
+# Пустое значение отключает дисковый кэш
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "/tmp/mlops-datasets")
+# Сколько разобранных датасетов держать в памяти процесса
+DATASET_MEMORY_CACHE_SIZE = int(os.getenv("DATASET_MEMORY_CACHE_SIZE", "4"))
+TARGET_COLUMN = "target"
+
+# LRU: md5 -> (X, y), последний использованный — в конце
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+class DatasetNotFoundError(FileNotFoundError):
+    pass
+
+
+def dataset_path(name: str) -> str:
+    """Путь к CSV датасета; имя можно передавать с .csv и без."""
+    if not name.endswith(".csv"):
+        name += ".csv"
+    return os.path.join(DATASETS_DIR, os.path.basename(name))
+
+
+def dataset_md5(path: str) -> str:
+    """
+    md5 содержимого из {path}.dvc.
+
+    Без .dvc-файла или если он старше CSV (файл перезаписан, а dvc add
+    ещё не прошёл) md5 считается по самому файлу.
+    """
+    try:
+        if os.path.getmtime(f"{path}.dvc") < os.path.getmtime(path):
+            raise FileNotFoundError
+        with open(f"{path}.dvc") as f:
+            for line in f:
+                key, _, value = line.strip().lstrip("- ").partition(":")
+                if key == "md5" and value.strip():
+                    return value.strip().strip("'\"")
+    except FileNotFoundError:
+        pass
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pull(path: str):
+    """Скачивает датасет из DVC remote, если локальной копии нет."""
+    target = os.path.relpath(path, DVC_CWD)
+    log.info(f"Dataset {target} not found locally, running dvc pull")
+    try:
+        result = subprocess.run(["dvc", "pull", target], cwd=DVC_CWD, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise DatasetNotFoundError(f"Dataset not found: {path} (dvc is not installed)")
+    if result.returncode != 0 or not os.path.exists(path):
+        raise DatasetNotFoundError(f"Dataset not found: {path}: {result.stderr.strip()}")
+
+
+def local_path(name: str) -> str:
+    """Путь к локальной копии датасета; при отсутствии — dvc pull."""
+    path = dataset_path(name)
+    if not os.path.exists(path):
+        _pull(path)
+    return path
+
+
+def _split(frame, path: str):
+    if TARGET_COLUMN not in frame.columns:
+        raise ValueError(f"Dataset {os.path.basename(path)} has no '{TARGET_COLUMN}' column")
+    y = frame.pop(TARGET_COLUMN).to_numpy()
+    X = frame.to_numpy(dtype=np.float64)
+    return X, y
+
+
+def parse_csv(path: str):
+    """Читает CSV и отделяет столбец target. ValueError, если его нет."""
+    import pandas as pd
+    return _split(pd.read_csv(path), path)
+
+
+def iter_chunks(name: str, chunk_rows: int):
+    """
+    Датасет порциями по chunk_rows строк: генератор пар (X, y).
+
+    В памяти одновременно только текущая порция, поэтому датасет может
+    быть больше памяти пода. Кэш разобранных массивов не используется.
+    """
+    import pandas as pd
+
+    path = local_path(name)
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        for frame in reader:
+            yield _split(frame, path)
+
+
+def dataset_classes(name: str, chunk_rows: int) -> np.ndarray:
+    """
+    Все значения target, отсортированные.
+
+    partial_fit нужен полный список классов уже в первом вызове;
+    читается только столбец target, тоже порциями.
+    """
+    import pandas as pd
+
+    path = local_path(name)
+    classes = []
+    try:
+        with pd.read_csv(path, usecols=[TARGET_COLUMN], chunksize=chunk_rows) as reader:
+            for frame in reader:
+                classes = np.union1d(classes, frame[TARGET_COLUMN].unique()) if len(classes) \
+                    else np.unique(frame[TARGET_COLUMN].to_numpy())
+    except ValueError as e:
+        raise ValueError(f"Dataset {os.path.basename(path)} has no '{TARGET_COLUMN}' column") from e
+    return np.asarray(classes)
+
+
+def _cache_paths(md5: str):
+    base = os.path.join(DATASET_CACHE_DIR, md5)
+    return f"{base}.X.npy", f"{base}.y.npy"
+
+
+def _read_disk(md5: str):
+    if not DATASET_CACHE_DIR:
+        return None
+    x_path, y_path = _cache_paths(md5)
+    try:
+        return np.load(x_path, mmap_mode="r"), np.load(y_path)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_disk(md5: str, X, y):
+    """Атомарно пишет .npy: параллельные процессы не видят недописанный файл."""
+    if not DATASET_CACHE_DIR:
+        return
+    os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+    # y первым: X — признак того, что запись завершена
+    for path, array in zip(reversed(_cache_paths(md5)), (y, X)):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _remember(md5: str, data):
+    with _lock:
+        _memory[md5] = data
+        _memory.move_to_end(md5)
+        while len(_memory) > DATASET_MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def load_dataset(name: str):
+    """
+    Признаки и метки датасета name.
+
+    Returns:
+        (X, y): X — float64 (rows x features); с дискового кэша X
+        отображается в память только для чтения
+    """
+    path = local_path(name)
+    md5 = dataset_md5(path)
+
+    with _lock:
+        data = _memory.get(md5)
+        if data is not None:
+            _memory.move_to_end(md5)
+    if data is not None:
+        return data
+    data = _read_disk(md5)
+    if data is None:
+        data = parse_csv(path)
+        log.info(f"Dataset {name} parsed: {data[0].shape[0]} rows, {data[0].shape[1]} features")
+        try:
+            _write_disk(md5, *data)
+        except (OSError, ValueError) as e:
+            # y с объектами (строковые метки) в .npy без pickle не пишется
+            log.warning(f"Dataset {name} not cached on disk: {e}")
+    _remember(md5, data)
+    return data
+
+
+def clear_memory_cache():
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,161 @@
+# app/disk_cache.py
+"""
+Локальный дисковый кэш артефактов моделей, общий для процессов контейнера.
+
+Файл называется {ключ}.{хэш ключа}@{ETag}.art: по имени видно, какой
+объект и какую его версию он хранит, и GET можно сделать условным
+(If-None-Match). "/" в ключе заменяется на "_" только для читаемости,
+различает ключи хэш: a/b.pkl и a_b.pkl не делят файл. На ключ
+хранится одна версия. Запись атомарна: временный файл и os.replace,
+поэтому параллельные процессы никогда не видят недописанный файл.
+Объём ограничен бюджетом в байтах: при превышении удаляются файлы,
+к которым дольше всего не обращались (время обращения — mtime,
+обновляется при каждом попадании).
+
+Удаление файла не ломает процессы, которые держат его mmap: на Linux
+отображение остаётся валидным до закрытия.
+"""
+import glob
+import hashlib
+import os
+import time
+import uuid
+from app.logger import log
+
+SUFFIX = ".art"
+# Брошенные временные файлы упавших процессов удаляются при вытеснении
+STALE_TMP_SECONDS = 3600
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: int = 0):
+        """
+        Args:
+            directory: каталог кэша
+            max_bytes: бюджет в байтах; 0 — без ограничения
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key: str, etag: str) -> str:
+        safe_key = key.replace('/', '_')
+        digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{safe_key}.{digest}@{etag.strip(chr(34))}{SUFFIX}")
+
+    def lookup(self, key: str):
+        """Путь и ETag (в кавычках, как у S3) локальной копии ключа; (None, None), если её нет."""
+        prefix = self.path(key, '')[:-len(SUFFIX)]
+        paths = glob.glob(glob.escape(prefix) + '*' + SUFFIX)
+        if not paths:
+            return None, None
+        path = max(paths, key=_mtime)
+        return path, f'"{path[len(prefix):-len(SUFFIX)]}"'
+
+    def touch(self, path: str):
+        """Отмечает обращение к файлу для LRU."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def put(self, key: str, etag: str, chunks) -> str:
+        """Атомарно записывает версию etag ключа из итератора байтовых кусков."""
+        def write(f):
+            for chunk in chunks:
+                f.write(chunk)
+        return self.write(key, etag, write)
+
+    def write(self, key: str, etag: str, writer) -> str:
+        """
+        Атомарно записывает версию etag ключа функцией writer(f).
+
+        f — файл, открытый на запись; writer может писать и по смещениям
+        (os.pwrite в f.fileno()). Старые версии ключа удаляются, затем
+        кэш ужимается до бюджета.
+
+        Returns:
+            путь к файлу
+        """
+        tmp_path = self.temp_path(key, etag)
+        try:
+            with open(tmp_path, 'wb') as f:
+                writer(f)
+            return self.commit(key, etag, tmp_path)
+        finally:
+            _remove(tmp_path)
+
+    def temp_path(self, key: str, etag: str) -> str:
+        """Новый временный файл для версии etag ключа; в кэш его переносит commit."""
+        os.makedirs(self.directory, exist_ok=True)
+        return f"{self.path(key, etag)}.{uuid.uuid4().hex}.tmp"
+
+    def commit(self, key: str, etag: str, tmp_path: str) -> str:
+        """
+        Атомарно переносит дописанный временный файл в кэш как версию etag ключа.
+
+        Returns:
+            путь к файлу
+        """
+        path = self.path(key, etag)
+        os.replace(tmp_path, path)
+        self.remove(key, keep=path)
+        self.evict(keep=path)
+        return path
+
+    def remove(self, key: str, keep: str = None):
+        """Удаляет локальные копии ключа (кроме keep)."""
+        prefix = self.path(key, '')[:-len(SUFFIX)]
+        for path in glob.glob(glob.escape(prefix) + '*' + SUFFIX):
+            if path != keep:
+                _remove(path)
+
+    def evict(self, keep: str = None):
+        """Удаляет давно не использованные файлы, пока объём больше бюджета."""
+        now = time.time()
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith('.tmp'):
+                if now - stat.st_mtime > STALE_TMP_SECONDS:
+                    _remove(path)
+                continue
+            if name.endswith(SUFFIX):
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        if not self.max_bytes:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            _remove(path)
+            total -= size
+            log.info(f"Disk cache evicted {os.path.basename(path)} ({size} bytes)")
+
+    def size(self) -> int:
+        """Суммарный объём файлов кэша, байт."""
+        return sum(os.path.getsize(p) for p in glob.glob(os.path.join(glob.escape(self.directory), '*' + SUFFIX)))
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
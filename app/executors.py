@@ -0,0 +1,143 @@
+# app/executors.py
+import asyncio
+import functools
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.logger import log
+from app.metrics import DVC
+
+# Потоки под блокирующий I/O: boto3, MLflow, файловая система
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+# Потоки под инференс; sklearn отпускает GIL внутри predict
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
+# >0 — инференс в отдельных процессах со своим кэшем моделей
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))
+# Процессы под обучение; 0 — обучение в потоке (удобно для разработки)
+TRAIN_PROCESSES = int(os.getenv("TRAIN_PROCESSES", "2"))
+DVC_CWD = os.getenv("DVC_CWD", "/app")
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _create_pool(name):
+    if name == "io":
+        return ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="io")
+    if name == "inference":
+        if INFERENCE_PROCESSES > 0:
+            from app.inference import init_inference_worker
+            context = multiprocessing.get_context("spawn")
+            # Сюда каждый воркер сообщает, что прогрел свой кэш (app.preload)
+            warmed = context.Queue()
+            pool = ProcessPoolExecutor(
+                INFERENCE_PROCESSES,
+                mp_context=context,
+                initializer=init_inference_worker,
+                initargs=(warmed,),
+            )
+            pool.warmed = warmed
+            return pool
+        return ThreadPoolExecutor(INFERENCE_WORKERS, thread_name_prefix="inference")
+    if name == "training":
+        if TRAIN_PROCESSES > 0:
+            return ProcessPoolExecutor(
+                TRAIN_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+        return ThreadPoolExecutor(1, thread_name_prefix="training")
+    raise ValueError(f"Unknown pool: {name}")
+
+
+def get_pool(name: str):
+    """Пул по имени (io, inference, training); создаётся при первом обращении."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = _create_pool(name)
+                log.info(f"Executor {name} started: {pool}")
+    return pool
+
+
+def _replace_pool(name: str, broken):
+    """Меняет сломанный пул на новый; пул, уже заменённый другим потоком, не трогает."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is broken:
+            pool = _pools[name] = _create_pool(name)
+            log.warning(f"Executor {name} broken (worker died), restarted: {pool}")
+    broken.shutdown(wait=False, cancel_futures=True)
+    return pool
+
+
+def submit_to(name: str, fn, *args, **kwargs):
+    """
+    pool.submit в пуле name.
+
+    Процесс пула, убитый посреди задачи (например, OOM), ломает
+    ProcessPoolExecutor навсегда: его задача получает BrokenProcessPool,
+    а следующая отправка заменяет пул новым, без перезапуска сервиса.
+    """
+    pool = get_pool(name)
+    try:
+        return pool.submit(fn, *args, **kwargs)
+    except BrokenProcessPool:
+        return _replace_pool(name, pool).submit(fn, *args, **kwargs)
+
+
+async def _run_in(name, fn, *args, **kwargs):
+    return await asyncio.wrap_future(submit_to(name, functools.partial(fn, *args, **kwargs)))
+
+
+async def run_io(fn, *args, **kwargs):
+    """Выполняет блокирующий I/O в пуле потоков."""
+    return await _run_in("io", fn, *args, **kwargs)
+
+
+async def run_inference(fn, *args, **kwargs):
+    """Выполняет инференс в пуле инференса."""
+    return await _run_in("inference", fn, *args, **kwargs)
+
+
+async def run_training(fn, *args, **kwargs):
+    """Выполняет обучение в пуле обучения."""
+    return await _run_in("training", fn, *args, **kwargs)
+
+
+async def run_command(*cmd, cwd: str = DVC_CWD) -> subprocess.CompletedProcess:
+    """
+    Асинхронный аналог subprocess.run(cmd, capture_output=True, text=True).
+
+    Процесс запускается через asyncio.create_subprocess_exec, поэтому
+    ожидание его завершения не блокирует event loop.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+    )
+    stdout, stderr = await proc.communicate()
+    return subprocess.CompletedProcess(
+        list(cmd), proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+    )
+
+
+async def run_dvc(*args, cwd: str = DVC_CWD) -> subprocess.CompletedProcess:
+    """Запускает команду dvc без блокировки event loop."""
+    with DVC.time():
+        return await run_command("dvc", *args, cwd=cwd)
+
+
+def shutdown_executors(wait: bool = True):
+    """Останавливает все созданные пулы."""
+    with _pools_lock:
+        pools = list(_pools.items())
+        _pools.clear()
+    for name, pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
+        log.info(f"Executor {name} stopped")
@@ -1,32 +1,66 @@
 from concurrent import futures
+import asyncio
+import os
 import grpc
 import pickle
+import numpy as np
 from app import model_service_pb2
 from app import model_service_pb2_grpc
-from app.models import ModelTrainer
-from app.storage import Storage
+from app.models import MODEL_TYPES
+from app.storage import get_storage, model_ref
+from app.inference import (
+    BatchTooLargeError, ModelNotFoundError, from_packed, infer, infer_sync, to_matrix
+)
+from app.executors import run_io
+from app.tensors import DTYPES, from_params, from_tensor, to_params
+from app.upload import MemmapRef, RowBuffer
+from app.jobs import JobCancelledError, job_manager, search_and_save, train_and_save
+from app.preload import preload_models
+from app.search import parse_space
+from app.tracking import tracker
+from app.metrics import grpc_aio_interceptor, grpc_interceptor, start_metrics_server
 from app.logger import log
 
+GRPC_PORT = int(os.getenv("GRPC_PORT", "50051"))
+# sync — пул потоков на запрос, aio — event loop grpc.aio
+GRPC_SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "sync")
+# Потоки sync-сервера: столько RPC обрабатывается одновременно
+GRPC_MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+# Больше RPC сервер сразу отклоняет с RESOURCE_EXHAUSTED; 0 — без ограничения
+GRPC_MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "0"))
+GRPC_MAX_MESSAGE_MB = int(os.getenv("GRPC_MAX_MESSAGE_MB", "64"))
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "60000"))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "20000"))
+# Приём устаревшего TrainRequest.data (pickle небезопасен для недоверенных клиентов)
+GRPC_ALLOW_PICKLE = os.getenv("GRPC_ALLOW_PICKLE", "1") == "1"
+# Порт HTTP-эндпоинта /metrics процесса gRPC
+GRPC_METRICS_PORT = int(os.getenv("GRPC_METRICS_PORT", "9100"))
+
+
+def server_options():
+    """Ограничения размера сообщений и keepalive, общие для обоих режимов."""
+    max_message = GRPC_MAX_MESSAGE_MB * 1024 * 1024
+    return [
+        ("grpc.max_receive_message_length", max_message),
+        ("grpc.max_send_message_length", max_message),
+        ("grpc.keepalive_time_ms", GRPC_KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", GRPC_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        # Клиентские ping не чаще, чем шлёт сам сервер
+        ("grpc.http2.min_ping_interval_without_data_ms", GRPC_KEEPALIVE_TIME_MS // 2),
+    ]
+
 
 class ModelService(model_service_pb2_grpc.ModelServiceServicer):
     """gRPC сервис для работы с моделями."""
 
-    def __init__(self):
-        """Инициализация сервиса."""
-        retries = 30
-        for i in range(retries):
-            try:
-                self.storage = Storage()
-                log.info("Storage initialized successfully")
-                break
-            except Exception as e:
-                if i == retries - 1:  # Последняя попытка
-                    log.error(f"Failed to initialize Storage after {retries} attempts: {e}")
-                    raise
-                log.warning(f"Storage initialization failed (attempt {i+1}/{retries}), retrying...")
-                time.sleep(2)
-        
-        self.trainer = ModelTrainer()
+    @property
+    def storage(self):
+        """
+        Общий Storage процесса. Подключение с повторами делает прогрев
+        (preload_models) до открытия порта, здесь оно уже готово.
+        """
+        return get_storage()
 
     def TrainModel(self, request, context):
         """
@@ -41,27 +75,308 @@ class ModelService(model_service_pb2_grpc.ModelServiceServicer):
         """
         try:
             log.info(f"TRAIN gRPC {request.name}")
-            data = pickle.loads(request.data)
-            params = dict(request.params)
-            
-            if request.name == "forest":
-                if 'n_estimators' in params:
-                    params['n_estimators'] = int(params['n_estimators'])
-                if 'max_depth' in params:
-                    params['max_depth'] = int(params['max_depth'])
-            elif request.name == "logreg":
-                if 'max_iter' in params:
-                    params['max_iter'] = int(params['max_iter'])
-            trainer = ModelTrainer()
-            model = trainer.train(request.name, data['X'] if data else None, data['y']if data else None, "data_grpc", **params)
-            self.storage.save(request.name, model)
+            # Синхронный вариант: та же очередь задач, но ждём завершения
+            self._submit(request).join()
             return model_service_pb2.TrainResponse(status="ok")
         except Exception as e:
-            log.error(f"Training error: {e}")
-            context.set_details(str(e))
-            context.set_code(grpc.StatusCode.INTERNAL)
+            self._set_train_error(context, e)
             return model_service_pb2.TrainResponse(status="error")
 
+    @staticmethod
+    def _check_model_type(model_type: str):
+        """INVALID_ARGUMENT до постановки в очередь, а не упавшая задача."""
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type}; expected one of {MODEL_TYPES}")
+
+    @staticmethod
+    def _submit(request):
+        """Ставит обучение из TrainRequest в очередь задач."""
+        ModelService._check_model_type(request.name)
+        X, y = ModelService._train_data(request)
+        params = ModelService._train_params(request)
+        return job_manager.submit(request.name, train_and_save, X, y, "data_grpc", params)
+
+    def TrainModelStream(self, request_iterator, context):
+        """
+        Обучение на данных, загружаемых потоком порций строк.
+
+        Порции складываются в один буфер (при большом объёме — memmap на
+        диске), обучение начинается после конца потока.
+
+        Args:
+            request_iterator: TrainChunk — сначала header, затем rows
+            context: gRPC context
+
+        Returns:
+            TrainResponse со статусом
+        """
+        upload = None
+        try:
+            for chunk in request_iterator:
+                upload = self._receive_chunk(upload, chunk)
+            self._submit_upload(upload).join()
+            return model_service_pb2.TrainResponse(status="ok")
+        except Exception as e:
+            self._set_train_error(context, e)
+            return model_service_pb2.TrainResponse(status="error")
+        finally:
+            if upload is not None:
+                upload[1].close()
+
+    @staticmethod
+    def _receive_chunk(upload, chunk):
+        """
+        Обрабатывает одно сообщение TrainChunk.
+
+        Returns:
+            (header, RowBuffer) — состояние загрузки после сообщения
+        """
+        kind = chunk.WhichOneof("payload")
+        if upload is None:
+            if kind != "header":
+                raise ValueError("First TrainChunk must be a header")
+            header = chunk.header
+            if not header.name:
+                raise ValueError("Header must contain model name")
+            # До приёма данных: поток неизвестной модели не стоит буферизовать
+            ModelService._check_model_type(header.name)
+            buffer = RowBuffer(
+                header.n_features,
+                DTYPES.get(header.x_dtype, "<f8"),
+                DTYPES.get(header.y_dtype, "<i8"),
+                expected_rows=header.n_rows,
+            )
+            log.info(f"TRAIN stream gRPC {header.name}: {header.n_rows or '?'} rows, "
+                     f"{header.n_features} features, spilled={buffer.spilled}")
+            return header, buffer
+        if kind != "rows":
+            raise ValueError("Header must be sent only once")
+        header, buffer = upload
+        buffer.append(from_tensor(chunk.rows.X), from_tensor(chunk.rows.y))
+        return upload
+
+    @staticmethod
+    def _submit_upload(upload):
+        if upload is None:
+            raise ValueError("Empty stream")
+        header, buffer = upload
+        if not buffer.rows:
+            raise ValueError("No training rows received")
+        X, y = buffer.arrays()
+        try:
+            job = job_manager.submit(
+                header.name,
+                train_and_save,
+                X,
+                y,
+                header.dataset_name or "data_grpc",
+                from_params(header.typed_params),
+            )
+        except Exception:
+            if isinstance(X, MemmapRef):
+                X.remove()
+            raise
+        if isinstance(X, MemmapRef):
+            # Файлом владеет задача: RPC может оборваться раньше, чем она
+            # прочитает данные, а отменённая в очереди задача их не прочтёт
+            job.future.add_done_callback(lambda _: X.remove())
+        return job
+
+    @staticmethod
+    def _set_train_error(context, e):
+        log.error(f"Training error: {e}")
+        context.set_details(str(e))
+        if isinstance(e, ValueError):
+            code = grpc.StatusCode.INVALID_ARGUMENT
+        elif isinstance(e, JobCancelledError):
+            code = grpc.StatusCode.CANCELLED
+        else:
+            code = grpc.StatusCode.INTERNAL
+        context.set_code(code)
+
+    @staticmethod
+    def _train_data(request):
+        """
+        Обучающие X, y из запроса.
+
+        Новые клиенты передают тензоры X и y; старые — pickle в data.
+        """
+        if request.HasField("X") or request.HasField("y"):
+            if not (request.HasField("X") and request.HasField("y")):
+                raise ValueError("Both X and y tensors are required")
+            return from_tensor(request.X), from_tensor(request.y)
+        if request.data:
+            if not GRPC_ALLOW_PICKLE:
+                raise ValueError("Pickled TrainRequest.data is disabled, send X and y tensors")
+            log.warning("TrainRequest.data (pickle) is deprecated, send X and y tensors")
+            data = pickle.loads(request.data)
+            return data['X'], data['y']
+        return None, None
+
+    @staticmethod
+    def _train_params(request):
+        """
+        Гиперпараметры из запроса.
+
+        typed_params приходят с исходными типами. Устаревшие params —
+        только float, поэтому целочисленные параметры приводятся к int.
+        """
+        params = dict(request.params)
+        if request.name == "forest":
+            if 'n_estimators' in params:
+                params['n_estimators'] = int(params['n_estimators'])
+            if 'max_depth' in params:
+                params['max_depth'] = int(params['max_depth'])
+        elif request.name == "logreg":
+            if 'max_iter' in params:
+                params['max_iter'] = int(params['max_iter'])
+        elif request.name == "sgd":
+            for name in ('chunk_rows', 'epochs'):
+                if name in params:
+                    params[name] = int(params[name])
+        params.update(from_params(request.typed_params))
+        return params
+
+    @staticmethod
+    def _job_status(job):
+        result = job.result or {}
+        return model_service_pb2.JobStatus(
+            job_id=job.job_id,
+            model_type=job.model_type,
+            status=job.status,
+            stage=job.stage,
+            progress=job.progress,
+            duration=job.duration or 0.0,
+            model_key=job.model_key or "",
+            error=job.error or "",
+            version=job.version or 0,
+            # None (например, max_depth без ограничения) — отсутствующий ключ
+            best_params=to_params({k: v for k, v in result.get("best_params", {}).items() if v is not None}),
+            best_score=result.get("best_score", 0.0),
+        )
+
+    def SubmitTrainJob(self, request, context):
+        """
+        Постановка обучения в очередь без ожидания результата.
+
+        Args:
+            request: TrainRequest с данными для обучения
+            context: gRPC context
+
+        Returns:
+            JobStatus с id задачи
+        """
+        try:
+            job = self._submit(request)
+            log.info(f"Training job {job.job_id} for {request.name} submitted via gRPC")
+            return self._job_status(job)
+        except Exception as e:
+            log.error(f"Job submission error: {e}")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return model_service_pb2.JobStatus()
+
+    @staticmethod
+    def _submit_search(request):
+        """Ставит подбор гиперпараметров из SearchRequest в очередь задач."""
+        ModelService._check_model_type(request.name)
+        X, y = None, None
+        if request.HasField("X") or request.HasField("y"):
+            if not (request.HasField("X") and request.HasField("y")):
+                raise ValueError("Both X and y tensors are required")
+            X, y = from_tensor(request.X), from_tensor(request.y)
+        # 0 — не задано; отрицательные uint32 не пропустит, проверка на случай смены типа
+        if request.n_jobs < 0:
+            raise ValueError("n_jobs must be >= 1")
+        spec = {
+            "space": ModelService._search_space(request),
+            "params": from_params(request.typed_params),
+            "n_candidates": request.n_candidates,
+            "factor": request.factor or None,
+            "cv": request.cv or None,
+            "n_jobs": request.n_jobs or None,
+            "random_state": request.random_state if request.HasField("random_state") else None,
+        }
+        parse_space(spec["space"], spec["n_candidates"])
+        return job_manager.submit(
+            request.name, search_and_save, X, y, request.dataset_name or "data_grpc", spec
+        )
+
+    @staticmethod
+    def _search_space(request):
+        """map<string, ParamSpace> в словарь для app.search."""
+        space = {}
+        for name, param in request.space.items():
+            kind = param.WhichOneof("space")
+            if kind == "values":
+                space[name] = [getattr(v, v.WhichOneof("value")) for v in param.values.values]
+            elif kind == "range":
+                r = param.range
+                space[name] = {"low": r.low, "high": r.high, "log": r.log, "integer": r.integer}
+            else:
+                raise ValueError(f"Param {name} has no search space")
+        return space
+
+    def SearchModel(self, request, context):
+        """
+        Подбор гиперпараметров последовательным отсевом как задача обучения.
+
+        Args:
+            request: SearchRequest с пространством поиска
+            context: gRPC context
+
+        Returns:
+            JobStatus с id задачи; best_params и best_score — после завершения
+        """
+        try:
+            job = self._submit_search(request)
+            log.info(f"Search job {job.job_id} for {request.name} submitted via gRPC")
+            return self._job_status(job)
+        except Exception as e:
+            log.error(f"Search submission error: {e}")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return model_service_pb2.JobStatus()
+
+    def GetTrainJob(self, request, context):
+        """
+        Статус задачи обучения.
+
+        Args:
+            request: JobRequest с id задачи
+            context: gRPC context
+
+        Returns:
+            JobStatus со статусом, прогрессом и ключом модели
+        """
+        job = job_manager.get(request.job_id)
+        if job is None:
+            context.set_details("Job not found")
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            return model_service_pb2.JobStatus()
+        return self._job_status(job)
+
+    def CancelTrainJob(self, request, context):
+        """
+        Отмена задачи обучения, пока она в очереди.
+
+        Args:
+            request: JobRequest с id задачи
+            context: gRPC context
+
+        Returns:
+            JobStatus после отмены
+        """
+        job = job_manager.get(request.job_id)
+        if job is None:
+            context.set_details("Job not found")
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            return model_service_pb2.JobStatus()
+        if not job_manager.cancel(request.job_id):
+            context.set_details(f"Job is {job.status} and cannot be cancelled")
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+        return self._job_status(job)
+
     def ListModels(self, request, context):
         """
         Получение списка доступных моделей.
@@ -71,18 +386,112 @@ class ModelService(model_service_pb2_grpc.ModelServiceServicer):
             context: gRPC context
 
         Returns:
-            ListResponse со списком моделей
+            ListResponse: типы моделей и обученные модели из реестра
         """
         log.info("List models gRPC")
-        models = list(self.trainer.models.keys())
-        return model_service_pb2.ListResponse(models=models)
+        return self._list_models()
+
+    def _list_models(self):
+        """ListResponse по реестру хранилища (блокирующий вызов S3)."""
+        models = list(MODEL_TYPES)
+        trained = [
+            model_service_pb2.ModelVersion(
+                name=m['name'],
+                version=m['version'] or 0,
+                size=m['size'],
+                created_at=m['last_modified'].timestamp(),
+                metrics=m.get('metrics', {}),
+            )
+            for m in self.storage.list_models()
+        ]
+        return model_service_pb2.ListResponse(models=models, trained=trained)
+
+    def _predict_packed(self, name, request):
+        """Считает PredictBatchResponse для упакованной матрицы запроса."""
+        X = from_packed(request.features, request.rows, request.cols)
+        return self._batch_response(request, *infer_sync(name, X, request.proba, self.storage))
+
+    @staticmethod
+    def _batch_response(request, predictions, probabilities, classes):
+        response = model_service_pb2.PredictBatchResponse(rows=len(predictions), request_id=request.request_id)
+        # Метки классов могут быть строками (текстовый target датасета)
+        numeric = np.asarray(predictions).dtype.kind in "biuf"
+        if numeric:
+            response.predictions.extend(predictions)
+        else:
+            response.prediction_labels.extend(str(p) for p in predictions)
+        if request.proba:
+            response.probabilities.extend(probabilities.ravel())
+            if numeric:
+                response.classes.extend(classes)
+            else:
+                response.class_labels.extend(str(c) for c in classes)
+        return response
+
+    @staticmethod
+    def _error_status(e):
+        if isinstance(e, ModelNotFoundError):
+            return grpc.StatusCode.NOT_FOUND, "Model not found"
+        if isinstance(e, BatchTooLargeError):
+            return grpc.StatusCode.RESOURCE_EXHAUSTED, str(e)
+        if isinstance(e, ValueError):
+            return grpc.StatusCode.INVALID_ARGUMENT, str(e)
+        log.error(f"Prediction error: {e}")
+        return grpc.StatusCode.INTERNAL, str(e)
+
+    def PredictBatch(self, request, context):
+        """
+        Предсказание для матрицы признаков одним вызовом.
+
+        Args:
+            request: PredictBatchRequest с упакованной матрицей rows x cols
+            context: gRPC context
+
+        Returns:
+            PredictBatchResponse с предсказаниями (и вероятностями при proba)
+        """
+        try:
+            log.info(f"PredictBatch gRPC {request.name} rows={request.rows}")
+            return self._predict_packed(model_ref(request.name, request.version), request)
+        except Exception as e:
+            code, details = self._error_status(e)
+            context.set_details(details)
+            context.set_code(code)
+            return model_service_pb2.PredictBatchResponse()
+
+    def PredictStream(self, request_iterator, context):
+        """
+        Потоковое предсказание: каждое сообщение — порция строк, ответ на
+        неё уходит сразу, в порядке поступления.
+
+        Следующее сообщение читается только после отправки ответа на
+        предыдущее, поэтому медленный клиент притормаживает сервер через
+        flow control HTTP/2, а не копит ответы в памяти сервера.
+
+        Args:
+            request_iterator: поток PredictBatchRequest; name (и version)
+                достаточно указать в первом сообщении
+            context: gRPC context
+
+        Yields:
+            PredictBatchResponse с тем же request_id
+        """
+        ref = ""
+        for request in request_iterator:
+            ref = model_ref(request.name, request.version) if request.name else ref
+            try:
+                response = self._predict_packed(ref, request)
+            except Exception as e:
+                context.abort(*self._error_status(e))
+            yield response
 
     def Predict(self, request, context):
         """
         Предсказание с помощью обученной модели.
 
         Args:
-            request: PredictRequest с именем модели и признаками
+            request: PredictRequest с именем модели, версией (0 — последняя)
+                и признаками
             context: gRPC context
 
         Returns:
@@ -90,30 +499,184 @@ class ModelService(model_service_pb2_grpc.ModelServiceServicer):
         """
         try:
             log.info(f"Predict gRPC {request.name}")
-            model = self.storage.load(request.name)
-            if not model:
-                context.set_details("Model not found")
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                return model_service_pb2.PredictResponse()
-            pred = model.predict([list(request.features)])[0]
-            return model_service_pb2.PredictResponse(pred=float(pred))
+            predictions, _, _ = infer_sync(
+                model_ref(request.name, request.version),
+                to_matrix([list(request.features)]),
+                storage=self.storage,
+            )
+            return model_service_pb2.PredictResponse(pred=float(predictions[0]))
+        except Exception as e:
+            code, details = self._error_status(e)
+            context.set_details(details)
+            context.set_code(code)
+            return model_service_pb2.PredictResponse()
+
+
+class AsyncModelService(ModelService):
+    """
+    Сервис для сервера grpc.aio.
+
+    Обработчики не блокируют event loop: загрузка моделей и разбор
+    батчей идут в пуле I/O, predict — в пуле инференса, обучение — в
+    очереди задач и пуле обучения. Долгий TrainModel лишь ждёт future и
+    не занимает поток, нужный предсказаниям.
+    """
+
+    async def TrainModel(self, request, context):
+        try:
+            log.info(f"TRAIN gRPC {request.name}")
+            job = await run_io(self._submit, request)
+            await job.wait()
+            return model_service_pb2.TrainResponse(status="ok")
         except Exception as e:
-            log.error(f"Prediction error: {e}")
+            self._set_train_error(context, e)
+            return model_service_pb2.TrainResponse(status="error")
+
+    async def SubmitTrainJob(self, request, context):
+        try:
+            job = await run_io(self._submit, request)
+            log.info(f"Training job {job.job_id} for {request.name} submitted via gRPC")
+            return self._job_status(job)
+        except Exception as e:
+            log.error(f"Job submission error: {e}")
             context.set_details(str(e))
-            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return model_service_pb2.JobStatus()
+
+    async def TrainModelStream(self, request_iterator, context):
+        upload = None
+        try:
+            # Запись порций, рост memmap и его flush — дисковый I/O, не для event loop
+            async for chunk in request_iterator:
+                upload = await run_io(self._receive_chunk, upload, chunk)
+            job = await run_io(self._submit_upload, upload)
+            await job.wait()
+            return model_service_pb2.TrainResponse(status="ok")
+        except Exception as e:
+            self._set_train_error(context, e)
+            return model_service_pb2.TrainResponse(status="error")
+        finally:
+            if upload is not None:
+                await run_io(upload[1].close)
+
+    async def SearchModel(self, request, context):
+        # В потоке — только разбор данных и постановка задачи: статус
+        # aio-контексту выставляется из event loop
+        try:
+            job = await run_io(self._submit_search, request)
+            log.info(f"Search job {job.job_id} for {request.name} submitted via gRPC")
+            return self._job_status(job)
+        except Exception as e:
+            log.error(f"Search submission error: {e}")
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return model_service_pb2.JobStatus()
+
+    async def GetTrainJob(self, request, context):
+        return super().GetTrainJob(request, context)
+
+    async def CancelTrainJob(self, request, context):
+        return super().CancelTrainJob(request, context)
+
+    async def ListModels(self, request, context):
+        log.info("List models gRPC")
+        return await run_io(self._list_models)
+
+    async def _apredict_packed(self, name, request):
+        X = await run_io(from_packed, request.features, request.rows, request.cols)
+        # Storage берётся внутри run_io: get_storage() может подключаться с повторами
+        return self._batch_response(request, *await infer(name, X, request.proba))
+
+    async def PredictBatch(self, request, context):
+        try:
+            log.info(f"PredictBatch gRPC {request.name} rows={request.rows}")
+            return await self._apredict_packed(model_ref(request.name, request.version), request)
+        except Exception as e:
+            code, details = self._error_status(e)
+            context.set_details(details)
+            context.set_code(code)
+            return model_service_pb2.PredictBatchResponse()
+
+    async def PredictStream(self, request_iterator, context):
+        ref = ""
+        async for request in request_iterator:
+            ref = model_ref(request.name, request.version) if request.name else ref
+            try:
+                response = await self._apredict_packed(ref, request)
+            except Exception as e:
+                await context.abort(*self._error_status(e))
+            yield response
+
+    async def Predict(self, request, context):
+        try:
+            log.info(f"Predict gRPC {request.name}")
+            predictions, _, _ = await infer(
+                model_ref(request.name, request.version),
+                to_matrix([list(request.features)]),
+            )
+            return model_service_pb2.PredictResponse(pred=float(predictions[0]))
+        except Exception as e:
+            code, details = self._error_status(e)
+            context.set_details(details)
+            context.set_code(code)
             return model_service_pb2.PredictResponse()
 
 
-def serve():
-    """Запуск gRPC сервера."""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    model_service_pb2_grpc.add_ModelServiceServicer_to_server(
-        ModelService(), server
+def create_server(address: str = f'[::]:{GRPC_PORT}'):
+    """
+    Собирает gRPC сервер с прогретыми моделями, но не запускает его.
+
+    Returns:
+        (server, port) — порт полезен при address с портом 0
+    """
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        interceptors=[grpc_interceptor()],
+        options=server_options(),
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS or None,
     )
-    server.add_insecure_port('[::]:50051')
-    log.info("gRPC server starting on port 50051")
+    service = ModelService()
+    # Порт открывается только после прогрева: трафик не приходит в холодный процесс
+    preload_models()
+    model_service_pb2_grpc.add_ModelServiceServicer_to_server(service, server)
+    port = server.add_insecure_port(address)
+    return server, port
+
+
+async def create_aio_server(address: str = f'[::]:{GRPC_PORT}'):
+    """Асинхронный аналог create_server на grpc.aio."""
+    server = grpc.aio.server(
+        interceptors=[grpc_aio_interceptor()],
+        options=server_options(),
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS or None,
+    )
+    service = AsyncModelService()
+    await run_io(preload_models)
+    model_service_pb2_grpc.add_ModelServiceServicer_to_server(service, server)
+    port = server.add_insecure_port(address)
+    return server, port
+
+
+async def serve_aio():
+    server, _ = await create_aio_server()
+    log.info(f"gRPC aio server starting on port {GRPC_PORT}")
+    await server.start()
+    print(f"gRPC aio server started on port {GRPC_PORT}")
+    await server.wait_for_termination()
+
+
+def serve():
+    """Запуск gRPC сервера в режиме GRPC_SERVER_MODE."""
+    start_metrics_server(GRPC_METRICS_PORT)
+    log.info(f"gRPC metrics available on port {GRPC_METRICS_PORT}")
+    tracker.start()
+    if GRPC_SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+        return
+    server, _ = create_server()
+    log.info(f"gRPC server starting on port {GRPC_PORT}")
     server.start()
-    print("gRPC server started on port 50051")
+    print(f"gRPC server started on port {GRPC_PORT}")
     server.wait_for_termination()
 
 
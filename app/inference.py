@@ -0,0 +1,141 @@
+# app/inference.py
+import os
+import numpy as np
+from app.async_storage import AsyncStorage
+from app.executors import INFERENCE_PROCESSES, run_inference, run_io, submit_to
+from app.metrics import INFERENCE
+from app.model_cache import model_cache
+from app.storage import get_storage
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100000"))
+PREDICT_CHUNK_SIZE = int(os.getenv("PREDICT_CHUNK_SIZE", "4096"))
+
+
+def to_matrix(rows) -> np.ndarray:
+    """Приводит список строк признаков к 2-D float-матрице."""
+    X = np.asarray(rows, dtype=np.float64)
+    if X.ndim != 2:
+        raise ValueError(f"Expected 2-D feature matrix, got shape {X.shape}")
+    return X
+
+
+def predict_rows(model, X, proba: bool = False, chunk_size: int = PREDICT_CHUNK_SIZE):
+    """
+    Векторизованное предсказание для матрицы признаков.
+
+    Матрица обрабатывается кусками по chunk_size строк: один вызов
+    model.predict (и predict_proba) на кусок, чтобы промежуточные
+    массивы не росли вместе с размером входа.
+
+    Returns:
+        (predictions, probabilities) — probabilities равно None,
+        если proba не запрошен.
+    """
+    predictions = []
+    probabilities = [] if proba else None
+    with INFERENCE.time():
+        for start in range(0, len(X), chunk_size):
+            chunk = X[start:start + chunk_size]
+            predictions.append(model.predict(chunk))
+            if proba:
+                probabilities.append(model.predict_proba(chunk))
+    predictions = np.concatenate(predictions) if predictions else np.empty(0)
+    if proba:
+        probabilities = np.vstack(probabilities) if probabilities else np.empty((0, 0))
+    return predictions, probabilities
+
+
+def from_packed(values, rows: int, cols: int) -> np.ndarray:
+    """Матрица rows x cols из признаков, упакованных построчно в один массив."""
+    if rows > MAX_BATCH_SIZE:
+        raise BatchTooLargeError(f"Batch too large: {rows} rows, max {MAX_BATCH_SIZE}")
+    X = np.asarray(values, dtype=np.float64)
+    if X.size != rows * cols:
+        raise ValueError(f"Expected {rows}x{cols}={rows * cols} values, got {X.size}")
+    return X.reshape(rows, cols)
+
+
+class ModelNotFoundError(LookupError):
+    """Модели нет в хранилище."""
+
+
+class BatchTooLargeError(ValueError):
+    """Батч больше MAX_BATCH_SIZE строк."""
+
+
+def init_inference_worker(warmed=None):
+    """
+    Инициализатор процесса-воркера: подключается к хранилищу и прогревает
+    собственный кэш моделей (PRELOAD_MODELS, как у основного процесса).
+
+    Состояние прогрева уходит в очередь warmed, его ждёт preload_models
+    основного процесса. Воркер, пришедший на смену умершему, тоже
+    прогревается до первой задачи.
+    """
+    from app.preload import preload_models
+    state = preload_models(cache=model_cache)
+    if warmed is not None:
+        warmed.put(state.to_dict())
+
+
+def load_model(model_id: str, storage=None):
+    """Модель из кэша текущего процесса; ModelNotFoundError, если её нет."""
+    model = model_cache.get(storage or get_storage(), model_id)
+    if model is None:
+        raise ModelNotFoundError(model_id)
+    return model
+
+
+async def aload_model(model_id: str, storage):
+    """load_model для AsyncStorage: холодная загрузка идёт в event loop, без потока I/O."""
+    model = await model_cache.aget(storage, model_id)
+    if model is None:
+        raise ModelNotFoundError(model_id)
+    return model
+
+
+def predict_model(model_id: str, X, proba: bool = False, storage=None):
+    """
+    Загружает модель через кэш текущего процесса и считает предсказания.
+
+    Returns:
+        (predictions, probabilities, classes)
+    """
+    model = load_model(model_id, storage)
+    predictions, probabilities = predict_rows(model, X, proba)
+    return predictions, probabilities, model.classes_
+
+
+def infer_sync(model_id: str, X, proba: bool = False, storage=None):
+    """
+    infer для потоков синхронного gRPC-сервера.
+
+    Модель и predict считаются в потоке запроса, а при
+    INFERENCE_PROCESSES > 0 — в процессе пула инференса, как у infer.
+
+    Returns:
+        (predictions, probabilities, classes)
+    """
+    if INFERENCE_PROCESSES > 0:
+        return submit_to("inference", predict_model, model_id, X, proba).result()
+    return predict_model(model_id, X, proba, storage)
+
+
+async def infer(model_id: str, X, proba: bool = False, storage=None):
+    """
+    Предсказание вне event loop.
+
+    По умолчанию модель берётся из общего кэша в пуле I/O, а predict
+    считается в пуле потоков инференса. С AsyncStorage (процесс FastAPI)
+    кэш наполняется корутинами, без пула I/O. При INFERENCE_PROCESSES > 0
+    в процесс уходят только id модели и матрица признаков, модель
+    загружается и кэшируется внутри воркера.
+    """
+    if INFERENCE_PROCESSES > 0:
+        return await run_inference(predict_model, model_id, X, proba)
+    if isinstance(storage, AsyncStorage):
+        model = await aload_model(model_id, storage)
+    else:
+        model = await run_io(load_model, model_id, storage)
+    predictions, probabilities = await run_inference(predict_rows, model, X, proba)
+    return predictions, probabilities, model.classes_
@@ -0,0 +1,256 @@
+# app/jobs.py
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from app.executors import submit_to
+from app.logger import log
+from app.metrics import STAGE_LATENCY, TRAIN_JOB_DURATION
+from app.model_cache import model_cache
+
+# Сколько обучений выполняется одновременно, остальные ждут в очереди
+TRAIN_JOB_WORKERS = int(os.getenv("TRAIN_JOB_WORKERS", "2"))
+# Сколько завершённых задач хранить для опроса статуса
+TRAIN_JOB_HISTORY = int(os.getenv("TRAIN_JOB_HISTORY", "1000"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelledError(RuntimeError):
+    """Задачу, которую ждал синхронный запрос, отменили, пока она была в очереди."""
+
+
+class Job:
+    """Задача обучения и её текущее состояние."""
+
+    def __init__(self, model_type: str):
+        self.job_id = uuid.uuid4().hex
+        self.model_type = model_type
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.model_key = None
+        # Версия модели в реестре, созданная задачей
+        self.version = None
+        # Сводка подбора гиперпараметров (лучшие параметры и оценка)
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def update(self, stage: str, progress: float):
+        self.stage = stage
+        self.progress = progress
+
+    def join(self):
+        """Ждёт задачу и возвращает ключ модели; JobCancelledError, если её отменили."""
+        try:
+            return self.future.result()
+        except CancelledError:
+            raise JobCancelledError(f"Job {self.job_id} was cancelled") from None
+
+    async def wait(self):
+        """
+        join для event loop: ждёт задачу, не занимая поток.
+
+        Отмена самого ожидающего запроса (клиент ушёл) пробрасывается как
+        есть и задачу не трогает, отмена задачи через JobManager.cancel —
+        как JobCancelledError.
+        """
+        try:
+            return await asyncio.shield(asyncio.wrap_future(self.future))
+        except asyncio.CancelledError:
+            if not self.future.cancelled() or asyncio.current_task().cancelling():
+                raise
+            raise JobCancelledError(f"Job {self.job_id} was cancelled") from None
+
+    @property
+    def duration(self):
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "model_type": self.model_type,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "duration": self.duration,
+            "model_key": self.model_key,
+            "version": self.version,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+        }
+
+
+class JobManager:
+    """
+    Очередь задач обучения с ограниченной параллельностью.
+
+    Задачи выполняются в собственном пуле потоков и не зависят от
+    жизненного цикла запроса, который их создал. Функция задачи
+    получает Job первым аргументом и возвращает ключ сохранённой модели.
+    """
+
+    def __init__(self, max_workers: int = TRAIN_JOB_WORKERS, history: int = TRAIN_JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="train-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.history = history
+
+    def submit(self, model_type: str, fn, *args, **kwargs) -> Job:
+        job = Job(model_type)
+        job.future = self._executor.submit(self._run, job, fn, *args, **kwargs)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        log.info(f"Job {job.job_id} ({model_type}) queued")
+        return job
+
+    def _run(self, job, fn, *args, **kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.update(RUNNING, 0.0)
+        try:
+            job.model_key = fn(job, *args, **kwargs)
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            job.finished_at = time.time()
+            TRAIN_JOB_DURATION.labels(job.model_type, FAILED).observe(job.duration)
+            log.error(f"Job {job.job_id} failed: {e}")
+            raise
+        job.status = SUCCEEDED
+        job.finished_at = time.time()
+        job.update(SUCCEEDED, 1.0)
+        TRAIN_JOB_DURATION.labels(job.model_type, SUCCEEDED).observe(job.duration)
+        log.info(f"Job {job.job_id} finished in {job.duration:.2f}s")
+        return job.model_key
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """Отменяет задачу, пока она в очереди; запущенную отменить нельзя."""
+        job = self._jobs.get(job_id)
+        if job is None or not job.future.cancel():
+            return False
+        job.status = CANCELLED
+        job.stage = CANCELLED
+        job.finished_at = time.time()
+        log.info(f"Job {job_id} cancelled")
+        return True
+
+    def _prune(self):
+        finished = [j.job_id for j in self._jobs.values() if j.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Event loop процесса FastAPI: задачи сохраняют модели через его AsyncStorage
+_save_loop = None
+
+
+def save_in_loop(loop):
+    """
+    Сохранять модели задач через AsyncStorage в loop (None — синхронным Storage).
+
+    FastAPI включает это на время работы приложения, gRPC-сервер
+    сохраняет модели синхронным Storage.
+    """
+    global _save_loop
+    _save_loop = loop
+
+
+def save_model(name: str, model, metrics: dict = None) -> dict:
+    """Сохраняет модель новой версией; вызывается из потока задачи."""
+    loop = _save_loop
+    if loop is None or loop.is_closed():
+        from app.storage import get_storage
+        return get_storage().save(name, model, metrics)
+
+    async def save():
+        from app.async_storage import get_async_storage
+        return await (await get_async_storage()).save(name, model, metrics)
+    return asyncio.run_coroutine_threadsafe(save(), loop).result()
+
+
+def train_and_save(job: Job, X, y, dataset_name: str, params: dict) -> str:
+    """Обучает модель в пуле процессов обучения и сохраняет её в хранилище."""
+    from app.models import fit_model
+
+    job.update("training", 0.1)
+    model, stage_timings, metrics, run = submit_to(
+        "training", fit_model, job.model_type, X, y, dataset_name, params
+    ).result()
+    return _save(job, model, stage_timings, metrics, run)
+
+
+def search_and_save(job: Job, X, y, dataset_name: str, spec: dict) -> str:
+    """
+    Подбирает гиперпараметры в пуле процессов обучения и сохраняет лучшую модель.
+
+    Кандидаты внутри поиска считаются в spec["n_jobs"] процессах, взятых
+    из общего для одновременных поисков бюджета SEARCH_N_JOBS; сводка
+    поиска попадает в job.result.
+    """
+    from app.models import search_model
+    from app.search import search_budget
+
+    job.update("waiting_workers", 0.05)
+    with search_budget.reserve(spec.get("n_jobs")) as n_jobs:
+        job.update("searching", 0.1)
+        model, stage_timings, metrics, run, summary = submit_to(
+            "training", search_model, job.model_type, X, y, dataset_name, dict(spec, n_jobs=n_jobs)
+        ).result()
+    job.result = summary
+    return _save(job, model, stage_timings, metrics, run)
+
+
+def _save(job: Job, model, stage_timings: dict, metrics: dict, run) -> str:
+    """
+    Сохраняет модель новой версией и отдаёт запуск MLflow фоновому логгеру.
+
+    Артефактом запуска становится только что записанный объект версии:
+    модель не сериализуется второй раз, а задача не ждёт MLflow.
+    """
+    from app.tracking import tracker
+
+    # Обучение шло в другом процессе: его замеры этапов переносим сюда
+    for stage, seconds in stage_timings.items():
+        STAGE_LATENCY.labels(stage).observe(seconds)
+    job.update("saving", 0.8)
+    entry = save_model(job.model_type, model, metrics)
+    job.version = entry["version"]
+    model_cache.invalidate(job.model_type)
+    run.set_tag("model_name", job.model_type)
+    run.set_tag("model_version", entry["version"])
+    run.set_tag("model_key", entry["key"])
+    run.set_tag("model_format", entry["format"])
+    run.set_tag("model_codec", entry["codec"])
+    run.artifact = {"key": entry["key"]}
+    tracker.submit(run)
+    return entry["key"]
+
+
+job_manager = JobManager()
@@ -0,0 +1,433 @@
+# app/metrics.py
+"""
+Метрики в текстовом формате Prometheus.
+
+Запись рассчитана на горячий путь предсказаний: корзины гистограмм
+выделяются заранее, observe — это bisect и два сложения без блокировок
+(под GIL возможна редкая потеря инкремента при гонке, для метрик это
+допустимо). Блокировка берётся только при первом появлении нового
+набора значений меток.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, self.labelnames, values)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self, name, labelnames, values):
+        yield f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    @contextmanager
+    def track_inprogress(self):
+        self.value += 1
+        try:
+            yield
+        finally:
+            self.value -= 1
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def track_inprogress(self):
+        return self._default.track_inprogress()
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def snapshot(self) -> dict:
+        bounds = [str(b) for b in self.bounds] + ["+Inf"]
+        return {"buckets": dict(zip(bounds, self.counts)), "count": self.count, "sum": self.sum}
+
+    def samples(self, name, labelnames, values):
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), list(self.counts)):
+            cumulative += count
+            labels = _format_labels(labelnames, values, ("le", _format_value(bound)))
+            yield f"{name}_bucket{labels} {cumulative}"
+        labels = _format_labels(labelnames, values)
+        yield f"{name}_sum{labels} {_format_value(self.sum)}"
+        yield f"{name}_count{labels} {cumulative}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    @property
+    def count(self):
+        return self._default.count
+
+    def snapshot(self) -> dict:
+        return self._default.snapshot()
+
+
+class CallbackMetric:
+    """Метрика, значение которой читается функцией в момент экспорта."""
+
+    def __init__(self, name: str, documentation: str, fn, type: str = "gauge", registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.fn = fn
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield f"{self.name} {_format_value(self.fn())}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Запросы
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "REST request latency", ("method", "route", "model", "status")
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "REST requests being processed")
+GRPC_LATENCY = Histogram(
+    "grpc_request_duration_seconds", "gRPC request latency", ("rpc", "model", "code")
+)
+GRPC_IN_FLIGHT = Gauge("grpc_requests_in_flight", "gRPC requests being processed")
+
+# Метка model берётся из запроса: в неё попадают только модели, которые
+# процесс сохранил или загрузил, остальные имена сводятся к OTHER_MODEL,
+# иначе запросы к несуществующим моделям плодили бы серии без предела
+OTHER_MODEL = "other"
+_known_models = set()
+
+
+def register_model(ref: str):
+    """Отмечает модель (имя или имя@версия) как существующую для метки model."""
+    _known_models.add(ref.partition("@")[0])
+
+
+def model_label(name: str) -> str:
+    """Значение метки model: имя известной модели, пусто или OTHER_MODEL."""
+    if not name or name in _known_models:
+        return name
+    return OTHER_MODEL
+
+# Этапы: storage_fetch, deserialize, inference, mlflow_logging, dvc
+STAGE_LATENCY = Histogram("stage_duration_seconds", "Duration of internal stages", ("stage",))
+STORAGE_FETCH = STAGE_LATENCY.labels("storage_fetch")
+DESERIALIZE = STAGE_LATENCY.labels("deserialize")
+INFERENCE = STAGE_LATENCY.labels("inference")
+MLFLOW_LOGGING = STAGE_LATENCY.labels("mlflow_logging")
+DVC = STAGE_LATENCY.labels("dvc")
+
+# Обучение
+TRAIN_JOB_DURATION = Histogram(
+    "training_job_duration_seconds", "Training job duration", ("model_type", "status"), buckets=JOB_BUCKETS
+)
+
+# Фоновая запись в MLflow
+MLFLOW_QUEUE_DEPTH = Gauge("mlflow_log_queue_depth", "MLflow runs waiting in the background logger queue")
+MLFLOW_SPOOLED = Gauge("mlflow_spooled_runs", "MLflow runs buffered on disk until the tracking server is back")
+
+# Микробатчинг
+MICRO_BATCH_QUEUE_DEPTH = Histogram(
+    "micro_batch_queue_depth", "Model queue depth when a row is enqueued", buckets=SIZE_BUCKETS
+)
+MICRO_BATCH_SIZE = Histogram("micro_batch_size", "Rows per flushed micro-batch", buckets=SIZE_BUCKETS)
+
+
+class PrometheusMiddleware:
+    """ASGI-middleware: латентность по маршруту и модели, запросы в работе."""
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            HTTP_LATENCY.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                model_label(scope.get("path_params", {}).get("model_id", "")),
+                status[0],
+            ).observe(time.perf_counter() - start)
+
+
+def _observe_grpc(rpc, model, context, start):
+    GRPC_IN_FLIGHT.dec()
+    code = context.code() if hasattr(context, "code") else None
+    # В grpc.aio code() может вернуть None или число вместо StatusCode
+    code = getattr(code, "name", None) or "OK"
+    GRPC_LATENCY.labels(rpc, model_label(model), code).observe(time.perf_counter() - start)
+
+
+def _wrap_handler(grpc, handler, wrap, wrap_stream):
+    """Подменяет поведение обработчика на обёрнутое, сохраняя сериализаторы."""
+    kwargs = dict(
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer,
+    )
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(wrap(handler.unary_unary, True), **kwargs)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(wrap(handler.stream_unary, False), **kwargs)
+    if handler.stream_stream:
+        return grpc.stream_stream_rpc_method_handler(wrap_stream(handler.stream_stream), **kwargs)
+    return handler
+
+
+def grpc_interceptor():
+    """Серверный перехватчик gRPC: латентность по RPC и модели, запросы в работе."""
+    import grpc
+
+    class _Interceptor(grpc.ServerInterceptor):
+        def intercept_service(self, continuation, handler_call_details):
+            handler = continuation(handler_call_details)
+            if handler is None:
+                return None
+            rpc = handler_call_details.method.rsplit("/", 1)[-1]
+
+            def wrap(behavior, unary_request):
+                def wrapped(request, context):
+                    start = time.perf_counter()
+                    GRPC_IN_FLIGHT.inc()
+                    try:
+                        return behavior(request, context)
+                    finally:
+                        model = getattr(request, "name", "") if unary_request else ""
+                        _observe_grpc(rpc, model, context, start)
+                return wrapped
+
+            def wrap_stream(behavior):
+                def wrapped(request_iterator, context):
+                    start = time.perf_counter()
+                    GRPC_IN_FLIGHT.inc()
+                    try:
+                        yield from behavior(request_iterator, context)
+                    finally:
+                        _observe_grpc(rpc, "", context, start)
+                return wrapped
+
+            return _wrap_handler(grpc, handler, wrap, wrap_stream)
+
+    return _Interceptor()
+
+
+def grpc_aio_interceptor():
+    """То же, что grpc_interceptor, для сервера grpc.aio."""
+    import grpc
+
+    class _Interceptor(grpc.aio.ServerInterceptor):
+        async def intercept_service(self, continuation, handler_call_details):
+            handler = await continuation(handler_call_details)
+            if handler is None:
+                return None
+            rpc = handler_call_details.method.rsplit("/", 1)[-1]
+
+            def wrap(behavior, unary_request):
+                async def wrapped(request, context):
+                    start = time.perf_counter()
+                    GRPC_IN_FLIGHT.inc()
+                    try:
+                        return await behavior(request, context)
+                    finally:
+                        model = getattr(request, "name", "") if unary_request else ""
+                        _observe_grpc(rpc, model, context, start)
+                return wrapped
+
+            def wrap_stream(behavior):
+                async def wrapped(request_iterator, context):
+                    start = time.perf_counter()
+                    GRPC_IN_FLIGHT.inc()
+                    try:
+                        async for response in behavior(request_iterator, context):
+                            yield response
+                    finally:
+                        _observe_grpc(rpc, "", context, start)
+                return wrapped
+
+            return _wrap_handler(grpc, handler, wrap, wrap_stream)
+
+    return _Interceptor()
+
+
+def start_metrics_server(port: int):
+    """HTTP-сервер /metrics в фоновом потоке (для процесса gRPC)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
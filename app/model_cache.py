@@ -0,0 +1,236 @@
+# app/model_cache.py
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.compiled import NATIVE_INFERENCE, compile_model
+from app.executors import run_io
+from app.logger import log
+from app.metrics import CallbackMetric, register_model
+
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "8"))
+MODEL_CACHE_TTL = float(os.getenv("MODEL_CACHE_TTL", "30"))
+
+
+class _Entry:
+    """Закэшированная модель и ETag объекта, из которого она загружена."""
+
+    __slots__ = ("model", "etag", "checked_at")
+
+    def __init__(self, model, etag):
+        self.model = model
+        self.etag = etag
+        self.checked_at = time.monotonic()
+
+
+class _Flight:
+    """
+    Загрузка модели, которую ждут все параллельные запросы за тем же ключом.
+
+    Потоки ждут done, корутины — wait(): они не занимают поток, пока
+    загрузку ведёт другой поток или корутина.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.model = None
+        self.error = None
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    def finish(self):
+        with self._lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # loop ожидающего уже закрыт
+                pass
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.done.is_set():
+                return
+            self._waiters.append((loop, future))
+        await future
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.model
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ModelCache:
+    """
+    LRU-кэш десериализованных моделей перед Storage.load.
+
+    Запись считается свежей MODEL_CACHE_TTL секунд, после чего
+    перепроверяется условным HEAD (If-None-Match по ETag): тело модели
+    скачивается заново, только если объект в хранилище изменился.
+    Холодная загрузка одной модели выполняется один раз, остальные
+    запросы ждут её результат. prepare, если задан, применяется к модели
+    один раз после загрузки (например, компиляция для инференса).
+    """
+
+    def __init__(self, max_size: int = MODEL_CACHE_SIZE, ttl: float = MODEL_CACHE_TTL, prepare=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.prepare = prepare
+        self._entries = OrderedDict()
+        self._flights = {}
+        # Задачи aget: event loop держит на них только слабые ссылки
+        self._loads = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, storage, name: str):
+        """Модель из кэша или из storage; None, если модели нет."""
+        entry, flight, leader = self._begin(name)
+        if flight is None:
+            return entry.model
+        if not leader:
+            flight.done.wait()
+            return flight.result()
+        try:
+            flight.model = self._refresh(storage, name, entry)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._land(name, flight)
+        return flight.model
+
+    async def aget(self, storage, name: str):
+        """
+        get для AsyncStorage: проверка ETag и холодная загрузка идут
+        корутинами в event loop, в поток уходит только prepare.
+
+        Загрузку ведёт отдельная задача, а не запрос-лидер: если его
+        клиент уйдёт, остальные ожидающие всё равно получат модель.
+        """
+        entry, flight, leader = self._begin(name)
+        if flight is None:
+            return entry.model
+        if leader:
+            load = asyncio.ensure_future(self._aload(storage, name, entry, flight))
+            self._loads.add(load)
+            load.add_done_callback(self._loads.discard)
+            await asyncio.shield(load)
+        else:
+            await flight.wait()
+        return flight.result()
+
+    async def _aload(self, storage, name, entry, flight):
+        try:
+            flight.model = await self._arefresh(storage, name, entry)
+        except Exception as e:
+            flight.error = e
+        except asyncio.CancelledError:
+            # Остановлен сам event loop: ожидающим — ошибка, а не "модели нет"
+            flight.error = RuntimeError(f"Loading model {name} was cancelled")
+            raise
+        finally:
+            self._land(name, flight)
+
+    def _begin(self, name):
+        """
+        (entry, None, False) для свежей записи, иначе (entry, flight, leader):
+        leader загружает модель, остальные ждут его flight.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                if time.monotonic() - entry.checked_at < self.ttl:
+                    self.hits += 1
+                    return entry, None, False
+            flight = self._flights.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._flights[name] = _Flight()
+            return entry, flight, leader
+
+    def _land(self, name, flight):
+        with self._lock:
+            self._flights.pop(name, None)
+        flight.finish()
+
+    def _refresh(self, storage, name, entry):
+        if entry is not None and self._unchanged(name, entry, storage.head(name, entry.etag)):
+            return entry.model
+        model, etag = storage.load_with_etag(name)
+        if model is not None and self.prepare is not None:
+            model = self.prepare(model)
+        return self._store(name, model, etag)
+
+    async def _arefresh(self, storage, name, entry):
+        if entry is not None and self._unchanged(name, entry, await storage.head(name, entry.etag)):
+            return entry.model
+        model, etag = await storage.load_with_etag(name)
+        if model is not None and self.prepare is not None:
+            model = await run_io(self.prepare, model)
+        return self._store(name, model, etag)
+
+    def _unchanged(self, name, entry, etag) -> bool:
+        """Продлевает запись, если ETag в хранилище тот же."""
+        if etag == entry.etag:
+            entry.checked_at = time.monotonic()
+            with self._lock:
+                self.hits += 1
+            return True
+        log.info(f"Model {name} changed in storage, reloading")
+        return False
+
+    def _store(self, name, model, etag):
+        with self._lock:
+            self.misses += 1
+            if model is None:
+                self._entries.pop(name, None)
+                return None
+            self._entries[name] = _Entry(model, etag)
+            self._entries.move_to_end(name)
+            register_model(name)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                log.info(f"Model {evicted} evicted from cache")
+        return model
+
+    def invalidate(self, name: str):
+        """
+        Сбрасывает запись, например после сохранения или удаления модели.
+
+        Для имени без версии сбрасываются и закреплённые версии имя@N.
+        """
+        with self._lock:
+            self._entries.pop(name, None)
+            if "@" not in name:
+                for ref in [r for r in self._entries if r.startswith(name + "@")]:
+                    del self._entries[ref]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+
+model_cache = ModelCache(prepare=compile_model if NATIVE_INFERENCE else None)
+
+CallbackMetric("model_cache_hits_total", "Model cache hits", lambda: model_cache.hits, type="counter")
+CallbackMetric("model_cache_misses_total", "Model cache misses", lambda: model_cache.misses, type="counter")
+CallbackMetric("model_cache_entries", "Models held in the in-process cache", lambda: len(model_cache))
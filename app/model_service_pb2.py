@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17\x61pp/model_service.proto\x12\x05model\"\x8a\x01\n\x0cTrainRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12/\n\x06params\x18\x02 \x03(\x0b\x32\x1f.model.TrainRequest.ParamsEntry\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x1a-\n\x0bParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x02:\x02\x38\x01\"\x1f\n\rTrainResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\"\r\n\x0bListRequest\"\x1e\n\x0cListResponse\x12\x0e\n\x06models\x18\x01 \x03(\t\"0\n\x0ePredictRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x10\n\x08\x66\x65\x61tures\x18\x02 \x03(\x02\"\x1f\n\x0fPredictResponse\x12\x0c\n\x04pred\x18\x01 \x01(\x02\x32\xb8\x01\n\x0cModelService\x12\x37\n\nTrainModel\x12\x13.model.TrainRequest\x1a\x14.model.TrainResponse\x12\x35\n\nListModels\x12\x12.model.ListRequest\x1a\x13.model.ListResponse\x12\x38\n\x07Predict\x12\x15.model.PredictRequest\x1a\x16.model.PredictResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17\x61pp/model_service.proto\x12\x05model\"\xa3\x01\n\x06Tensor\x12\"\n\x05\x64type\x18\x01 \x01(\x0e\x32\x13.model.Tensor.DType\x12\r\n\x05shape\x18\x02 \x03(\x04\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"X\n\x05\x44Type\x12\x15\n\x11\x44TYPE_UNSPECIFIED\x10\x00\x12\x0b\n\x07\x46LOAT32\x10\x01\x12\x0b\n\x07\x46LOAT64\x10\x02\x12\t\n\x05INT32\x10\x03\x12\t\n\x05INT64\x10\x04\x12\x08\n\x04\x42OOL\x10\x05\"o\n\nParamValue\x12\x13\n\tint_value\x18\x01 \x01(\x03H\x00\x12\x15\n\x0b\x66loat_value\x18\x02 \x01(\x01H\x00\x12\x16\n\x0cstring_value\x18\x03 \x01(\tH\x00\x12\x14\n\nbool_value\x18\x04 \x01(\x08H\x00\x42\x07\n\x05value\"\xc1\x02\n\x0cTrainRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12/\n\x06params\x18\x02 \x03(\x0b\x32\x1f.model.TrainRequest.ParamsEntry\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\x18\n\x01X\x18\x04 \x01(\x0b\x32\r.model.Tensor\x12\x18\n\x01y\x18\x05 \x01(\x0b\x32\r.model.Tensor\x12:\n\x0ctyped_params\x18\x06 \x03(\x0b\x32$.model.TrainRequest.TypedParamsEntry\x1a-\n\x0bParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x02:\x02\x38\x01\x1a\x45\n\x10TypedParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12 \n\x05value\x18\x02 \x01(\x0b\x32\x11.model.ParamValue:\x02\x38\x01\"_\n\nParamSpace\x12$\n\x06values\x18\x01 \x01(\x0b\x32\x12.model.ParamValuesH\x00\x12\"\n\x05range\x18\x02 \x01(\x0b\x32\x11.model.ParamRangeH\x00\x42\x07\n\x05space\"0\n\x0bParamValues\x12!\n\x06values\x18\x01 \x03(\x0b\x32\x11.model.ParamValue\"E\n\nParamRange\x12\x0b\n\x03low\x18\x01 \x01(\x01\x12\x0c\n\x04high\x18\x02 \x01(\x01\x12\x0b\n\x03log\x18\x03 \x01(\x08\x12\x0f\n\x07integer\x18\x04 \x01(\x08\"\xca\x03\n\rSearchRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12.\n\x05space\x18\x02 \x03(\x0b\x32\x1f.model.SearchRequest.SpaceEntry\x12;\n\x0ctyped_params\x18\x03 \x03(\x0b\x32%.model.SearchRequest.TypedParamsEntry\x12\x18\n\x01X\x18\x04 \x01(\x0b\x32\r.model.Tensor\x12\x18\n\x01y\x18\x05 \x01(\x0b\x32\r.model.Tensor\x12\x14\n\x0c\x64\x61taset_name\x18\x06 \x01(\t\x12\x14\n\x0cn_candidates\x18\x07 \x01(\r\x12\x0e\n\x06\x66\x61\x63tor\x18\x08 \x01(\r\x12\n\n\x02\x63v\x18\t \x01(\r\x12\x0e\n\x06n_jobs\x18\n \x01(\r\x12\x19\n\x0crandom_state\x18\x0b \x01(\x03H\x00\x88\x01\x01\x1a?\n\nSpaceEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12 \n\x05value\x18\x02 \x01(\x0b\x32\x11.model.ParamSpace:\x02\x38\x01\x1a\x45\n\x10TypedParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12 \n\x05value\x18\x02 \x01(\x0b\x32\x11.model.ParamValue:\x02\x38\x01\x42\x0f\n\r_random_state\"_\n\nTrainChunk\x12$\n\x06header\x18\x01 \x01(\x0b\x32\x12.model.TrainHeaderH\x00\x12 \n\x04rows\x18\x02 \x01(\x0b\x32\x10.model.TrainRowsH\x00\x42\t\n\x07payload\"\xa3\x02\n\x0bTrainHeader\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x39\n\x0ctyped_params\x18\x02 \x03(\x0b\x32#.model.TrainHeader.TypedParamsEntry\x12\x14\n\x0c\x64\x61taset_name\x18\x03 \x01(\t\x12\x0e\n\x06n_rows\x18\x04 \x01(\x04\x12\x12\n\nn_features\x18\x05 \x01(\r\x12$\n\x07x_dtype\x18\x06 \x01(\x0e\x32\x13.model.Tensor.DType\x12$\n\x07y_dtype\x18\x07 \x01(\x0e\x32\x13.model.Tensor.DType\x1a\x45\n\x10TypedParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12 \n\x05value\x18\x02 \x01(\x0b\x32\x11.model.ParamValue:\x02\x38\x01\"?\n\tTrainRows\x12\x18\n\x01X\x18\x01 \x01(\x0b\x32\r.model.Tensor\x12\x18\n\x01y\x18\x02 \x01(\x0b\x32\r.model.Tensor\"\x1f\n\rTrainResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\"\r\n\x0bListRequest\"D\n\x0cListResponse\x12\x0e\n\x06models\x18\x01 \x03(\t\x12$\n\x07trained\x18\x02 \x03(\x0b\x32\x13.model.ModelVersion\"\xb2\x01\n\x0cModelVersion\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\r\x12\x0c\n\x04size\x18\x03 \x01(\x04\x12\x12\n\ncreated_at\x18\x04 \x01(\x01\x12\x31\n\x07metrics\x18\x05 \x03(\x0b\x32 .model.ModelVersion.MetricsEntry\x1a.\n\x0cMetricsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"A\n\x0ePredictRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x10\n\x08\x66\x65\x61tures\x18\x02 \x03(\x02\x12\x0f\n\x07version\x18\x03 \x01(\r\"\x1f\n\x0fPredictResponse\x12\x0c\n\x04pred\x18\x01 \x01(\x02\"\x85\x01\n\x13PredictBatchRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x10\n\x08\x66\x65\x61tures\x18\x02 \x03(\x01\x12\x0c\n\x04rows\x18\x03 \x01(\r\x12\x0c\n\x04\x63ols\x18\x04 \x01(\r\x12\r\n\x05proba\x18\x05 \x01(\x08\x12\x12\n\nrequest_id\x18\x06 \x01(\x04\x12\x0f\n\x07version\x18\x07 \x01(\r\"\xa6\x01\n\x14PredictBatchResponse\x12\x13\n\x0bpredictions\x18\x01 \x03(\x01\x12\x15\n\rprobabilities\x18\x02 \x03(\x01\x12\x0f\n\x07\x63lasses\x18\x03 \x03(\x01\x12\x0c\n\x04rows\x18\x04 \x01(\r\x12\x12\n\nrequest_id\x18\x05 \x01(\x04\x12\x19\n\x11prediction_labels\x18\x06 \x03(\t\x12\x14\n\x0c\x63lass_labels\x18\x07 \x03(\t\"\x1c\n\nJobRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\xb6\x02\n\tJobStatus\x12\x0e\n\x06job_id\x18\x01 \x01(\t\x12\x12\n\nmodel_type\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\t\x12\r\n\x05stage\x18\x04 \x01(\t\x12\x10\n\x08progress\x18\x05 \x01(\x02\x12\x10\n\x08\x64uration\x18\x06 \x01(\x01\x12\x11\n\tmodel_key\x18\x07 \x01(\t\x12\r\n\x05\x65rror\x18\x08 \x01(\t\x12\x0f\n\x07version\x18\t \x01(\r\x12\x35\n\x0b\x62\x65st_params\x18\n \x03(\x0b\x32 .model.JobStatus.BestParamsEntry\x12\x12\n\nbest_score\x18\x0b \x01(\x01\x1a\x44\n\x0f\x42\x65stParamsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12 \n\x05value\x18\x02 \x01(\x0b\x32\x11.model.ParamValue:\x02\x38\x01\x32\xe9\x04\n\x0cModelService\x12\x37\n\nTrainModel\x12\x13.model.TrainRequest\x1a\x14.model.TrainResponse\x12\x35\n\nListModels\x12\x12.model.ListRequest\x1a\x13.model.ListResponse\x12\x38\n\x07Predict\x12\x15.model.PredictRequest\x1a\x16.model.PredictResponse\x12\x37\n\x0eSubmitTrainJob\x12\x13.model.TrainRequest\x1a\x10.model.JobStatus\x12\x32\n\x0bGetTrainJob\x12\x11.model.JobRequest\x1a\x10.model.JobStatus\x12\x35\n\x0e\x43\x61ncelTrainJob\x12\x11.model.JobRequest\x1a\x10.model.JobStatus\x12G\n\x0cPredictBatch\x12\x1a.model.PredictBatchRequest\x1a\x1b.model.PredictBatchResponse\x12L\n\rPredictStream\x12\x1a.model.PredictBatchRequest\x1a\x1b.model.PredictBatchResponse(\x01\x30\x01\x12=\n\x10TrainModelStream\x12\x11.model.TrainChunk\x1a\x14.model.TrainResponse(\x01\x12\x35\n\x0bSearchModel\x12\x14.model.SearchRequest\x1a\x10.model.JobStatusb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,20 +33,74 @@ if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_TRAINREQUEST_PARAMSENTRY']._loaded_options = None
   _globals['_TRAINREQUEST_PARAMSENTRY']._serialized_options = b'8\001'
-  _globals['_TRAINREQUEST']._serialized_start=35
-  _globals['_TRAINREQUEST']._serialized_end=173
-  _globals['_TRAINREQUEST_PARAMSENTRY']._serialized_start=128
-  _globals['_TRAINREQUEST_PARAMSENTRY']._serialized_end=173
-  _globals['_TRAINRESPONSE']._serialized_start=175
-  _globals['_TRAINRESPONSE']._serialized_end=206
-  _globals['_LISTREQUEST']._serialized_start=208
-  _globals['_LISTREQUEST']._serialized_end=221
-  _globals['_LISTRESPONSE']._serialized_start=223
-  _globals['_LISTRESPONSE']._serialized_end=253
-  _globals['_PREDICTREQUEST']._serialized_start=255
-  _globals['_PREDICTREQUEST']._serialized_end=303
-  _globals['_PREDICTRESPONSE']._serialized_start=305
-  _globals['_PREDICTRESPONSE']._serialized_end=336
-  _globals['_MODELSERVICE']._serialized_start=339
-  _globals['_MODELSERVICE']._serialized_end=523
+  _globals['_TRAINREQUEST_TYPEDPARAMSENTRY']._loaded_options = None
+  _globals['_TRAINREQUEST_TYPEDPARAMSENTRY']._serialized_options = b'8\001'
+  _globals['_SEARCHREQUEST_SPACEENTRY']._loaded_options = None
+  _globals['_SEARCHREQUEST_SPACEENTRY']._serialized_options = b'8\001'
+  _globals['_SEARCHREQUEST_TYPEDPARAMSENTRY']._loaded_options = None
+  _globals['_SEARCHREQUEST_TYPEDPARAMSENTRY']._serialized_options = b'8\001'
+  _globals['_TRAINHEADER_TYPEDPARAMSENTRY']._loaded_options = None
+  _globals['_TRAINHEADER_TYPEDPARAMSENTRY']._serialized_options = b'8\001'
+  _globals['_MODELVERSION_METRICSENTRY']._loaded_options = None
+  _globals['_MODELVERSION_METRICSENTRY']._serialized_options = b'8\001'
+  _globals['_JOBSTATUS_BESTPARAMSENTRY']._loaded_options = None
+  _globals['_JOBSTATUS_BESTPARAMSENTRY']._serialized_options = b'8\001'
+  _globals['_TENSOR']._serialized_start=35
+  _globals['_TENSOR']._serialized_end=198
+  _globals['_TENSOR_DTYPE']._serialized_start=110
+  _globals['_TENSOR_DTYPE']._serialized_end=198
+  _globals['_PARAMVALUE']._serialized_start=200
+  _globals['_PARAMVALUE']._serialized_end=311
+  _globals['_TRAINREQUEST']._serialized_start=314
+  _globals['_TRAINREQUEST']._serialized_end=635
+  _globals['_TRAINREQUEST_PARAMSENTRY']._serialized_start=519
+  _globals['_TRAINREQUEST_PARAMSENTRY']._serialized_end=564
+  _globals['_TRAINREQUEST_TYPEDPARAMSENTRY']._serialized_start=566
+  _globals['_TRAINREQUEST_TYPEDPARAMSENTRY']._serialized_end=635
+  _globals['_PARAMSPACE']._serialized_start=637
+  _globals['_PARAMSPACE']._serialized_end=732
+  _globals['_PARAMVALUES']._serialized_start=734
+  _globals['_PARAMVALUES']._serialized_end=782
+  _globals['_PARAMRANGE']._serialized_start=784
+  _globals['_PARAMRANGE']._serialized_end=853
+  _globals['_SEARCHREQUEST']._serialized_start=856
+  _globals['_SEARCHREQUEST']._serialized_end=1314
+  _globals['_SEARCHREQUEST_SPACEENTRY']._serialized_start=1163
+  _globals['_SEARCHREQUEST_SPACEENTRY']._serialized_end=1226
+  _globals['_SEARCHREQUEST_TYPEDPARAMSENTRY']._serialized_start=566
+  _globals['_SEARCHREQUEST_TYPEDPARAMSENTRY']._serialized_end=635
+  _globals['_TRAINCHUNK']._serialized_start=1316
+  _globals['_TRAINCHUNK']._serialized_end=1411
+  _globals['_TRAINHEADER']._serialized_start=1414
+  _globals['_TRAINHEADER']._serialized_end=1705
+  _globals['_TRAINHEADER_TYPEDPARAMSENTRY']._serialized_start=566
+  _globals['_TRAINHEADER_TYPEDPARAMSENTRY']._serialized_end=635
+  _globals['_TRAINROWS']._serialized_start=1707
+  _globals['_TRAINROWS']._serialized_end=1770
+  _globals['_TRAINRESPONSE']._serialized_start=1772
+  _globals['_TRAINRESPONSE']._serialized_end=1803
+  _globals['_LISTREQUEST']._serialized_start=1805
+  _globals['_LISTREQUEST']._serialized_end=1818
+  _globals['_LISTRESPONSE']._serialized_start=1820
+  _globals['_LISTRESPONSE']._serialized_end=1888
+  _globals['_MODELVERSION']._serialized_start=1891
+  _globals['_MODELVERSION']._serialized_end=2069
+  _globals['_MODELVERSION_METRICSENTRY']._serialized_start=2023
+  _globals['_MODELVERSION_METRICSENTRY']._serialized_end=2069
+  _globals['_PREDICTREQUEST']._serialized_start=2071
+  _globals['_PREDICTREQUEST']._serialized_end=2136
+  _globals['_PREDICTRESPONSE']._serialized_start=2138
+  _globals['_PREDICTRESPONSE']._serialized_end=2169
+  _globals['_PREDICTBATCHREQUEST']._serialized_start=2172
+  _globals['_PREDICTBATCHREQUEST']._serialized_end=2305
+  _globals['_PREDICTBATCHRESPONSE']._serialized_start=2308
+  _globals['_PREDICTBATCHRESPONSE']._serialized_end=2474
+  _globals['_JOBREQUEST']._serialized_start=2476
+  _globals['_JOBREQUEST']._serialized_end=2504
+  _globals['_JOBSTATUS']._serialized_start=2507
+  _globals['_JOBSTATUS']._serialized_end=2817
+  _globals['_JOBSTATUS_BESTPARAMSENTRY']._serialized_start=2749
+  _globals['_JOBSTATUS_BESTPARAMSENTRY']._serialized_end=2817
+  _globals['_MODELSERVICE']._serialized_start=2820
+  _globals['_MODELSERVICE']._serialized_end=3437
 # @@protoc_insertion_point(module_scope)
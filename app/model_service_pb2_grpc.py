@@ -1,6 +1,7 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
 """Client and server classes corresponding to protobuf-defined services."""
 import grpc
+import warnings
 
 from app import model_service_pb2 as app_dot_model__service__pb2
 
@@ -48,6 +49,41 @@ class ModelServiceStub(object):
                 request_serializer=app_dot_model__service__pb2.PredictRequest.SerializeToString,
                 response_deserializer=app_dot_model__service__pb2.PredictResponse.FromString,
                 _registered_method=True)
+        self.SubmitTrainJob = channel.unary_unary(
+                '/model.ModelService/SubmitTrainJob',
+                request_serializer=app_dot_model__service__pb2.TrainRequest.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.JobStatus.FromString,
+                _registered_method=True)
+        self.GetTrainJob = channel.unary_unary(
+                '/model.ModelService/GetTrainJob',
+                request_serializer=app_dot_model__service__pb2.JobRequest.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.JobStatus.FromString,
+                _registered_method=True)
+        self.CancelTrainJob = channel.unary_unary(
+                '/model.ModelService/CancelTrainJob',
+                request_serializer=app_dot_model__service__pb2.JobRequest.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.JobStatus.FromString,
+                _registered_method=True)
+        self.PredictBatch = channel.unary_unary(
+                '/model.ModelService/PredictBatch',
+                request_serializer=app_dot_model__service__pb2.PredictBatchRequest.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.PredictBatchResponse.FromString,
+                _registered_method=True)
+        self.PredictStream = channel.stream_stream(
+                '/model.ModelService/PredictStream',
+                request_serializer=app_dot_model__service__pb2.PredictBatchRequest.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.PredictBatchResponse.FromString,
+                _registered_method=True)
+        self.TrainModelStream = channel.stream_unary(
+                '/model.ModelService/TrainModelStream',
+                request_serializer=app_dot_model__service__pb2.TrainChunk.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.TrainResponse.FromString,
+                _registered_method=True)
+        self.SearchModel = channel.unary_unary(
+                '/model.ModelService/SearchModel',
+                request_serializer=app_dot_model__service__pb2.SearchRequest.SerializeToString,
+                response_deserializer=app_dot_model__service__pb2.JobStatus.FromString,
+                _registered_method=True)
 
 
 class ModelServiceServicer(object):
@@ -71,6 +107,48 @@ class ModelServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SubmitTrainJob(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetTrainJob(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CancelTrainJob(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PredictBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PredictStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def TrainModelStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchModel(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ModelServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -89,6 +167,41 @@ def add_ModelServiceServicer_to_server(servicer, server):
                     request_deserializer=app_dot_model__service__pb2.PredictRequest.FromString,
                     response_serializer=app_dot_model__service__pb2.PredictResponse.SerializeToString,
             ),
+            'SubmitTrainJob': grpc.unary_unary_rpc_method_handler(
+                    servicer.SubmitTrainJob,
+                    request_deserializer=app_dot_model__service__pb2.TrainRequest.FromString,
+                    response_serializer=app_dot_model__service__pb2.JobStatus.SerializeToString,
+            ),
+            'GetTrainJob': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetTrainJob,
+                    request_deserializer=app_dot_model__service__pb2.JobRequest.FromString,
+                    response_serializer=app_dot_model__service__pb2.JobStatus.SerializeToString,
+            ),
+            'CancelTrainJob': grpc.unary_unary_rpc_method_handler(
+                    servicer.CancelTrainJob,
+                    request_deserializer=app_dot_model__service__pb2.JobRequest.FromString,
+                    response_serializer=app_dot_model__service__pb2.JobStatus.SerializeToString,
+            ),
+            'PredictBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.PredictBatch,
+                    request_deserializer=app_dot_model__service__pb2.PredictBatchRequest.FromString,
+                    response_serializer=app_dot_model__service__pb2.PredictBatchResponse.SerializeToString,
+            ),
+            'PredictStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.PredictStream,
+                    request_deserializer=app_dot_model__service__pb2.PredictBatchRequest.FromString,
+                    response_serializer=app_dot_model__service__pb2.PredictBatchResponse.SerializeToString,
+            ),
+            'TrainModelStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.TrainModelStream,
+                    request_deserializer=app_dot_model__service__pb2.TrainChunk.FromString,
+                    response_serializer=app_dot_model__service__pb2.TrainResponse.SerializeToString,
+            ),
+            'SearchModel': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchModel,
+                    request_deserializer=app_dot_model__service__pb2.SearchRequest.FromString,
+                    response_serializer=app_dot_model__service__pb2.JobStatus.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'model.ModelService', rpc_method_handlers)
@@ -180,3 +293,192 @@ class ModelService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SubmitTrainJob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/model.ModelService/SubmitTrainJob',
+            app_dot_model__service__pb2.TrainRequest.SerializeToString,
+            app_dot_model__service__pb2.JobStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetTrainJob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/model.ModelService/GetTrainJob',
+            app_dot_model__service__pb2.JobRequest.SerializeToString,
+            app_dot_model__service__pb2.JobStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CancelTrainJob(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/model.ModelService/CancelTrainJob',
+            app_dot_model__service__pb2.JobRequest.SerializeToString,
+            app_dot_model__service__pb2.JobStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PredictBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/model.ModelService/PredictBatch',
+            app_dot_model__service__pb2.PredictBatchRequest.SerializeToString,
+            app_dot_model__service__pb2.PredictBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PredictStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/model.ModelService/PredictStream',
+            app_dot_model__service__pb2.PredictBatchRequest.SerializeToString,
+            app_dot_model__service__pb2.PredictBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def TrainModelStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/model.ModelService/TrainModelStream',
+            app_dot_model__service__pb2.TrainChunk.SerializeToString,
+            app_dot_model__service__pb2.TrainResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchModel(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/model.ModelService/SearchModel',
+            app_dot_model__service__pb2.SearchRequest.SerializeToString,
+            app_dot_model__service__pb2.JobStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
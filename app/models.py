@@ -1,65 +1,256 @@
-import mlflow
-import mlflow.sklearn
 import os
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
+import time
+from contextlib import contextmanager
+from importlib import import_module
 import pickle
+from app.logger import log
+from app.tracking import RunRecord
+
+# Строк в порции при потоковом обучении (partial_fit): память обучения
+# ограничена одной порцией, а не всем датасетом
+TRAIN_CHUNK_ROWS = int(os.getenv("TRAIN_CHUNK_ROWS", "50000"))
+
+# Типы моделей и их классы. sklearn импортируется при первом обучении,
+# а не при старте сервиса: импорт sklearn.ensemble занимает ~0.8 с
+MODEL_CLASSES = {
+    "forest": "sklearn.ensemble.RandomForestClassifier",
+    "logreg": "sklearn.linear_model.LogisticRegression",
+    "sgd": "sklearn.linear_model.SGDClassifier",
+}
+MODEL_TYPES = list(MODEL_CLASSES)
+
+
+def model_class(model_type: str):
+    """Класс модели по типу (с импортом модуля sklearn) или None для неизвестного типа."""
+    path = MODEL_CLASSES.get(model_type)
+    if path is None:
+        return None
+    module, _, name = path.rpartition(".")
+    return getattr(import_module(module), name)
 
 class ModelTrainer:
     def __init__(self):
-        # Настраиваем MLflow
-        mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000"))
-        mlflow.set_experiment("mlops-hw2")
+        # Длительности этапов последнего обучения, сек.
+        self.stage_timings = {}
+        # Метрики последней обученной модели (попадают в манифест версий)
+        self.metrics = {}
+        # Запуск MLflow последнего обучения (RunRecord)
+        self.run = None
+
+    @contextmanager
+    def _timed(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0.0) + elapsed
         
     def load_dataset(self, dataset_name):
-        # Простая заглушка - в реальности загружайте данные из DVC
-        import numpy as np
-        X = np.array([[1, 2], [3, 4], [5, 6]])
-        y = np.array([0, 1, 0])
-        return X, y
+        # CSV из DVC: столбец target — метки, остальные — признаки
+        from app.datasets import load_dataset
+        with self._timed("load_dataset"):
+            return load_dataset(dataset_name)
         
+    def build_model(self, model_type: str, params: dict):
+        """Необученная модель типа model_type; лишние параметры отбрасываются."""
+        if model_type == "forest":
+            allowed_params = ["n_estimators", "max_depth", "random_state", "n_jobs"]
+            model_params = {k: v for k, v in params.items() if k in allowed_params}
+            return model_class("forest")(**model_params)
+        if model_type == "logreg":
+            allowed_params = ["max_iter", "C", "random_state"]
+            model_params = {k: v for k, v in params.items() if k in allowed_params}
+            return model_class("logreg")(**model_params)
+        if model_type == "sgd":
+            allowed_params = ["loss", "penalty", "alpha", "learning_rate", "eta0", "random_state"]
+            model_params = {k: v for k, v in params.items() if k in allowed_params}
+            # log_loss — чтобы работал predict_proba
+            model_params.setdefault("loss", "log_loss")
+            return model_class("sgd")(**model_params)
+        raise ValueError(f"Unknown model type: {model_type}")
+
     def train(self, model_type: str, X=None, y=None, dataset_name: str = "data", **params):
         try:
-            # если X или y не передали — загружаем по имени датасета
-            if X is None or y is None:
-                X, y = self.load_dataset(dataset_name)
-            # Начинаем эксперимент в MLflow
-            with mlflow.start_run():
-                # Логируем параметры
-                mlflow.log_params(params)
-                mlflow.log_param("model_type", model_type)
-                mlflow.log_param("dataset", dataset_name)
-                
-                # Загружаем данные
+            self.stage_timings = {}
+            self.metrics = {}
+            # Запуск MLflow собирается в памяти и отправляется в фоне
+            # после сохранения модели (app/tracking.py)
+            self.run = RunRecord()
+            # если X или y не передали — загружаем по имени датасета;
+            # модели с partial_fit читают его порциями
+            streaming = (X is None or y is None) and hasattr(model_class(model_type), "partial_fit")
+            if (X is None or y is None) and not streaming:
                 X, y = self.load_dataset(dataset_name)
-                
-                # Создаем и обучаем модель
-                if model_type == "forest":
-                    allowed_params = ["n_estimators", "max_depth", "random_state", "n_jobs"]
-                    model_params = {k: v for k, v in params.items() if k in allowed_params}
-                    model = RandomForestClassifier(**model_params)
-                elif model_type == "logreg":
-                    allowed_params = ["max_iter", "C", "random_state"]
-                    model_params = {k: v for k, v in params.items() if k in allowed_params}
-                    model = LogisticRegression(**model_params)
-                else:
-                    raise ValueError(f"Unknown model type: {model_type}")
-                
-                model.fit(X, y)
-                
-                # Логируем метрики
+            # Логируем параметры
+            self.run.log_params(params)
+            self.run.log_param("model_type", model_type)
+            self.run.log_param("dataset", dataset_name)
+            
+            # Создаем и обучаем модель
+            model = self.build_model(model_type, params)
+            
+            if streaming:
+                accuracy = self._fit_stream(
+                    model,
+                    dataset_name,
+                    int(params.get("chunk_rows", TRAIN_CHUNK_ROWS)),
+                    int(params.get("epochs", 1)),
+                )
+            else:
+                with self._timed("fit"):
+                    model.fit(X, y)
                 accuracy = model.score(X, y)
-                mlflow.log_metric("accuracy", accuracy)
-                
-                # Сохраняем модель в MLflow
-                mlflow.sklearn.log_model(model, "model")
-                
-                return model
+            
+            # Логируем метрики
+            self.metrics = {"accuracy": float(accuracy)}
+            self.run.log_metric("accuracy", accuracy)
+            self.run.finish()
+            return model
                 
         except Exception as e:
             print(f"Error in training: {e}")
             raise
 
+    def search(self, model_type: str, X=None, y=None, dataset_name: str = "data", space: dict = None,
+               params: dict = None, n_candidates: int = 0, factor: int = None, cv: int = None,
+               n_jobs: int = None, random_state: int = None):
+        """
+        Подбор гиперпараметров последовательным отсевом (app/search.py).
+
+        Родительский запуск MLflow (self.run) получает лучшие параметры
+        и точность кросс-валидации, кандидаты — вложенные запуски.
+
+        Returns:
+            (лучшая модель, переобученная на всех данных;
+             сводка: best_params, best_score, n_candidates, n_iterations)
+        """
+        from app import search as halving
+
+        self.stage_timings = {}
+        self.metrics = {}
+        self.run = RunRecord()
+        params = params or {}
+        estimator = self.build_model(model_type, params)
+        hs = halving.build_search(
+            estimator, space or {}, n_candidates,
+            factor or halving.SEARCH_FACTOR, cv or halving.SEARCH_CV, n_jobs, random_state,
+        )
+        if X is None or y is None:
+            X, y = self.load_dataset(dataset_name)
+        self.run.log_params(params)
+        self.run.log_params({
+            "model_type": model_type,
+            "dataset": dataset_name,
+            "search": type(hs).__name__,
+            "factor": hs.factor,
+            "cv": hs.cv,
+            "n_jobs": hs.n_jobs,
+        })
+        with self._timed("fit"):
+            hs.fit(X, y)
+        summary = {
+            "best_params": {k: halving.native(v) for k, v in hs.best_params_.items()},
+            "best_score": float(hs.best_score_),
+            "n_candidates": int(hs.n_candidates_[0]),
+            "n_iterations": int(hs.n_iterations_),
+        }
+        self.metrics = {"accuracy": summary["best_score"]}
+        self.run.log_params({f"best_{k}": v for k, v in summary["best_params"].items()})
+        self.run.log_metrics({
+            "accuracy": summary["best_score"],
+            "n_candidates": summary["n_candidates"],
+            "n_iterations": summary["n_iterations"],
+        })
+        halving.log_trials(self.run, halving.trials(hs))
+        self.run.finish()
+        log.info(f"Search {model_type}: {summary['n_candidates']} candidates, "
+                 f"best {summary['best_params']} ({summary['best_score']:.4f})")
+        return hs.best_estimator_, summary
+
+    def _fit_stream(self, model, dataset_name: str, chunk_rows: int, epochs: int) -> float:
+        """
+        Обучение по порциям датасета через partial_fit.
+
+        Порции идут цепочкой генераторов: чтение CSV -> отделение target ->
+        partial_fit, поэтому в памяти одна порция. Пропускная способность
+        каждой порции (строк/с) — метрика chunk_rows_per_sec запуска.
+
+        Returns:
+            прогрессивная точность последней эпохи: каждая порция
+            оценивается моделью до того, как пойдёт в partial_fit
+            (первую порцию первой эпохи оценивать ещё нечем)
+        """
+        from app.datasets import dataset_classes, iter_chunks
+
+        if chunk_rows <= 0 or epochs <= 0:
+            raise ValueError("chunk_rows and epochs must be positive")
+        with self._timed("load_dataset"):
+            classes = dataset_classes(dataset_name, chunk_rows)
+        chunks_done = 0
+        rows = scored = correct = 0
+        started = time.perf_counter()
+        for epoch in range(epochs):
+            rows = scored = correct = 0
+            chunks = iter_chunks(dataset_name, chunk_rows)
+            while True:
+                chunk_start = time.perf_counter()
+                with self._timed("load_dataset"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                X, y = chunk
+                if hasattr(model, "coef_"):
+                    correct += int((model.predict(X) == y).sum())
+                    scored += len(y)
+                with self._timed("fit"):
+                    model.partial_fit(X, y, classes=classes)
+                rows += len(y)
+                elapsed = time.perf_counter() - chunk_start
+                self.run.log_metric("chunk_rows_per_sec", len(y) / elapsed, step=chunks_done)
+                chunks_done += 1
+        if not rows:
+            raise ValueError(f"Dataset {dataset_name} is empty")
+
+        self.run.log_metric("rows_per_sec", rows * epochs / (time.perf_counter() - started))
+        self.run.log_params({"rows": rows, "chunks": chunks_done})
+        return correct / scored if scored else model.score(X, y)
+
     @property
     def models(self):
-        return {"forest": RandomForestClassifier, "logreg": LogisticRegression}
+        return {model_type: model_class(model_type) for model_type in MODEL_TYPES}
+
+
+def fit_model(model_type: str, X=None, y=None, dataset_name: str = "data", params: dict = None):
+    """
+    Обучение для пула процессов: ModelTrainer создаётся внутри воркера.
+
+    Returns:
+        (model, stage_timings, metrics, run) — замеры этапов возвращаются
+        вместе с моделью, так как метрики процесса-воркера родителю не
+        видны; metrics — метрики качества для манифеста версий; run —
+        запуск MLflow, который задача отправит после сохранения модели.
+    """
+    from app.upload import MemmapRef
+
+    if isinstance(X, MemmapRef):
+        X = X.open()
+    trainer = ModelTrainer()
+    model = trainer.train(model_type, X, y, dataset_name, **(params or {}))
+    return model, trainer.stage_timings, trainer.metrics, trainer.run
+
+
+def search_model(model_type: str, X=None, y=None, dataset_name: str = "data", spec: dict = None):
+    """
+    Подбор гиперпараметров для пула процессов обучения.
+
+    Args:
+        spec: аргументы ModelTrainer.search (space, params, n_candidates,
+            factor, cv, n_jobs, random_state)
+
+    Returns:
+        (model, stage_timings, metrics, run, summary)
+    """
+    trainer = ModelTrainer()
+    model, summary = trainer.search(model_type, X, y, dataset_name, **(spec or {}))
+    return model, trainer.stage_timings, trainer.metrics, trainer.run, summary
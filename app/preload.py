@@ -0,0 +1,230 @@
+# app/preload.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.logger import log
+from app.retry import backoff_delay, retry
+
+# Какие модели загружать при старте: recent (сколько вмещает кэш), all,
+# none, recent:N или список через запятую
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "recent")
+PRELOAD_WORKERS = int(os.getenv("PRELOAD_WORKERS", "4"))
+# Повторы подключения к хранилищу при старте: задержка растёт вдвое от
+# PRELOAD_RETRY_DELAY до PRELOAD_RETRY_MAX_DELAY (app/retry.py)
+PRELOAD_RETRIES = int(os.getenv("PRELOAD_RETRIES", "30"))
+PRELOAD_RETRY_DELAY = float(os.getenv("PRELOAD_RETRY_DELAY", "0.5"))
+PRELOAD_RETRY_MAX_DELAY = float(os.getenv("PRELOAD_RETRY_MAX_DELAY", "5"))
+
+STARTING = "starting"
+PRELOADING = "preloading"
+READY = "ready"
+FAILED = "failed"
+
+
+class Readiness:
+    """Состояние прогрева процесса для readiness-проверки."""
+
+    def __init__(self):
+        self.state = STARTING
+        self.loaded = []
+        self.errors = {}
+        self.duration = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == READY
+
+    def stop(self):
+        """Останавливает фоновые повторы прогрева (остановка процесса)."""
+        self._stopped.set()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "status": self.state,
+                "loaded": list(self.loaded),
+                "errors": dict(self.errors),
+                "duration": self.duration,
+            }
+
+
+readiness = Readiness()
+
+
+def select_models(models, spec: str = PRELOAD_MODELS, cache_size: int = None):
+    """
+    Имена моделей для прогрева.
+
+    Args:
+        models: список словарей Storage.list_models()
+        spec: recent, all, none, recent:N или имена через запятую
+        cache_size: ёмкость кэша моделей; больше не загружается — лишние
+            вытеснили бы только что загруженные
+
+    Returns:
+        список имён в порядке загрузки
+    """
+    names = _select(models, (spec or "none").strip(), cache_size)
+    if cache_size is not None and len(names) > cache_size:
+        log.warning(f"Preload of {len(names)} models exceeds MODEL_CACHE_SIZE={cache_size}, "
+                    f"loading first {cache_size}")
+        names = names[:cache_size]
+    return names
+
+
+def _select(models, spec, cache_size):
+    if spec == "none":
+        return []
+    if spec == "all":
+        return [m["name"] for m in models]
+    if spec == "recent" or spec.startswith("recent:"):
+        n = int(spec.split(":", 1)[1]) if ":" in spec else cache_size
+        recent = sorted(models, key=lambda m: m["last_modified"], reverse=True)
+        return [m["name"] for m in recent[:n]]
+    available = {m["name"] for m in models}
+    pinned = [name.strip() for name in spec.split(",") if name.strip()]
+    missing = [name for name in pinned if name not in available]
+    if missing:
+        log.warning(f"Pinned models not found in storage: {missing}")
+    return [name for name in pinned if name in available]
+
+
+def warm_up(model):
+    """Пробное предсказание: прогревает код инференса модели."""
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features:
+        model.predict(np.zeros((1, n_features)))
+
+
+def _load(storage, cache, name):
+    model = cache.get(storage, name)
+    if model is not None:
+        warm_up(model)
+    return model is not None
+
+
+def preload_models(cache=None, spec: str = PRELOAD_MODELS, state: Readiness = readiness, storage=None):
+    """
+    Параллельно загружает выбранные модели в кэш и прогревает их.
+
+    Список моделей читается из хранилища с повторами, пока оно не станет
+    доступно. Если за PRELOAD_RETRIES попыток не удалось, состояние
+    FAILED (с причиной в /ready), а повторы продолжаются в фоне раз в
+    PRELOAD_RETRY_MAX_DELAY: после подъёма хранилища модели загружаются
+    и процесс становится готов. Ошибка отдельной модели не мешает
+    готовности остальных.
+
+    При INFERENCE_PROCESSES > 0 (и без явного cache) предсказания
+    считают процессы пула инференса со своими кэшами: их прогревает
+    инициализатор пула, а здесь процесс ждёт, пока прогреются все.
+    """
+    from app import executors
+    from app.model_cache import model_cache
+    from app.storage import get_storage
+
+    workers = cache is None and executors.INFERENCE_PROCESSES > 0
+    cache = model_cache if cache is None else cache
+    started = time.monotonic()
+    state.state = PRELOADING
+
+    def connect():
+        connected = storage or get_storage()
+        return connected, connected.list_models()
+
+    try:
+        connected, models = retry(connect, PRELOAD_RETRIES, PRELOAD_RETRY_DELAY, PRELOAD_RETRY_MAX_DELAY, "Listing models")
+        names = select_models(models, spec, cache.max_size)
+    except Exception as e:
+        state.state = FAILED
+        state.errors["storage"] = str(e)
+        log.error(f"Preload failed: cannot list models: {e}; retrying in background")
+        threading.Thread(
+            target=_recover, args=(connect, cache, spec, state, started, workers), name="preload-recover", daemon=True
+        ).start()
+        return state
+    return _load_all(connected, names, cache, state, started, workers)
+
+
+def _recover(connect, cache, spec, state, started, workers=False):
+    """Фоновые повторы с предельной задержкой: до подключения к хранилищу или stop()."""
+    while not state._stopped.wait(backoff_delay(min(PRELOAD_RETRIES, 32), PRELOAD_RETRY_DELAY, PRELOAD_RETRY_MAX_DELAY)):
+        try:
+            connected, models = connect()
+            names = select_models(models, spec, cache.max_size)
+        except Exception as e:
+            with state._lock:
+                state.errors["storage"] = str(e)
+            continue
+        log.info("Storage is available again, resuming preload")
+        with state._lock:
+            state.errors.pop("storage", None)
+        state.state = PRELOADING
+        _load_all(connected, names, cache, state, started, workers)
+        return
+
+
+def _load_all(storage, names, cache, state, started, workers=False):
+    log.info(f"Preloading models: {names}")
+    if workers:
+        _wait_workers(state)
+    elif names:
+        with ThreadPoolExecutor(min(PRELOAD_WORKERS, len(names)), thread_name_prefix="preload") as pool:
+            futures = {name: pool.submit(_load, storage, cache, name) for name in names}
+            for name, future in futures.items():
+                try:
+                    if future.result():
+                        with state._lock:
+                            state.loaded.append(name)
+                except Exception as e:
+                    with state._lock:
+                        state.errors[name] = str(e)
+                    log.error(f"Preload of {name} failed: {e}")
+
+    state.duration = time.monotonic() - started
+    state.state = READY
+    log.info(f"Preload finished in {state.duration:.2f}s: {state.loaded}")
+    return state
+
+
+def _wait_workers(state):
+    """
+    Запускает процессы пула инференса и ждёт их прогрева.
+
+    Пул запускает процесс на каждую отправленную задачу, пока их меньше
+    INFERENCE_PROCESSES, поэтому по пустой задаче на процесс хватает,
+    чтобы поднялись все; каждый после прогрева присылает своё состояние
+    в очередь пула.
+    """
+    from app import executors
+
+    try:
+        pool = executors.get_pool("inference")
+        probes = [pool.submit(os.getpid) for _ in range(executors.INFERENCE_PROCESSES)]
+        reports = [_wait_worker(pool, probes, state) for _ in probes]
+    except Exception as e:
+        with state._lock:
+            state.errors["inference workers"] = str(e)
+        log.error(f"Inference workers failed to warm up: {e}")
+        return
+    with state._lock:
+        for report in reports:
+            state.loaded.extend(name for name in report["loaded"] if name not in state.loaded)
+            state.errors.update(report["errors"])
+
+
+def _wait_worker(pool, probes, state):
+    """Состояние следующего прогретого воркера; ошибка, если пул сломался или процесс останавливается."""
+    while True:
+        try:
+            return pool.warmed.get(timeout=1)
+        except queue.Empty:
+            for probe in probes:
+                if probe.done() and probe.exception() is not None:
+                    raise probe.exception()
+            if state._stopped.is_set():
+                raise RuntimeError("Preload stopped")
@@ -0,0 +1,52 @@
+# app/retry.py
+"""
+Повторы с ограниченной экспоненциальной задержкой для подключений при старте.
+
+Задержка перед попыткой n — min(max_delay, base_delay * 2**n), из
+которой случайна вторая половина: несколько реплик, стартующих вместе
+с Minio, не стучатся в него синхронно, а уже поднятое хранилище
+подхватывается за доли секунды, а не за фиксированную паузу.
+"""
+import asyncio
+import random
+import time
+from app.logger import log
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Пауза после неудачной попытки attempt (с нуля), сек."""
+    delay = min(max_delay, base_delay * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def retry(func, attempts: int, base_delay: float, max_delay: float, what: str = None):
+    """
+    Вызывает func() до первого успеха, не больше attempts раз.
+
+    Returns:
+        результат func(); исключение последней попытки пробрасывается
+    """
+    what = what or getattr(func, "__name__", "call")
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            log.warning(f"{what} failed (attempt {attempt + 1}/{attempts}), retry in {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+
+async def aretry(func, attempts: int, base_delay: float, max_delay: float, what: str = None):
+    """Асинхронный retry: func — корутинная функция, паузы не блокируют event loop."""
+    what = what or getattr(func, "__name__", "call")
+    for attempt in range(attempts):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            log.warning(f"{what} failed (attempt {attempt + 1}/{attempts}), retry in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
@@ -0,0 +1,155 @@
+# app/search.py
+"""
+Подбор гиперпараметров последовательным отсевом (successive halving).
+
+Все кандидаты сначала оцениваются кросс-валидацией на небольшой
+подвыборке; в следующий раунд проходит лучшая 1/factor часть, и
+подвыборка растёт в factor раз. Слабые кандидаты отсеиваются, не
+дойдя до полного датасета. Кандидаты раунда считаются параллельно в
+n_jobs процессах (sklearn HalvingGridSearchCV / HalvingRandomSearchCV).
+
+Пространство поиска — словарь {параметр: значения}: список — набор
+значений, {"low", "high", "log", "integer"} — диапазон для случайного
+поиска. n_candidates=0 — полный перебор сетки из списков.
+"""
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+# Бюджет процессов на все поиски процесса сервиса вместе: одновременные
+# поиски делят его (search_budget), запрос может только уменьшить долю
+SEARCH_N_JOBS = int(os.getenv("SEARCH_N_JOBS", str(os.cpu_count() or 1)))
+SEARCH_FACTOR = int(os.getenv("SEARCH_FACTOR", "3"))
+SEARCH_CV = int(os.getenv("SEARCH_CV", "3"))
+
+
+class WorkerBudget:
+    """
+    Процессы, которые одновременные поиски берут из общего бюджета.
+
+    Поиск получает сколько просил, но не больше свободного; если свободных
+    нет, ждёт завершения другого поиска. Сумма n_jobs всех идущих поисков
+    не превышает бюджет, поэтому они не перегружают узел вместе с инференсом.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.free = total
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, wanted: int = None):
+        """Выделяет процессы на время блока; отдаёт их число."""
+        wanted = max(1, min(wanted or self.total, self.total))
+        with self._cond:
+            self._cond.wait_for(lambda: self.free > 0)
+            n_jobs = min(wanted, self.free)
+            self.free -= n_jobs
+        try:
+            yield n_jobs
+        finally:
+            with self._cond:
+                self.free += n_jobs
+                self._cond.notify_all()
+
+
+search_budget = WorkerBudget(SEARCH_N_JOBS)
+
+
+def _distribution(name: str, spec):
+    if isinstance(spec, (list, tuple)):
+        if not spec:
+            raise ValueError(f"Param {name}: empty list of values")
+        return list(spec)
+    if isinstance(spec, dict) and "low" in spec and "high" in spec:
+        from scipy import stats
+
+        low, high = spec["low"], spec["high"]
+        if not low < high:
+            raise ValueError(f"Param {name}: low must be less than high")
+        if spec.get("integer"):
+            if spec.get("log"):
+                raise ValueError(f"Param {name}: log scale is supported for float ranges only")
+            return stats.randint(int(low), int(high) + 1)
+        if spec.get("log"):
+            if low <= 0:
+                raise ValueError(f"Param {name}: log range must be positive")
+            return stats.loguniform(low, high)
+        return stats.uniform(low, high - low)
+    raise ValueError(f"Param {name}: expected a list of values or {{low, high}} range")
+
+
+def parse_space(space: dict, n_candidates: int = 0) -> dict:
+    """
+    Пространство поиска для sklearn: списки и распределения scipy.
+
+    ValueError, если пространство пустое или в переборе сетки
+    (n_candidates=0) есть диапазоны.
+    """
+    if not space:
+        raise ValueError("Search space is empty")
+    parsed = {name: _distribution(name, spec) for name, spec in space.items()}
+    if not n_candidates and not all(isinstance(v, list) for v in parsed.values()):
+        raise ValueError("Ranges need random search: set n_candidates")
+    return parsed
+
+
+def build_search(estimator, space: dict, n_candidates: int = 0, factor: int = SEARCH_FACTOR,
+                 cv: int = SEARCH_CV, n_jobs: int = None, random_state: int = None):
+    """HalvingGridSearchCV для сетки или HalvingRandomSearchCV для n_candidates кандидатов."""
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+
+    # -1 для sklearn — все CPU, мимо общего бюджета
+    n_jobs = max(1, min(n_jobs or SEARCH_N_JOBS, SEARCH_N_JOBS))
+    parsed = parse_space(space, n_candidates)
+    if n_candidates:
+        return HalvingRandomSearchCV(
+            estimator, parsed, n_candidates=n_candidates, factor=factor, cv=cv,
+            n_jobs=n_jobs, random_state=random_state,
+        )
+    return HalvingGridSearchCV(
+        estimator, parsed, factor=factor, cv=cv, n_jobs=n_jobs, random_state=random_state,
+    )
+
+
+def native(value):
+    """NumPy-скаляры в числа Python (для JSON и protobuf)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def trials(search) -> list:
+    """
+    Оценки кандидатов по раундам из cv_results_.
+
+    Returns:
+        список {params, iter, n_resources, mean_test_score, std_test_score,
+        mean_fit_time}; кандидат встречается в каждом пройденном раунде
+    """
+    results = search.cv_results_
+    return [
+        {
+            "params": {k: native(v) for k, v in params.items()},
+            "iter": int(results["iter"][i]),
+            "n_resources": int(results["n_resources"][i]),
+            "mean_test_score": float(results["mean_test_score"][i]),
+            "std_test_score": float(results["std_test_score"][i]),
+            "mean_fit_time": float(results["mean_fit_time"][i]),
+        }
+        for i, params in enumerate(results["params"])
+    ]
+
+
+def log_trials(run, rows: list):
+    """
+    Кандидаты как вложенные запуски MLflow: по запуску на кандидата в
+    каждом раунде, с параметрами и оценками раунда (шаг метрик — раунд).
+    """
+    for number, row in enumerate(rows):
+        trial = run.child(f"trial-{number}-iter-{row['iter']}")
+        trial.log_params(row["params"])
+        trial.log_params({"iter": row["iter"], "n_resources": row["n_resources"]})
+        for key in ("mean_test_score", "std_test_score", "mean_fit_time"):
+            if np.isfinite(row[key]):
+                trial.log_metric(key, row[key], step=row["iter"])
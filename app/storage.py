@@ -1,37 +1,330 @@
 # app/storage.py
-import boto3
-import botocore
+import abc
 import pickle
 import io
+import json
 import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from botocore.exceptions import ClientError
+from app import artifacts
+from app.codecs import get_codec
+from app.disk_cache import DiskCache
 from app.logger import log
+from app.metrics import DESERIALIZE, STORAGE_FETCH, register_model
 
-class Storage:
+# Пул соединений boto3: общий для всех потоков процесса
+MINIO_MAX_POOL_CONNECTIONS = int(os.getenv('MINIO_MAX_POOL_CONNECTIONS', '50'))
+MINIO_MAX_ATTEMPTS = int(os.getenv('MINIO_MAX_ATTEMPTS', '5'))
+MINIO_CONNECT_TIMEOUT = float(os.getenv('MINIO_CONNECT_TIMEOUT', '5'))
+MINIO_READ_TIMEOUT = float(os.getenv('MINIO_READ_TIMEOUT', '60'))
+# Формат новых артефактов: pickle или mmap (см. app/artifacts.py)
+MODEL_ARTIFACT_FORMAT = os.getenv('MODEL_ARTIFACT_FORMAT', 'pickle')
+# Сжатие новых артефактов: none, gzip, zstd или lz4 (см. app/codecs.py);
+# пустой уровень — уровень кодека по умолчанию
+MODEL_COMPRESSION = os.getenv('MODEL_COMPRESSION', 'none')
+MODEL_COMPRESSION_LEVEL = int(os.getenv('MODEL_COMPRESSION_LEVEL') or 0) or None
+# Локальный дисковый кэш артефактов, общий для процессов контейнера;
+# пустое значение отключает кэш
+MODEL_FILE_CACHE_DIR = os.getenv('MODEL_FILE_CACHE_DIR', '/tmp/mlops-models')
+# Бюджет дискового кэша; 0 — без ограничения
+MODEL_FILE_CACHE_MAX_MB = float(os.getenv('MODEL_FILE_CACHE_MAX_MB', '2048'))
+# Объекты больше порога грузятся multipart и скачиваются параллельными Range GET
+MINIO_MULTIPART_THRESHOLD_MB = float(os.getenv('MINIO_MULTIPART_THRESHOLD_MB', '16'))
+MINIO_MULTIPART_CHUNK_MB = float(os.getenv('MINIO_MULTIPART_CHUNK_MB', '8'))
+MINIO_TRANSFER_CONCURRENCY = int(os.getenv('MINIO_TRANSFER_CONCURRENCY', '8'))
+MB = 1024 * 1024
+# Попытки обновить манифест, если его одновременно изменил другой процесс
+MANIFEST_RETRIES = int(os.getenv('MANIFEST_RETRIES', '10'))
+MANIFEST_KEY = 'manifest.json'
+
+
+def model_ref(name: str, version: int = None) -> str:
+    """Ссылка на модель: имя (последняя версия) или имя@версия."""
+    return f"{name}@{version}" if version else name
+
+
+def parse_ref(ref: str):
+    """(имя, версия или None) из ссылки model_ref; ValueError на плохую версию."""
+    name, _, version = ref.partition('@')
+    if not version:
+        return name, None
+    if not version.isdigit() or int(version) <= 0:
+        raise ValueError(f"Invalid model version: {version!r}")
+    return name, int(version)
+
+
+class ManifestConflictError(RuntimeError):
+    """Манифест не удалось обновить: его постоянно меняют другие процессы."""
+
+
+class ModelCatalog(abc.ABC):
+    """
+    Каталог моделей: список, версии, проверка и удаление.
+
+    Реализуют его синхронный Storage и AsyncStorage из
+    app/async_storage.py (обработчики FastAPI). Раскладка ключей и
+    манифест версий общие: здесь собрана их логика без обращений к S3,
+    реализации отличаются только клиентом.
+    """
+
+    bucket = 'models'
+
+    @abc.abstractmethod
+    def head(self, ref: str, etag: str = None):
+        """ETag артефакта без скачивания; None, если модели нет."""
+
+    @abc.abstractmethod
+    def list_models(self):
+        """Обученные модели: последняя версия каждой."""
+
+    @abc.abstractmethod
+    def versions(self, name: str):
+        """Версии модели по возрастанию."""
+
+    @abc.abstractmethod
+    def delete(self, ref: str) -> bool:
+        """Удаляет модель или одну версию; True, если что-то удалено."""
+
+    @staticmethod
+    def key(name: str) -> str:
+        """Ключ объекта модели до появления версий (читается для совместимости)."""
+        return f"{name}.pkl"
+
+    @staticmethod
+    def _drop(ref: str, removed: list):
+        """
+        Правка манифеста: удаляет модель или версию по ссылке.
+
+        Удалённые записи версий попадают в removed. Если удалена
+        последняя версия, последней становится предыдущая.
+        """
+        name, version = parse_ref(ref)
+
+        def mutate(manifest):
+            removed.clear()
+            record = manifest['models'].get(name)
+            if record is None:
+                return False
+            if version is None:
+                removed.extend(record['versions'].values())
+                del manifest['models'][name]
+                return True
+            entry = record['versions'].pop(str(version), None)
+            if entry is None:
+                return False
+            removed.append(entry)
+            if not record['versions']:
+                del manifest['models'][name]
+            elif record['latest'] == version:
+                record['latest'] = max(map(int, record['versions']))
+            return True
+        return mutate
+
+    @classmethod
+    def _resolve(cls, manifest: dict, ref: str):
+        """
+        Ключ объекта и запись версии по ссылке model_ref.
+
+        Модели без версий (сохранённые до манифеста) находятся по старому
+        ключу {имя}.pkl; для них запись None.
+
+        Returns:
+            (key, entry) или (None, None), если такой версии нет
+        """
+        name, version = parse_ref(ref)
+        record = manifest['models'].get(name)
+        if record is None:
+            return (cls.key(name), None) if version is None else (None, None)
+        entry = record['versions'].get(str(version or record['latest']))
+        return (entry['key'], entry) if entry else (None, None)
+
+    @staticmethod
+    def _list(manifest: dict):
+        return [
+            dict(_version_info(name, record['versions'][str(record['latest'])]),
+                 versions=len(record['versions']))
+            for name, record in sorted(manifest['models'].items())
+        ]
+
+    @staticmethod
+    def _versions(manifest: dict, name: str):
+        record = manifest['models'].get(name, {'versions': {}})
+        return [_version_info(name, e) for _, e in sorted(record['versions'].items(), key=lambda i: int(i[0]))]
+
+
+class ModelStore(ModelCatalog):
+    """
+    Хранилище моделей: каталог плюс сохранение и загрузка артефактов.
+
+    Реализуют его синхронный Storage (gRPC, процессы инференса) и
+    AsyncStorage (процесс FastAPI); здесь же сериализация, кодеки и
+    формат артефактов.
+    """
+
+    @abc.abstractmethod
+    def save(self, name: str, model, metrics: dict = None) -> dict:
+        """Сохраняет новую версию модели; запись версии из манифеста."""
+
+    @abc.abstractmethod
+    def load(self, ref: str):
+        """Модель по ссылке model_ref; None, если её нет."""
+
+    @abc.abstractmethod
+    def load_with_etag(self, ref: str):
+        """(модель, ETag артефакта); (None, None), если модели нет."""
+
+    @staticmethod
+    def version_key(name: str) -> str:
+        """Новый неизменяемый ключ версии модели."""
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+        return f"{name}/{stamp}-{uuid.uuid4().hex[:8]}.pkl"
+
+    @staticmethod
+    def _serializer():
+        """
+        (write(model, f), метаданные объекта) для MODEL_ARTIFACT_FORMAT и
+        MODEL_COMPRESSION: write сериализует модель сразу через кодек.
+        """
+        if MODEL_ARTIFACT_FORMAT == 'mmap':
+            dump, fmt = artifacts.dump, artifacts.FORMAT_NAME
+        else:
+            dump, fmt = (lambda obj, f: pickle.dump(obj, f, protocol=5)), 'pickle'
+        codec = get_codec(MODEL_COMPRESSION)
+
+        def write(model, f):
+            with codec.writer(f, MODEL_COMPRESSION_LEVEL) as out:
+                dump(model, out)
+        return write, {'format': fmt, 'codec': codec.name}
+
+    @staticmethod
+    def _codec(obj):
+        """Кодек объекта по метаданным ответа GET; старые объекты — несжатые."""
+        return get_codec(obj.get('Metadata', {}).get('codec'))
+
+    def _decompress(self, codec, source, key: str, etag: str):
+        """
+        Потоково распаковывает source: в файл дискового кэша (возвращает
+        путь) или, без кэша, в память (возвращает bytes).
+        """
+        reader = codec.reader(source)
+        if self.disk_cache:
+            return self.disk_cache.write(key, etag, lambda f: shutil.copyfileobj(reader, f, 1 << 20))
+        return reader.read()
+
+    @classmethod
+    def _load_unpacked(cls, unpacked):
+        if isinstance(unpacked, str):
+            return artifacts.load_file(unpacked)
+        return cls._deserialize(unpacked)
+
+    @staticmethod
+    def _deserialize(data):
+        if artifacts.is_artifact(data):
+            return artifacts.loads(data)
+        return pickle.loads(data)
+
+    def _ranges(self, start: int, size: int):
+        """
+        Диапазоны (start, end) для докачки объекта с позиции start: один
+        до конца для объектов не больше multipart-порога, иначе по chunk_size.
+        """
+        step = size if size <= self.multipart_threshold else self.chunk_size
+        return [(s, min(s + step, size) - 1) for s in range(start, size, step)]
+
+    @staticmethod
+    def _new_entry(key: str, etag: str, size: int, metadata: dict, metrics: dict = None) -> dict:
+        return {
+            'key': key,
+            'etag': etag,
+            'size': size,
+            'format': metadata['format'],
+            'codec': metadata['codec'],
+            'metrics': metrics or {},
+            'created_at': time.time(),
+        }
+
+    @staticmethod
+    def _add_version(name: str, entry: dict):
+        """Правка манифеста: entry — новая последняя версия модели name."""
+        def mutate(manifest):
+            record = manifest['models'].setdefault(name, {'latest': 0, 'versions': {}})
+            entry['version'] = max(map(int, record['versions']), default=0) + 1
+            record['versions'][str(entry['version'])] = entry
+            record['latest'] = entry['version']
+            return True
+        return mutate
+
+
+def connection_params() -> dict:
+    """Адрес и ключи Minio для клиентов S3 (читаются при создании клиента)."""
+    return {
+        'endpoint_url': os.getenv('MINIO_ENDPOINT', 'http://minio:9000'),
+        'aws_access_key_id': os.getenv('MINIO_ACCESS_KEY', 'minioadmin'),
+        'aws_secret_access_key': os.getenv('MINIO_SECRET_KEY', 'minioadmin'),
+    }
+
+
+def default_disk_cache():
+    """Дисковый кэш артефактов из MODEL_FILE_CACHE_DIR; None, если отключён."""
+    if not MODEL_FILE_CACHE_DIR:
+        return None
+    return DiskCache(MODEL_FILE_CACHE_DIR, int(MODEL_FILE_CACHE_MAX_MB * MB))
+
+
+class Storage(ModelStore):
     def __init__(self):
-        endpoint = os.getenv('MINIO_ENDPOINT', 'http://minio:9000')
-        access_key = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
-        secret_key = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
+        # boto3 импортируется при подключении, а не при импорте модуля
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
 
+        self.s3 = boto3.client(
+            's3',
+            **connection_params(),
+            config=Config(
+                signature_version='s3v4',
+                max_pool_connections=MINIO_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+                connect_timeout=MINIO_CONNECT_TIMEOUT,
+                read_timeout=MINIO_READ_TIMEOUT,
+                # adaptive: экспоненциальная задержка между повторами
+                # плюс клиентское ограничение частоты при троттлинге
+                retries={'max_attempts': MINIO_MAX_ATTEMPTS, 'mode': 'adaptive'},
+            ),
+        )
+        self.multipart_threshold = int(MINIO_MULTIPART_THRESHOLD_MB * MB)
+        self.chunk_size = int(MINIO_MULTIPART_CHUNK_MB * MB)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.chunk_size,
+            max_concurrency=MINIO_TRANSFER_CONCURRENCY,
+        )
+        self._transfer_pool = None
+        self._transfer_pool_lock = threading.Lock()
+        # Последний прочитанный манифест и его ETag
+        self._manifest = ({'models': {}}, None)
+        self.disk_cache = default_disk_cache()
         try:
-            self.s3 = boto3.client(
-                's3',
-                endpoint_url=endpoint,
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                config=boto3.session.Config(signature_version='s3v4')
-            )
-            # Простая проверка подключения
-            self.s3.list_buckets()
+            # Заодно проверка подключения: один HEAD вместо list_buckets
+            self._ensure_bucket()
             log.info("Connected to MinIO")
         except Exception as e:
             log.error(f"Cannot connect to MinIO: {e}")
             raise Exception(f"MinIO connection failed: {str(e)}")
 
-        self.bucket = 'models'
-        self._ensure_bucket()
-
     def _ensure_bucket(self):
+        try:
+            self.s3.head_bucket(Bucket=self.bucket)
+            return
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchBucket', 'NotFound'):
+                raise
         try:
             self.s3.create_bucket(Bucket=self.bucket)
             log.info(f"Bucket {self.bucket} created")
@@ -39,25 +332,455 @@ class Storage:
             if e.response['Error']['Code'] not in ['BucketAlreadyOwnedByYou', 'BucketAlreadyExists']:
                 log.warning(f"Could not create bucket: {e}")
 
-    def save(self, name: str, model):
-        buffer = io.BytesIO()
-        pickle.dump(model, buffer)
-        buffer.seek(0)
-        self.s3.put_object(Bucket=self.bucket, Key=f"{name}.pkl", Body=buffer)
-        log.info(f"Model {name} saved")
+    def save(self, name: str, model, metrics: dict = None) -> dict:
+        """
+        Сохраняет новую версию модели и делает её последней.
+
+        Артефакт пишется под новым неизменяемым ключом, затем версия
+        добавляется в манифест условным PUT. Сериализатор пишет в пайп
+        из фонового потока, upload_fileobj читает из него частями:
+        объекты больше порога уходят multipart с MINIO_TRANSFER_CONCURRENCY
+        параллельными частями, а весь артефакт целиком в памяти не
+        собирается.
+
+        Returns:
+            запись версии из манифеста (version, key, etag, size, ...)
+        """
+        write, metadata = self._serializer()
+        key = self.version_key(name)
+        with _PipeReader(lambda f: write(model, f)) as body:
+            self.s3.upload_fileobj(
+                body, self.bucket, key,
+                ExtraArgs={'Metadata': metadata}, Config=self.transfer_config,
+            )
+        obj = self.s3.head_object(Bucket=self.bucket, Key=key)
+        entry = self._new_entry(key, obj['ETag'], obj['ContentLength'], metadata, metrics)
+        try:
+            self._update_manifest(self._add_version(name, entry))
+        except Exception:
+            # Версия не попала в манифест — артефакт никто не найдёт
+            self.s3.delete_object(Bucket=self.bucket, Key=key)
+            raise
+        register_model(name)
+        log.info(f"Model {name} v{entry['version']} saved "
+                 f"({metadata['format']}, {metadata['codec']}, {entry['size']} bytes)")
+        return entry
+
+    def copy_artifact(self, key: str, bucket: str, dest_key: str):
+        """Копирует объект модели в другой бакет на стороне S3, без скачивания."""
+        self.s3.copy_object(Bucket=bucket, Key=dest_key, CopySource={'Bucket': self.bucket, 'Key': key})
 
-    def load(self, name: str):
+    def download_artifact(self, key: str, path: str):
+        """Скачивает объект модели в файл как есть, без распаковки и десериализации."""
+        self.s3.download_file(self.bucket, key, path, Config=self.transfer_config)
+
+    def manifest(self) -> dict:
+        """
+        Манифест моделей: {'models': {имя: {'latest': N, 'versions': {...}}}}.
+
+        Читается условным GET: пока манифест не менялся, S3 отвечает 304
+        и используется прочитанная ранее копия.
+        """
+        return self._read_manifest()[0]
+
+    def _read_manifest(self):
+        cached, cached_etag = self._manifest
+        kwargs = {'IfNoneMatch': cached_etag} if cached_etag else {}
         try:
-            obj = self.s3.get_object(Bucket=self.bucket, Key=f"{name}.pkl")
-            return pickle.loads(obj['Body'].read())
+            obj = self.s3.get_object(Bucket=self.bucket, Key=MANIFEST_KEY, **kwargs)
         except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
+            code = e.response['Error']['Code']
+            if code == '304':
+                return cached, cached_etag
+            if code == 'NoSuchKey':
+                self._manifest = ({'models': {}}, None)
+                return self._manifest
+            raise
+        self._manifest = (json.loads(obj['Body'].read()), obj['ETag'])
+        return self._manifest
+
+    def _update_manifest(self, mutate):
+        """
+        Атомарно меняет манифест: mutate(manifest) правит копию на месте.
+
+        PUT условный — If-Match на прочитанный ETag (If-None-Match: * для
+        первого манифеста), поэтому одновременные записи не теряют версии
+        друг друга: проигравший перечитывает манифест и повторяет.
+        mutate возвращает False, если менять нечего.
+        """
+        for _ in range(MANIFEST_RETRIES):
+            manifest, etag = self._read_manifest()
+            manifest = _copy(manifest)
+            if not mutate(manifest):
+                return False
+            condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+            try:
+                obj = self.s3.put_object(
+                    Bucket=self.bucket, Key=MANIFEST_KEY, Body=json.dumps(manifest).encode(),
+                    ContentType='application/json', **condition
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                    continue
+                raise
+            self._manifest = (manifest, obj['ETag'])
+            return True
+        raise ManifestConflictError(f"Manifest update failed after {MANIFEST_RETRIES} attempts")
+
+    def resolve(self, ref: str):
+        """(key, entry) по ссылке model_ref, см. ModelCatalog._resolve."""
+        return self._resolve(self.manifest(), ref)
+
+    def versions(self, name: str):
+        """Версии модели по возрастанию; пустой список, если модели нет."""
+        return self._versions(self.manifest(), name)
+
+    def load(self, ref: str):
+        model, _ = self.load_with_etag(ref)
+        return model
+
+    def load_with_etag(self, ref: str):
+        """
+        Загружает модель вместе с ETag объекта; (None, None), если её нет.
+
+        ref — имя (последняя версия) или имя@версия, см. model_ref.
+
+        Артефакты сохраняются в дисковый кэш (MODEL_FILE_CACHE_DIR) и
+        читаются оттуда, mmap-артефакты — отображаются в память. Если
+        локальная копия уже есть, GET идёт с If-None-Match и на 304 тело
+        не скачивается вовсе — в том числе после перезапуска процесса
+        и в соседних процессах контейнера.
+        """
+        with STORAGE_FETCH.time():
+            key, _ = self.resolve(ref)
+        if key is None:
+            return None, None
+        cache = self.disk_cache
+        local_path, local_etag = cache.lookup(key) if cache else (None, None)
+        kwargs = {'IfNoneMatch': local_etag} if local_etag else {}
+        while True:
+            try:
+                # Первый кусок запрашивается сразу: по Content-Range видно,
+                # нужно ли докачивать остальное
+                with STORAGE_FETCH.time():
+                    obj = self.s3.get_object(
+                        Bucket=self.bucket, Key=key,
+                        Range=f'bytes=0-{self.chunk_size - 1}', **kwargs
+                    )
+                break
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'NoSuchKey':
+                    return None, None
+                if code != '304':
+                    raise
+            cache.touch(local_path)
+            try:
+                with DESERIALIZE.time():
+                    return artifacts.load_file(local_path), local_etag
+            except FileNotFoundError:
+                # Файл вытеснил другой процесс между lookup и чтением:
+                # скачиваем объект заново, уже без условия
+                log.info(f"Cached {key} evicted before reading, downloading again")
+                kwargs = {}
+
+        etag = obj['ETag']
+        codec = self._codec(obj)
+        if codec.name != 'none':
+            # Сжатый объект распаковывается по мере скачивания кусков по порядку
+            source = io.BufferedReader(_ChunkReader(self._ordered_chunks(key, obj)), 1 << 20)
+            with STORAGE_FETCH.time():
+                unpacked = self._decompress(codec, source, key, etag)
+            with DESERIALIZE.time():
+                return self._load_unpacked(unpacked), etag
+        if cache:
+            # write заодно удаляет устаревшую локальную копию
+            def write(f):
+                fd = f.fileno()
+                self._download(key, obj, lambda offset, data: os.pwrite(fd, data, offset))
+
+            with STORAGE_FETCH.time():
+                path = cache.write(key, etag, write)
+            with DESERIALIZE.time():
+                return artifacts.load_file(path), etag
+
+        data = bytearray(_object_size(obj))
+
+        def write_at(offset, chunk):
+            data[offset:offset + len(chunk)] = chunk
+
+        with STORAGE_FETCH.time():
+            self._download(key, obj, write_at)
+        with DESERIALIZE.time():
+            return self._deserialize(data), etag
+
+    def _download(self, key: str, first, write_at):
+        """
+        Докачивает объект, начатый ответом first, через write_at(offset, bytes).
+
+        Остаток объекта больше multipart-порога качается параллельными
+        Range GET по chunk_size; каждый с If-Match на ETag первого ответа,
+        чтобы куски не смешались при одновременной перезаписи объекта.
+        """
+        received = _copy_body(first['Body'], 0, write_at)
+        size = _object_size(first)
+        if received >= size:
+            return
+        etag = first['ETag']
+
+        def fetch(start, end):
+            _copy_body(self._get_range(key, etag, start, end), start, write_at)
+
+        ranges = self._ranges(received, size)
+        if len(ranges) == 1:
+            fetch(*ranges[0])
+            return
+        for future in [self._get_transfer_pool().submit(fetch, *r) for r in ranges]:
+            future.result()
+
+    def _get_range(self, key: str, etag: str, start: int, end: int):
+        """Тело Range GET; If-Match не даёт смешать куски разных версий объекта."""
+        return self.s3.get_object(
+            Bucket=self.bucket, Key=key, Range=f'bytes={start}-{end}', IfMatch=etag
+        )['Body']
+
+    def _ordered_chunks(self, key: str, first):
+        """
+        Куски объекта по порядку для потоковой распаковки.
+
+        Диапазоны качаются параллельно, но вперёд читается не больше
+        MINIO_TRANSFER_CONCURRENCY кусков, так что память ограничена.
+        """
+        head = first['Body'].read()
+        yield head
+        etag = first['ETag']
+        pool = self._get_transfer_pool()
+        pending = deque()
+        for start, end in self._ranges(len(head), _object_size(first)):
+            pending.append(pool.submit(lambda s, e: self._get_range(key, etag, s, e).read(), start, end))
+            if len(pending) >= MINIO_TRANSFER_CONCURRENCY:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _get_transfer_pool(self):
+        if self._transfer_pool is None:
+            with self._transfer_pool_lock:
+                if self._transfer_pool is None:
+                    self._transfer_pool = ThreadPoolExecutor(
+                        MINIO_TRANSFER_CONCURRENCY, thread_name_prefix='s3-transfer'
+                    )
+        return self._transfer_pool
+
+    def head(self, ref: str, etag: str = None):
+        """
+        Текущий ETag модели без скачивания тела; None, если модели нет.
+
+        Для версионированных моделей ETag берётся из манифеста (обычно
+        это 304 на условный GET манифеста). Для старых моделей без версий
+        идёт HEAD объекта; если передан etag, запрос условный
+        (If-None-Match): на неизменённый объект S3 отвечает 304, и метод
+        возвращает тот же etag.
+        """
+        key, entry = self.resolve(ref)
+        if entry is not None or key is None:
+            return entry and entry['etag']
+        kwargs = {'IfNoneMatch': etag} if etag else {}
+        try:
+            obj = self.s3.head_object(Bucket=self.bucket, Key=key, **kwargs)
+            return obj['ETag']
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == '304':
+                return etag
+            if code in ('404', 'NoSuchKey', 'NotFound'):
                 return None
             raise
 
-    def delete(self, name: str):
+    def list_models(self):
+        """
+        Обученные модели: последняя версия каждой, по манифесту.
+
+        Пока манифеста нет (бакет со старыми моделями без версий),
+        модели ищутся перебором ключей {имя}.pkl.
+
+        Returns:
+            список словарей name, version, versions, size, metrics,
+            created_at, last_modified
+        """
+        manifest, etag = self._read_manifest()
+        if etag is not None:
+            return self._list(manifest)
+        models = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket):
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith('.pkl') and '/' not in obj['Key']:
+                    models.append({
+                        'name': obj['Key'][:-len('.pkl')],
+                        'version': None,
+                        'size': obj['Size'],
+                        'last_modified': obj['LastModified'],
+                    })
+        return models
+
+    def delete(self, ref: str):
+        """
+        Удаляет модель целиком (имя) или одну версию (имя@версия).
+
+        Если удалена последняя версия, последней становится предыдущая.
+
+        Returns:
+            True, если что-то удалено
+        """
         try:
-            self.s3.delete_object(Bucket=self.bucket, Key=f"{name}.pkl")
-            return True
-        except:
+            name, version = parse_ref(ref)
+            removed = []
+            keys = [e['key'] for e in removed] if self._update_manifest(self._drop(ref, removed)) else []
+            if version is None and self._legacy_exists(name):
+                keys.append(self.key(name))
+            for key in keys:
+                self.s3.delete_object(Bucket=self.bucket, Key=key)
+                if self.disk_cache:
+                    self.disk_cache.remove(key)
+            return bool(keys)
+        except Exception as e:
+            log.warning(f"Cannot delete model {ref}: {e}")
             return False
+
+    def _legacy_exists(self, name: str) -> bool:
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=self.key(name))
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+
+def _copy(manifest: dict) -> dict:
+    """Глубокая копия манифеста для правки перед условным PUT."""
+    return json.loads(json.dumps(manifest))
+
+
+def _version_info(name: str, entry: dict) -> dict:
+    """Описание версии для списков моделей (без служебных полей)."""
+    return {
+        'name': name,
+        'version': entry['version'],
+        'size': entry['size'],
+        'metrics': entry['metrics'],
+        'created_at': entry['created_at'],
+        'last_modified': datetime.fromtimestamp(entry['created_at'], timezone.utc),
+    }
+
+
+def _object_size(obj) -> int:
+    """Полный размер объекта из ответа GET (с Range или без)."""
+    content_range = obj.get('ContentRange')
+    if content_range:
+        return int(content_range.rsplit('/', 1)[1])
+    return obj['ContentLength']
+
+
+def _copy_body(body, offset: int, write_at) -> int:
+    """Переписывает тело ответа через write_at начиная с offset; возвращает конец."""
+    for chunk in body.iter_chunks(1 << 20):
+        write_at(offset, chunk)
+        offset += len(chunk)
+    return offset
+
+
+class _ChunkReader(io.RawIOBase):
+    """Файл на чтение поверх итератора байтовых кусков."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+
+class _PipeReader(io.RawIOBase):
+    """
+    Файл на чтение, в который writer(f) пишет из фонового потока.
+
+    Ошибка сериализации поднимается у читателя на конце потока, поэтому
+    загрузка прерывается, а не сохраняет обрезанный объект.
+    """
+
+    def __init__(self, writer):
+        read_fd, write_fd = os.pipe()
+        self._file = os.fdopen(read_fd, 'rb')
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._produce, args=(writer, write_fd), name='serialize', daemon=True
+        )
+        self._thread.start()
+
+    def _produce(self, writer, write_fd):
+        try:
+            with os.fdopen(write_fd, 'wb') as f:
+                writer(f)
+        except BaseException as e:
+            self._error = e
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        if not data and size != 0:
+            self._thread.join()
+            if self._error is not None:
+                raise self._error
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        # Закрытый конец пайпа обрывает запись, если загрузка упала
+        self._file.close()
+        super().close()
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """
+    Общий для процесса экземпляр Storage.
+
+    Клиент boto3 потокобезопасен, поэтому один экземпляр с пулом
+    соединений обслуживает все запросы REST и gRPC; проверка бакета
+    выполняется один раз при создании.
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = Storage()
+    return _storage
+
+
+def reset_storage():
+    """Сбрасывает общий экземпляр (тесты, смена окружения)."""
+    global _storage
+    with _storage_lock:
+        _storage = None
@@ -0,0 +1,77 @@
+# app/tensors.py
+"""
+Преобразования между NumPy и сообщениями Tensor / ParamValue.
+
+Tensor хранит данные одним блоком байт в порядке C, little-endian,
+поэтому на приёме массив получается через np.frombuffer без разбора
+по элементам и без pickle.
+"""
+import numpy as np
+from app import model_service_pb2
+
+Tensor = model_service_pb2.Tensor
+
+DTYPES = {
+    Tensor.FLOAT32: np.dtype("<f4"),
+    Tensor.FLOAT64: np.dtype("<f8"),
+    Tensor.INT32: np.dtype("<i4"),
+    Tensor.INT64: np.dtype("<i8"),
+    Tensor.BOOL: np.dtype("?"),
+}
+_CODES = {dtype.kind + str(dtype.itemsize): code for code, dtype in DTYPES.items()}
+
+
+def to_tensor(array) -> Tensor:
+    """Упаковывает массив в Tensor; dtype приводится к little-endian."""
+    array = np.asarray(array)
+    code = _CODES.get(array.dtype.kind + str(array.dtype.itemsize))
+    if code is None:
+        raise ValueError(f"Unsupported tensor dtype: {array.dtype}")
+    data = np.ascontiguousarray(array, dtype=DTYPES[code]).tobytes()
+    return Tensor(dtype=code, shape=array.shape, data=data)
+
+
+def from_tensor(tensor: Tensor) -> np.ndarray:
+    """
+    Массив из Tensor без копирования байт (только для чтения).
+
+    Raises:
+        ValueError: неизвестный dtype или размер данных не совпадает с shape
+    """
+    dtype = DTYPES.get(tensor.dtype)
+    if dtype is None:
+        raise ValueError(f"Unsupported tensor dtype: {tensor.dtype}")
+    shape = tuple(tensor.shape)
+    expected = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+    if len(tensor.data) != expected:
+        raise ValueError(f"Tensor of shape {shape} and dtype {dtype} needs {expected} bytes, got {len(tensor.data)}")
+    return np.frombuffer(tensor.data, dtype=dtype).reshape(shape)
+
+
+def to_params(params: dict) -> dict:
+    """Словарь Python в map<string, ParamValue>."""
+    result = {}
+    for key, value in params.items():
+        # bool — подкласс int, проверяем первым
+        if isinstance(value, (bool, np.bool_)):
+            result[key] = model_service_pb2.ParamValue(bool_value=bool(value))
+        elif isinstance(value, (int, np.integer)):
+            result[key] = model_service_pb2.ParamValue(int_value=int(value))
+        elif isinstance(value, (float, np.floating)):
+            result[key] = model_service_pb2.ParamValue(float_value=float(value))
+        elif isinstance(value, str):
+            result[key] = model_service_pb2.ParamValue(string_value=value)
+        else:
+            raise ValueError(f"Unsupported param type for {key}: {type(value).__name__}")
+    return result
+
+
+def from_params(params) -> dict:
+    """map<string, ParamValue> в словарь Python с исходными типами."""
+    result = {}
+    for key, value in params.items():
+        kind = value.WhichOneof("value")
+        if kind is None:
+            raise ValueError(f"Param {key} has no value")
+        result[key] = getattr(value, kind)
+    return result
@@ -0,0 +1,407 @@
+# app/tracking.py
+"""
+Фоновая запись экспериментов в MLflow.
+
+Обучение не обращается к MLflow: параметры, метрики и теги запуска
+собираются в RunRecord в памяти, а запись идёт в фоновом потоке
+TrackingLogger уже после того, как задача сохранила модель. Запуск
+отправляется несколькими запросами: create_run, log_batch (до лимитов
+MLflow на пакет) и set_terminated. Вложенные запуски (кандидаты
+подбора гиперпараметров) отправляются так же.
+
+Артефакт модели не сериализуется второй раз: в запуск копируется объект,
+который уже записал Storage.save. Если артефакты MLflow лежат в том же
+S3 (Minio), объект копируется на стороне сервера (CopyObject), иначе
+скачивается и загружается через log_artifact.
+
+Если трекинг-сервер недоступен, запись сохраняется в MLFLOW_SPOOL_DIR
+JSON-файлом и повторяется каждые MLFLOW_REPLAY_SECONDS, в том числе
+после перезапуска. Отправленные части из записи удаляются, поэтому
+повтор продолжает с места сбоя и не дублирует запуск. Буфер общий для
+процессов контейнера: перед повтором файл захватывается переименованием,
+поэтому одну запись не отправят два процесса.
+"""
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from app.logger import log
+from app.metrics import MLFLOW_LOGGING, MLFLOW_QUEUE_DEPTH, MLFLOW_SPOOLED
+
+MLFLOW_EXPERIMENT = os.getenv("MLFLOW_EXPERIMENT", "mlops-hw2")
+# Пустое значение отключает буфер на диске: при сбое запись теряется
+MLFLOW_SPOOL_DIR = os.getenv("MLFLOW_SPOOL_DIR", "/tmp/mlops-mlflow-spool")
+MLFLOW_REPLAY_SECONDS = float(os.getenv("MLFLOW_REPLAY_SECONDS", "30"))
+# Захваченная на повтор запись, которую так и не вернули (процесс упал),
+# снова доступна для повтора через это время
+STALE_CLAIM_SECONDS = 3600
+# Лимиты MLflow на один log_batch
+MAX_BATCH_PARAMS = 100
+MAX_BATCH_TAGS = 100
+MAX_BATCH_ENTITIES = 1000
+# Каталог артефакта версии в запуске. Это объект хранилища как есть (формат
+# и кодек — в тегах model_format и model_codec), а не MLflow-модель,
+# поэтому не "model/": mlflow.<flavor>.load_model его не прочитает
+ARTIFACT_PATH = "artifact"
+
+
+def tracking_uri() -> str:
+    return os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+
+
+def _missing_object(e: Exception) -> bool:
+    """Ошибка S3 об отсутствующем объекте (NoSuchKey/404)."""
+    code = getattr(e, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class RunRecord:
+    """
+    Содержимое одного запуска MLflow, собранное без обращений к сети.
+
+    Записи пиклуются (возвращаются из пула процессов обучения) и
+    сериализуются в JSON (буфер на диске).
+    """
+
+    def __init__(self, name: str = None, experiment: str = MLFLOW_EXPERIMENT):
+        self.record_id = uuid.uuid4().hex
+        self.name = name
+        self.experiment = experiment
+        self.params = {}
+        # (key, value, timestamp_ms, step)
+        self.metrics = []
+        self.tags = {}
+        # {"key": ключ объекта в бакете моделей}
+        self.artifact = None
+        self.children = []
+        self.run_id = None
+        self.start_time = _now_ms()
+        self.end_time = None
+
+    def log_param(self, key: str, value):
+        self.params[key] = str(value)
+
+    def log_params(self, params: dict):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key: str, value: float, step: int = 0):
+        self.metrics.append((key, float(value), _now_ms(), int(step)))
+
+    def log_metrics(self, metrics: dict, step: int = 0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def set_tag(self, key: str, value):
+        self.tags[key] = str(value)
+
+    def child(self, name: str = None) -> "RunRecord":
+        """Вложенный запуск того же эксперимента."""
+        record = RunRecord(name, self.experiment)
+        self.children.append(record)
+        return record
+
+    def finish(self):
+        self.end_time = _now_ms()
+        for child in self.children:
+            if child.end_time is None:
+                child.end_time = self.end_time
+
+    def metric_values(self, key: str) -> list:
+        return [value for k, value, _, _ in self.metrics if k == key]
+
+    def to_dict(self) -> dict:
+        data = {k: v for k, v in vars(self).items() if k != "children"}
+        data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunRecord":
+        record = cls.__new__(cls)
+        record.__dict__.update({k: v for k, v in data.items() if k != "children"})
+        record.metrics = [tuple(m) for m in record.metrics]
+        record.children = [cls.from_dict(child) for child in data.get("children", [])]
+        return record
+
+
+class TrackingLogger:
+    """
+    Очередь записей и фоновый поток, отправляющий их в MLflow.
+
+    submit не блокируется; поток стартует при первой записи и заодно
+    повторяет буфер на диске, пока новых записей нет.
+    """
+
+    def __init__(self, spool_dir: str = MLFLOW_SPOOL_DIR, replay_seconds: float = MLFLOW_REPLAY_SECONDS):
+        self.spool_dir = spool_dir
+        self.replay_seconds = replay_seconds
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._experiments = {}
+
+    def submit(self, record: RunRecord):
+        """Ставит запуск в очередь на отправку."""
+        if record.end_time is None:
+            record.finish()
+        self._queue.put(record)
+        MLFLOW_QUEUE_DEPTH.set(self._queue.qsize())
+        self._ensure_thread()
+
+    def start(self):
+        """
+        Запускает поток заранее: импорт mlflow и поиск эксперимента
+        проходят при старте, а не в первом обучении; буфер прошлых
+        запусков повторяется сразу.
+        """
+        self._ensure_thread(warm_up=True)
+
+    def _ensure_thread(self, warm_up: bool = False):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, args=(warm_up,), name="mlflow-logger", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self, warm_up: bool = False):
+        if warm_up:
+            try:
+                self._experiment_id(self._client(), MLFLOW_EXPERIMENT)
+            except Exception as e:
+                log.warning(f"MLflow experiment {MLFLOW_EXPERIMENT} not resolved at startup: {e}")
+        self.replay()
+        while True:
+            try:
+                record = self._queue.get(timeout=self.replay_seconds)
+            except queue.Empty:
+                self.replay()
+                continue
+            try:
+                if record is None:
+                    return
+                self._deliver(record)
+            finally:
+                self._queue.task_done()
+                MLFLOW_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def _deliver(self, record: RunRecord):
+        try:
+            self.send(record)
+        except Exception as e:
+            log.warning(f"MLflow logging failed, run {record.record_id} spooled: {e}")
+            self._spool(record)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Ждёт, пока очередь опустеет; False, если не успела за timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """
+        Останавливает поток. Что не отправилось за timeout, остаётся в
+        буфере на диске и отправится после перезапуска.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                self._spool(record)
+            self._queue.task_done()
+
+    # Отправка
+
+    def _client(self):
+        from mlflow.tracking import MlflowClient
+        return MlflowClient(tracking_uri())
+
+    def _experiment_id(self, client, name: str) -> str:
+        key = (tracking_uri(), name)
+        experiment_id = self._experiments.get(key)
+        if experiment_id is None:
+            experiment = client.get_experiment_by_name(name)
+            experiment_id = experiment.experiment_id if experiment else client.create_experiment(name)
+            self._experiments[key] = experiment_id
+        return experiment_id
+
+    def send(self, record: RunRecord, parent_run_id: str = None):
+        """
+        Отправляет запуск и вложенные запуски.
+
+        После каждого успешного шага отправленное удаляется из записи:
+        при сбое в записи остаётся только то, что ещё нужно повторить.
+        """
+        with MLFLOW_LOGGING.time():
+            self._send(self._client(), record, parent_run_id)
+
+    def _send(self, client, record: RunRecord, parent_run_id: str = None):
+        from mlflow.entities import Metric, Param, RunTag
+
+        if record.run_id is None:
+            tags = dict(record.tags)
+            if record.name:
+                tags["mlflow.runName"] = record.name
+            if parent_run_id:
+                tags["mlflow.parentRunId"] = parent_run_id
+            run = client.create_run(
+                self._experiment_id(client, record.experiment), start_time=record.start_time, tags=tags,
+            )
+            record.run_id = run.info.run_id
+            record.tags = {}
+
+        while record.params or record.metrics or record.tags:
+            params = [Param(k, v) for k, v in list(record.params.items())[:MAX_BATCH_PARAMS]]
+            tags = [RunTag(k, v) for k, v in list(record.tags.items())[:MAX_BATCH_TAGS]]
+            room = MAX_BATCH_ENTITIES - len(params) - len(tags)
+            metrics = [Metric(*m) for m in record.metrics[:room]]
+            client.log_batch(record.run_id, metrics=metrics, params=params, tags=tags)
+            for p in params:
+                del record.params[p.key]
+            for t in tags:
+                del record.tags[t.key]
+            record.metrics = record.metrics[len(metrics):]
+
+        if record.artifact:
+            if not self._upload_artifact(client, record.run_id, record.artifact["key"]):
+                # Версию удалили раньше, чем запуск дошёл до MLflow: повтор
+                # не поможет, запуск пишется без артефакта
+                log.warning(f"Artifact {record.artifact['key']} of run {record.run_id} no longer exists, skipped")
+            record.artifact = None
+
+        while record.children:
+            self._send(client, record.children[0], record.run_id)
+            record.children.pop(0)
+
+        client.set_terminated(record.run_id, "FINISHED", end_time=record.end_time)
+
+    def _upload_artifact(self, client, run_id: str, key: str) -> bool:
+        """
+        Копирует объект версии из бакета моделей в артефакты запуска (ARTIFACT_PATH/).
+
+        Returns: False, если объекта в хранилище уже нет
+        """
+        from app.storage import get_storage
+
+        storage = get_storage()
+        artifact_uri = client.get_run(run_id).info.artifact_uri
+        name = os.path.basename(key)
+        if artifact_uri.startswith("s3://"):
+            bucket, _, prefix = artifact_uri[len("s3://"):].partition("/")
+            try:
+                storage.copy_artifact(key, bucket, f"{prefix.rstrip('/')}/{ARTIFACT_PATH}/{name}")
+                return True
+            except Exception as e:
+                if _missing_object(e):
+                    return False
+                # Артефакты MLflow в другом S3: копируем через клиента
+                log.warning(f"Server-side copy of {key} to {artifact_uri} failed: {e}")
+        with tempfile.TemporaryDirectory(prefix="mlflow-artifact-") as tmp:
+            path = os.path.join(tmp, name)
+            try:
+                storage.download_artifact(key, path)
+            except Exception as e:
+                if _missing_object(e):
+                    return False
+                raise
+            client.log_artifact(run_id, path, ARTIFACT_PATH)
+        return True
+
+    # Буфер на диске
+
+    def _spool_path(self, record: RunRecord) -> str:
+        return os.path.join(self.spool_dir, f"{record.record_id}.json")
+
+    def _spool(self, record: RunRecord):
+        if not self.spool_dir:
+            log.error(f"MLflow run {record.record_id} dropped: spooling is disabled")
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = self._spool_path(record)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(record.to_dict(), f)
+        os.replace(tmp_path, path)
+        MLFLOW_SPOOLED.set(len(self.spooled()))
+
+    def spooled(self) -> list:
+        """Файлы записей, ждущих повтора, от старых к новым."""
+        try:
+            names = os.listdir(self.spool_dir)
+        except (FileNotFoundError, TypeError):
+            return []
+        now = time.time()
+        paths = []
+        for name in names:
+            path = os.path.join(self.spool_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith(".json") or (name.endswith(".claim") and now - mtime > STALE_CLAIM_SECONDS):
+                paths.append((mtime, path))
+        return [path for _, path in sorted(paths)]
+
+    @staticmethod
+    def _claim(path: str):
+        """Захватывает файл буфера; None, если его уже взял другой процесс."""
+        claimed = f"{path.rsplit('.json', 1)[0]}.json.{uuid.uuid4().hex}.claim"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        os.utime(claimed)
+        return claimed
+
+    def replay(self) -> int:
+        """
+        Повторяет записи из буфера на диске по порядку.
+
+        На первом сбое останавливается: сервер, скорее всего, ещё
+        недоступен. Returns: сколько запусков отправлено.
+        """
+        sent = 0
+        for path in self.spooled():
+            path = self._claim(path)
+            if path is None:
+                continue
+            try:
+                with open(path) as f:
+                    record = RunRecord.from_dict(json.load(f))
+            except (OSError, ValueError) as e:
+                log.error(f"Broken MLflow spool file {path} removed: {e}")
+                os.remove(path)
+                continue
+            try:
+                self.send(record)
+            except Exception as e:
+                self._spool(record)
+                os.remove(path)
+                log.warning(f"MLflow replay failed, {len(self.spooled())} runs still spooled: {e}")
+                break
+            os.remove(path)
+            sent += 1
+        if sent:
+            log.info(f"Replayed {sent} spooled MLflow runs")
+        MLFLOW_SPOOLED.set(len(self.spooled()))
+        return sent
+
+
+tracker = TrackingLogger()
@@ -0,0 +1,167 @@
+# app/upload.py
+"""
+Приём обучающих данных порциями строк (gRPC TrainModelStream).
+
+Строки копируются в один растущий буфер, поэтому на сервере в каждый
+момент живёт примерно одна копия датасета плюс текущая порция. Буфер
+больше TRAIN_STREAM_SPILL_MB уходит в memmap-файл на диске.
+"""
+import os
+import tempfile
+from collections import namedtuple
+import numpy as np
+from app import model_service_pb2
+from app.tensors import to_params, to_tensor
+
+# Порог, после которого X хранится в memmap-файле, а не в памяти
+TRAIN_STREAM_SPILL_MB = float(os.getenv("TRAIN_STREAM_SPILL_MB", "256"))
+TRAIN_STREAM_SPILL_DIR = os.getenv("TRAIN_STREAM_SPILL_DIR") or None
+# Предел строк одной загрузки: y всегда в памяти, а n_rows из заголовка
+# выделяется сразу, до прихода данных
+TRAIN_STREAM_MAX_ROWS = int(os.getenv("TRAIN_STREAM_MAX_ROWS", "20000000"))
+# Размер порции, которую режет клиент: заметно меньше лимита сообщения gRPC
+TRAIN_STREAM_CHUNK_BYTES = int(os.getenv("TRAIN_STREAM_CHUNK_BYTES", str(1024 * 1024)))
+# Рост буфера при неизвестном числе строк
+GROWTH = 1.5
+
+
+class MemmapRef(namedtuple("MemmapRef", "path dtype shape")):
+    """
+    Ссылка на X в memmap-файле.
+
+    В пул процессов обучения передаётся ссылка, а не массив: иначе
+    pickle скопировал бы весь датасет в сообщение воркеру.
+    """
+
+    def open(self):
+        return np.memmap(self.path, dtype=self.dtype, mode="r", shape=self.shape)
+
+    def remove(self):
+        """Удаляет файл; вызывает владелец ссылки, когда данные больше не нужны."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RowBuffer:
+    """
+    Растущий буфер строк X (rows x n_features) и меток y.
+
+    Если число строк известно заранее, буфер выделяется один раз. Иначе
+    он растёт в GROWTH раз: в памяти через ndarray.resize (realloc часто
+    расширяет блок без копирования), на диске — увеличением файла и
+    повторным отображением без копирования.
+    """
+
+    def __init__(self, n_features: int, x_dtype=np.float64, y_dtype=np.int64,
+                 expected_rows: int = 0, spill_bytes: float = TRAIN_STREAM_SPILL_MB * 1024 * 1024,
+                 spill_dir: str = TRAIN_STREAM_SPILL_DIR, max_rows: int = TRAIN_STREAM_MAX_ROWS):
+        if n_features <= 0:
+            raise ValueError("n_features must be positive")
+        if expected_rows > max_rows:
+            raise ValueError(f"n_rows {expected_rows} exceeds limit {max_rows}")
+        self.n_features = n_features
+        self.x_dtype = np.dtype(x_dtype)
+        self.row_bytes = n_features * self.x_dtype.itemsize
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir
+        self.max_rows = max_rows
+        self.path = None
+        self.rows = 0
+        self.capacity = max(int(expected_rows), 1024)
+        self.y = np.empty(self.capacity, dtype=y_dtype)
+        if self.capacity * self.row_bytes > spill_bytes:
+            self.X = self._map(self.capacity, create=True)
+        else:
+            self.X = np.empty((self.capacity, n_features), dtype=self.x_dtype)
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def append(self, X, y):
+        """Дописывает порцию строк; ValueError при несовпадении формы."""
+        X = np.asarray(X)
+        y = np.asarray(y)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected chunk of shape (rows, {self.n_features}), got {X.shape}")
+        if y.shape != (len(X),):
+            raise ValueError(f"Expected {len(X)} labels, got shape {y.shape}")
+        end = self.rows + len(X)
+        if end > self.max_rows:
+            raise ValueError(f"Upload exceeds {self.max_rows} rows")
+        if end > self.capacity:
+            self._grow(end)
+        self.X[self.rows:end] = X
+        self.y[self.rows:end] = y
+        self.rows = end
+
+    def _grow(self, needed: int):
+        capacity = max(needed, int(self.capacity * GROWTH))
+        self.y.resize(capacity, refcheck=False)
+        if self.spilled:
+            self.X.flush()
+            self.X = self._map(capacity)
+        elif capacity * self.row_bytes > self.spill_bytes:
+            filled = self.X[:self.rows]
+            mapped = self._map(capacity, create=True)
+            mapped[:self.rows] = filled
+            self.X = mapped
+        else:
+            self.X.resize((capacity, self.n_features), refcheck=False)
+        self.capacity = capacity
+
+    def _map(self, capacity: int, create: bool = False):
+        if create:
+            fd, self.path = tempfile.mkstemp(prefix="train-", suffix=".x", dir=self.spill_dir)
+            os.close(fd)
+        # Файл растёт без копирования уже записанных строк
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * self.row_bytes)
+        return np.memmap(self.path, dtype=self.x_dtype, mode="r+", shape=(capacity, self.n_features))
+
+    def arrays(self):
+        """
+        (X, y) из принятых строк.
+
+        Для буфера на диске X — MemmapRef, и файл переходит к получателю
+        ссылки: close() буфера его больше не удаляет, это делает
+        MemmapRef.remove().
+        """
+        y = self.y[:self.rows]
+        if self.spilled:
+            self.X.flush()
+            ref = MemmapRef(self.path, self.x_dtype.str, (self.rows, self.n_features))
+            self.path = None
+            return ref, y
+        return self.X[:self.rows], y
+
+    def close(self):
+        self.X = self.y = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def train_chunks(name: str, X, y, params: dict = None, dataset_name: str = "",
+                 chunk_bytes: int = TRAIN_STREAM_CHUNK_BYTES):
+    """
+    Сообщения TrainChunk для TrainModelStream: заголовок, затем порции строк.
+
+    Порция занимает не больше chunk_bytes (но не меньше одной строки).
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    x_tensor, y_tensor = to_tensor(X[:0]), to_tensor(y[:0])
+    yield model_service_pb2.TrainChunk(header=model_service_pb2.TrainHeader(
+        name=name,
+        typed_params=to_params(params or {}),
+        dataset_name=dataset_name,
+        n_rows=len(X),
+        n_features=X.shape[1],
+        x_dtype=x_tensor.dtype,
+        y_dtype=y_tensor.dtype,
+    ))
+    step = max(1, chunk_bytes // max(1, X.shape[1] * X.itemsize))
+    for start in range(0, len(X), step):
+        yield model_service_pb2.TrainChunk(rows=model_service_pb2.TrainRows(
+            X=to_tensor(X[start:start + step]), y=to_tensor(y[start:start + step])
+        ))
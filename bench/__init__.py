@@ -0,0 +1,10 @@
+"""
+Нагрузочные тесты REST и gRPC путей сервиса.
+
+    python -m bench --scenarios predict,grpc_predict --concurrency 16 --rate 200
+
+По умолчанию поднимает локальный стенд (moto S3 + файловый MLflow +
+REST и gRPC в этом процессе), проигрывает поток запросов и сравнивает
+p50/p95/p99, пропускную способность и долю ошибок с сохранённым
+baseline. При регрессии завершается с кодом 1.
+"""
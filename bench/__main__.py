@@ -0,0 +1,115 @@
+# bench/__main__.py
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import nullcontext
+from bench import report, workload
+from bench.runner import Client, replay
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Нагрузка на REST и gRPC пути сервиса")
+    parser.add_argument("--scenarios", default="predict,predict_batch,grpc_predict",
+                        help=f"через запятую, из {','.join(workload.TARGETS)}")
+    parser.add_argument("--input", help="записанный поток запросов (JSONL) вместо синтетики")
+    parser.add_argument("--record", help="сохранить синтетический поток в JSONL")
+    parser.add_argument("--requests", type=int, default=500, help="запросов на сценарий")
+    parser.add_argument("--train-requests", type=int, default=10, help="запросов на сценарий обучения")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=None, help="запросов в секунду (открытая модель)")
+    parser.add_argument("--model", default="forest")
+    parser.add_argument("--n-features", type=int, default=4)
+    parser.add_argument("--batch-rows", type=int, default=256)
+    parser.add_argument("--url", help="REST сервис; без --url/--grpc поднимается локальный стенд")
+    parser.add_argument("--grpc", help="gRPC сервис, host:port")
+    parser.add_argument("--baseline", default="bench/baseline.json")
+    parser.add_argument("--update-baseline", action="store_true", help="записать результаты в baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="не считать ошибкой отсутствие baseline для прогона или сценария")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="допустимый относительный рост латентности / падение rps")
+    parser.add_argument("--output", help="сохранить сводку прогона в JSON")
+    return parser.parse_args(argv)
+
+
+def build_streams(args):
+    """{сценарий: список запросов}."""
+    if args.input:
+        streams = {}
+        for request in workload.load(args.input):
+            streams.setdefault(request["target"], []).append(request)
+        return streams
+    streams = {}
+    for i, target in enumerate(args.scenarios.split(",")):
+        target = target.strip()
+        n = args.train_requests if target.endswith("train") else args.requests
+        streams[target] = list(workload.synthetic(
+            target, n, model=args.model, n_features=args.n_features, batch_rows=args.batch_rows, seed=i
+        ))
+    if args.record:
+        workload.save(args.record, [r for stream in streams.values() for r in stream])
+    return streams
+
+
+async def run_scenarios(streams, base_url, grpc_target, args, stack=None):
+    client = Client(base_url, grpc_target)
+    await client.start()
+    summaries = {}
+    try:
+        for scenario, requests in streams.items():
+            if stack is not None and not scenario.endswith("train"):
+                # Обучение перезаписывает модели: предсказания идут по свежим
+                await asyncio.to_thread(stack.seed)
+            results, wall = await replay(requests, client.send, args.concurrency, args.rate)
+            summaries[scenario] = report.summarize(
+                results, wall, concurrency=args.concurrency, rate=args.rate
+            )
+    finally:
+        await client.close()
+    return summaries
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    streams = build_streams(args)
+
+    if args.url or args.grpc:
+        context = nullcontext(None)
+    else:
+        from bench.stack import local_stack
+        context = local_stack(n_features=args.n_features)
+
+    with context as stack:
+        base_url = stack.base_url if stack else args.url
+        grpc_target = stack.grpc_target if stack else args.grpc
+        summaries = asyncio.run(run_scenarios(streams, base_url, grpc_target, args, stack))
+
+    print(report.format_table(summaries))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summaries, f, indent=2, sort_keys=True)
+    if args.update_baseline:
+        report.save_baseline(args.baseline, summaries)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = report.load_baseline(args.baseline)
+    # Без baseline регрессию не поймать: это ошибка, если не разрешено явно
+    missing = [scenario for scenario in summaries if scenario not in baseline]
+    if missing:
+        print(f"No baseline for {', '.join(missing)} in {args.baseline}; "
+              f"run with --update-baseline to create one", file=sys.stderr)
+        if not args.allow_missing_baseline:
+            return 2
+    for scenario, summary in summaries.items():
+        if scenario in baseline and not report.comparable(summary, baseline[scenario]):
+            print(f"{scenario}: load settings differ from baseline, not compared")
+    regressions = report.compare(summaries, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# bench/codecs.py
+"""
+Размер артефакта и время холодной загрузки для кодеков сжатия.
+
+Для каждого кодека модель сохраняется в moto и загружается заново с
+пустым дисковым кэшем: скачивание, распаковка в кэш и десериализация.
+moto работает в памяти процесса, поэтому время сети в замер не входит;
+est_load_ms добавляет к нему передачу артефакта по каналу --bandwidth-mbps,
+чтобы сравнивать кодеки для реального Minio.
+
+    python -m bench.codecs --codecs none,gzip,lz4,zstd,zstd:9 --trees 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from importlib.util import find_spec
+import numpy as np
+
+# Пакеты необязательных кодеков
+OPTIONAL = {"zstd": "zstandard", "lz4": "lz4"}
+
+
+def parse_codec(spec: str):
+    """'zstd:9' -> ('zstd', 9); уровень необязателен."""
+    name, _, level = spec.strip().partition(":")
+    return name, int(level) if level else None
+
+
+def build_model(trees: int, rows: int, n_features: int, seed: int = 0):
+    from sklearn.ensemble import RandomForestClassifier
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, n_features))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    return RandomForestClassifier(n_estimators=trees, random_state=seed).fit(X, y)
+
+
+def measure(storage, model, codec: str, level: int = None, repeats: int = 3, bandwidth_mbps: float = 1000):
+    """
+    Сохраняет модель с кодеком и замеряет холодные загрузки.
+
+    Returns:
+        словарь size_bytes, save_ms, load_ms (медиана), est_load_ms
+    """
+    import app.storage
+    from app.disk_cache import DiskCache
+
+    app.storage.MODEL_COMPRESSION = codec
+    app.storage.MODEL_COMPRESSION_LEVEL = level
+    started = time.perf_counter()
+    entry = storage.save("bench", model)
+    save_ms = (time.perf_counter() - started) * 1000
+
+    loads = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory(prefix="bench-codec-") as cache_dir:
+            storage.disk_cache = DiskCache(cache_dir)
+            started = time.perf_counter()
+            storage.load(f"bench@{entry['version']}")
+            loads.append((time.perf_counter() - started) * 1000)
+    load_ms = float(np.median(loads))
+    transfer_ms = entry["size"] * 8 / (bandwidth_mbps * 1e6) * 1000
+    return {
+        "size_bytes": entry["size"],
+        "save_ms": save_ms,
+        "load_ms": load_ms,
+        "est_load_ms": load_ms + transfer_ms,
+    }
+
+
+def run(codecs, trees=100, rows=5000, n_features=20, repeats=3, bandwidth_mbps=1000):
+    """
+    Замер всех кодеков на одной модели в moto.
+
+    Returns:
+        {спецификация кодека: результат measure}; ratio — доля от размера без сжатия
+    """
+    os.environ.setdefault("MINIO_ENDPOINT", "https://s3.amazonaws.com")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    from moto import mock_aws
+
+    model = build_model(trees, rows, n_features)
+    results = {}
+    with mock_aws():
+        import app.storage
+        from app.storage import Storage
+        saved = app.storage.MODEL_COMPRESSION, app.storage.MODEL_COMPRESSION_LEVEL
+        storage = Storage()
+        try:
+            # Прогрев: первый вызов платит за импорт и соединения
+            storage.save("bench", model)
+            for spec in ["none"] + [c for c in codecs if c != "none"]:
+                name, level = parse_codec(spec)
+                if name in OPTIONAL and find_spec(OPTIONAL[name]) is None:
+                    print(f"{spec}: {OPTIONAL[name]} not installed, skipped", file=sys.stderr)
+                    continue
+                results[spec] = measure(storage, model, name, level, repeats, bandwidth_mbps)
+        finally:
+            app.storage.MODEL_COMPRESSION, app.storage.MODEL_COMPRESSION_LEVEL = saved
+    raw = results["none"]["size_bytes"]
+    for result in results.values():
+        result["ratio"] = result["size_bytes"] / raw
+    return results
+
+
+def format_table(results: dict, bandwidth_mbps: float) -> str:
+    est = f"load@{bandwidth_mbps:g}Mbps"
+    header = f"{'codec':<10}{'size MB':>10}{'ratio':>8}{'save ms':>10}{'load ms':>10}{est:>18}"
+    lines = [header, "-" * len(header)]
+    for spec, r in results.items():
+        lines.append(
+            f"{spec:<10}{r['size_bytes'] / 1024 / 1024:>10.2f}{r['ratio']:>8.2f}"
+            f"{r['save_ms']:>10.1f}{r['load_ms']:>10.1f}{r['est_load_ms']:>18.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.codecs", description="Сравнение кодеков сжатия моделей")
+    parser.add_argument("--codecs", default="none,gzip,lz4,zstd,zstd:9", help="кодек[:уровень] через запятую")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--n-features", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3, help="холодных загрузок на кодек")
+    parser.add_argument("--bandwidth-mbps", type=float, default=1000, help="канал до Minio для est_load_ms")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.codecs.split(","), args.trees, args.rows, args.n_features,
+                  args.repeats, args.bandwidth_mbps)
+    print(format_table(results, args.bandwidth_mbps))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# bench/imports.py
+"""
+Время импорта точек входа сервиса (холодный старт процесса).
+
+Каждый замер — отдельный интерпретатор с `python -X importtime`, так
+что кэш модулей не переживает повтор. Для модуля печатается медиана
+полного времени импорта и накопленное время тяжёлых пакетов, которые
+он подтянул (пакета нет в строке — он не импортировался вовсе).
+
+    python -m bench.imports --modules app.api,app.grpc_server --repeats 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Пакеты, которые заметно удлиняют старт
+HEAVY = ("sklearn", "scipy", "pandas", "mlflow", "boto3", "aiobotocore", "passlib",
+         "jose", "grpc", "fastapi", "numpy")
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Строки `import time: self | cumulative | name` в {модуль: cumulative, мкс}.
+
+    Модуль учитывается по первому импорту, повторные строки не встречаются.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.setdefault(name.strip(), int(cumulative))
+    return times
+
+
+def measure(module: str, repeats: int = 5) -> dict:
+    """
+    Импорт модуля в свежих процессах.
+
+    Returns:
+        словарь total_ms (медиана) и packages {пакет: медиана мс} для
+        импортированных пакетов из HEAVY; время пакетов пересекается
+        (sklearn включает scipy)
+    """
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        runs.append(parse_importtime(proc.stderr))
+    packages = {}
+    for name in HEAVY:
+        # Пакет целиком — самый дорогой из его модулей (накопленное время
+        # включает вложенные); сам пакет может быть почти пустым
+        costs = [max((t for m, t in r.items() if m == name or m.startswith(name + ".")), default=None)
+                 for r in runs]
+        if None not in costs:
+            packages[name] = float(np.median(costs)) / 1000
+    return {
+        "total_ms": float(np.median([r[module] for r in runs])) / 1000,
+        "packages": packages,
+    }
+
+
+def format_table(results: dict) -> str:
+    lines = []
+    for module, r in results.items():
+        lines.append(f"{module}: {r['total_ms']:.0f} ms")
+        for name, ms in sorted(r["packages"].items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<14}{ms:>8.0f} ms")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.imports", description="Время импорта точек входа")
+    parser.add_argument("--modules", default="app.api,app.grpc_server", help="модули через запятую")
+    parser.add_argument("--repeats", type=int, default=5, help="процессов на модуль")
+    parser.add_argument("--budget-ms", type=float, help="код 1, если импорт модуля дольше")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    results = {module: measure(module, args.repeats) for module in args.modules.split(",")}
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    over = [m for m, r in results.items() if args.budget_ms and r["total_ms"] > args.budget_ms]
+    for module in over:
+        print(f"{module}: {results[module]['total_ms']:.0f} ms > budget {args.budget_ms:g} ms")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# bench/report.py
+"""Сводка прогона и сравнение с baseline."""
+import json
+import os
+from collections import Counter
+import numpy as np
+
+# Метрики, где рост — регрессия, и метрики, где регрессия — падение
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_KEY = "throughput_rps"
+# Параметры нагрузки: прогоны с разными значениями несравнимы
+LOAD_KEYS = ("concurrency", "rate")
+
+
+def summarize(results, wall_time: float, **load) -> dict:
+    """
+    p50/p95/p99 (мс), пропускная способность и доля ошибок прогона.
+
+    load — параметры нагрузки (concurrency, rate), сохраняются в сводке.
+    """
+    latencies = np.array([r.latency for r in results if r.error is None]) * 1000
+    errors = Counter(r.error for r in results if r.error is not None)
+    summary = {
+        "requests": len(results),
+        "errors": sum(errors.values()),
+        "error_rate": sum(errors.values()) / len(results) if results else 0.0,
+        "error_kinds": dict(errors),
+        "throughput_rps": len(latencies) / wall_time if wall_time else 0.0,
+        **load,
+    }
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary.update(p50_ms=p50, p95_ms=p95, p99_ms=p99,
+                       mean_ms=latencies.mean(), max_ms=latencies.max())
+    return summary
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25,
+            error_rate_tolerance: float = 0.01):
+    """
+    Сравнивает сводки сценариев с baseline.
+
+    Сценарии без baseline или с другими параметрами нагрузки пропускаются
+    (см. comparable).
+
+    Args:
+        current, baseline: {сценарий: сводка summarize}
+        tolerance: допустимый относительный рост латентности и падение
+            пропускной способности
+        error_rate_tolerance: допустимый абсолютный рост доли ошибок
+
+    Returns:
+        список описаний регрессий; пустой — регрессий нет
+    """
+    regressions = []
+    for scenario, summary in current.items():
+        base = baseline.get(scenario)
+        if base is None or not comparable(summary, base):
+            continue
+        for key in LATENCY_KEYS:
+            if key in base and key in summary and summary[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{scenario}: {key} {summary[key]:.2f} > baseline {base[key]:.2f} (+{tolerance:.0%})"
+                )
+        if summary[THROUGHPUT_KEY] < base[THROUGHPUT_KEY] * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: {THROUGHPUT_KEY} {summary[THROUGHPUT_KEY]:.1f} "
+                f"< baseline {base[THROUGHPUT_KEY]:.1f} (-{tolerance:.0%})"
+            )
+        if summary["error_rate"] > base["error_rate"] + error_rate_tolerance:
+            regressions.append(
+                f"{scenario}: error_rate {summary['error_rate']:.3f} > baseline {base['error_rate']:.3f}"
+            )
+    return regressions
+
+
+def comparable(summary: dict, base: dict) -> bool:
+    return all(summary.get(key) == base.get(key) for key in LOAD_KEYS)
+
+
+def load_baseline(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, summaries: dict):
+    """Обновляет сценарии в baseline, не трогая остальные."""
+    baseline = load_baseline(path)
+    baseline.update(summaries)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def format_table(summaries: dict) -> str:
+    header = f"{'scenario':<16}{'requests':>9}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    lines = [header, "-" * len(header)]
+    for scenario, s in summaries.items():
+        lines.append(
+            f"{scenario:<16}{s['requests']:>9}{s['throughput_rps']:>10.1f}"
+            f"{s.get('p50_ms', float('nan')):>10.2f}{s.get('p95_ms', float('nan')):>10.2f}"
+            f"{s.get('p99_ms', float('nan')):>10.2f}{s['error_rate']:>8.1%}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+# bench/runner.py
+"""Проигрывание потока запросов с заданной конкурентностью и частотой."""
+import asyncio
+import time
+from collections import namedtuple
+import numpy as np
+
+Result = namedtuple("Result", "target latency error")
+
+
+async def replay(requests, send, concurrency: int = 8, rate: float = None):
+    """
+    Отправляет запросы через send и замеряет латентность каждого.
+
+    Без rate — закрытая модель: concurrency запросов в работе, следующий
+    уходит сразу после ответа. С rate — открытая модель: i-й запрос
+    запланирован на момент i / rate, латентность считается от
+    запланированного момента, поэтому ожидание свободного слота при
+    перегрузке тоже попадает в замер.
+
+    Returns:
+        (список Result, длительность прогона в секундах)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def one(i, request):
+        scheduled = None
+        if rate:
+            scheduled = start + i / rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        async with semaphore:
+            began = scheduled or time.perf_counter()
+            error = None
+            try:
+                await send(request)
+            except Exception as e:
+                error = _error_label(e)
+            return Result(request["target"], time.perf_counter() - began, error)
+
+    results = await asyncio.gather(*(one(i, r) for i, r in enumerate(requests)))
+    return list(results), time.perf_counter() - start
+
+
+def _error_label(e) -> str:
+    import grpc
+    import httpx
+
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"HTTP {e.response.status_code}"
+    if isinstance(e, grpc.RpcError):
+        return f"gRPC {e.code().name}"
+    return type(e).__name__
+
+
+class RestClient:
+    """Асинхронный клиент REST API с JWT-токеном."""
+
+    def __init__(self, base_url: str, timeout: float = 300):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url, timeout=timeout, limits=httpx.Limits(max_connections=None)
+        )
+
+    async def start(self):
+        response = await self.client.post("/token")
+        response.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    async def send(self, request):
+        target, model = request["target"], request["model"]
+        if target == "predict":
+            response = await self.client.post(f"/predict/{model}", json={"features": request["features"]})
+        elif target == "predict_batch":
+            response = await self.client.post(
+                f"/predict_batch/{model}",
+                json={"features": request["features"], "proba": request.get("proba", False)},
+            )
+        elif target == "train":
+            response = await self.client.post(
+                "/train/", json={"model_type": model, "params": request["params"], "data": request["data"]}
+            )
+        else:
+            raise ValueError(f"REST client cannot send {target}")
+        response.raise_for_status()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class GrpcClient:
+    """Асинхронный клиент gRPC сервиса на grpc.aio."""
+
+    def __init__(self, target: str):
+        import grpc
+        from app import model_service_pb2_grpc
+
+        self.channel = grpc.aio.insecure_channel(target)
+        self.stub = model_service_pb2_grpc.ModelServiceStub(self.channel)
+
+    async def start(self):
+        await self.channel.channel_ready()
+
+    async def send(self, request):
+        from app import model_service_pb2
+
+        target, model = request["target"], request["model"]
+        if target == "grpc_predict":
+            await self.stub.Predict(model_service_pb2.PredictRequest(name=model, features=request["features"]))
+        elif target == "grpc_train":
+            from app.tensors import to_params, to_tensor
+
+            await self.stub.TrainModel(model_service_pb2.TrainRequest(
+                name=model,
+                typed_params=to_params(request["params"]),
+                X=to_tensor(np.asarray(request["data"]["X"])),
+                y=to_tensor(np.asarray(request["data"]["y"])),
+            ))
+        else:
+            raise ValueError(f"gRPC client cannot send {target}")
+
+    async def close(self):
+        await self.channel.close()
+
+
+class Client:
+    """Направляет grpc_* запросы в gRPC, остальные — в REST."""
+
+    def __init__(self, base_url: str = None, grpc_target: str = None):
+        self.rest = RestClient(base_url) if base_url else None
+        self.grpc = GrpcClient(grpc_target) if grpc_target else None
+
+    async def start(self):
+        for client in (self.rest, self.grpc):
+            if client:
+                await client.start()
+
+    async def send(self, request):
+        client = self.grpc if request["target"].startswith("grpc_") else self.rest
+        if client is None:
+            raise ValueError(f"No endpoint configured for {request['target']}")
+        await client.send(request)
+
+    async def close(self):
+        for client in (self.rest, self.grpc):
+            if client:
+                await client.close()
@@ -0,0 +1,104 @@
+# bench/stack.py
+"""
+Локальный стенд для нагрузки: moto вместо Minio, файловый MLflow,
+REST (uvicorn) и gRPC сервер в этом же процессе.
+
+Модули app читают окружение при импорте, поэтому app импортируется
+только после того, как стенд выставил переменные.
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+
+class Stack:
+    def __init__(self, base_url: str, grpc_target: str, n_features: int):
+        self.base_url = base_url
+        self.grpc_target = grpc_target
+        self.n_features = n_features
+
+    def seed(self):
+        """Кладёт в хранилище модели forest и logreg под n_features признаков."""
+        seed_models(self.n_features)
+
+
+def seed_models(n_features: int = 4, rows: int = 1000, seed: int = 0):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from app.model_cache import model_cache
+    from app.storage import get_storage
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, n_features))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    storage = get_storage()
+    for name, model in (
+        ("forest", RandomForestClassifier(n_estimators=50, max_depth=8, random_state=0)),
+        ("logreg", LogisticRegression(max_iter=200)),
+    ):
+        storage.save(name, model.fit(X, y))
+        model_cache.invalidate(name)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def local_stack(workdir: str = None, n_features: int = 4, timeout: float = 60):
+    """Поднимает стенд, засевает модели и ждёт готовности REST."""
+    import httpx
+    import uvicorn
+    from moto.server import ThreadedMotoServer
+
+    with tempfile.TemporaryDirectory(prefix="mlops-bench-") as tmp:
+        workdir = workdir or tmp
+        moto = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+        moto.start()
+        host, port = moto.get_host_and_port()
+        os.environ.update(
+            MINIO_ENDPOINT=f"http://{host}:{port}",
+            MINIO_ACCESS_KEY="testing",
+            MINIO_SECRET_KEY="testing",
+            AWS_DEFAULT_REGION="us-east-1",
+            MLFLOW_TRACKING_URI=f"file://{os.path.abspath(workdir)}/mlruns",
+            MODEL_FILE_CACHE_DIR=os.path.join(workdir, "models"),
+        )
+        seed_models(n_features)
+
+        from app.api import app
+        from app.grpc_server import create_server
+
+        rest = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=_free_port(), log_level="warning"
+        ))
+        rest_thread = threading.Thread(target=rest.run, name="bench-rest", daemon=True)
+        rest_thread.start()
+        grpc_server, grpc_port = create_server("127.0.0.1:0")
+        grpc_server.start()
+
+        base_url = f"http://127.0.0.1:{rest.config.port}"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if httpx.get(f"{base_url}/ready").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError("Local stack did not become ready")
+            time.sleep(0.1)
+
+        try:
+            yield Stack(base_url, f"127.0.0.1:{grpc_port}", n_features)
+        finally:
+            grpc_server.stop(0)
+            rest.should_exit = True
+            rest_thread.join(timeout=10)
+            moto.stop()
@@ -0,0 +1,50 @@
+# bench/workload.py
+"""
+Потоки запросов для нагрузки: синтетические или записанные в JSONL.
+
+Запрос — словарь {"target": ..., "model": ..., ...}:
+    predict, grpc_predict   — "features": одна строка признаков
+    predict_batch           — "features": список строк, "proba"
+    train, grpc_train       — "params", "data": {"X", "y"}
+"""
+import json
+import numpy as np
+
+TARGETS = ("predict", "predict_batch", "train", "grpc_predict", "grpc_train")
+
+
+def synthetic(target: str, n: int, model: str = "forest", n_features: int = 4,
+              batch_rows: int = 256, train_rows: int = 200, seed: int = 0):
+    """Генерирует n запросов к target со случайными признаками."""
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target {target}, expected one of {TARGETS}")
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        request = {"target": target, "model": model}
+        if target in ("predict", "grpc_predict"):
+            request["features"] = rng.normal(size=n_features).round(4).tolist()
+        elif target == "predict_batch":
+            request["features"] = rng.normal(size=(batch_rows, n_features)).round(4).tolist()
+            request["proba"] = True
+        else:
+            X = rng.normal(size=(train_rows, n_features)).round(4)
+            request["params"] = {"n_estimators": 10, "max_depth": 5} if model == "forest" else {"max_iter": 200}
+            request["data"] = {"X": X.tolist(), "y": (X[:, 0] > 0).astype(int).tolist()}
+        yield request
+
+
+def load(path: str):
+    """Читает записанный поток запросов (JSONL, по запросу в строке)."""
+    with open(path) as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    unknown = {r["target"] for r in requests} - set(TARGETS)
+    if unknown:
+        raise ValueError(f"Unknown targets in {path}: {sorted(unknown)}")
+    return requests
+
+
+def save(path: str, requests):
+    """Записывает поток запросов в JSONL для повторного проигрывания."""
+    with open(path, "w") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
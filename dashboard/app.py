@@ -87,7 +87,7 @@ st.markdown("### Обучение модели")
 
 col_model, col_ds = st.columns(2)
 with col_model:
-    model_type = st.selectbox("Тип модели", ["forest", "logreg"])
+    model_type = st.selectbox("Тип модели", ["forest", "logreg", "sgd"])
 with col_ds:
     dataset_name_train = st.text_input("Имя датасета из DVC", value="data")
 
@@ -96,12 +96,17 @@ with col_p1:
     if model_type == "forest":
         n_estimators = st.number_input("n_estimators", value=100, min_value=1)
         max_depth = st.number_input("max_depth (None = без ограничения)", value=None, min_value=1)
+    elif model_type == "sgd":
+        chunk_rows = st.number_input("chunk_rows (строк в порции)", value=50000, min_value=1)
+        epochs = st.number_input("epochs", value=1, min_value=1)
     else:
         max_iter = st.number_input("max_iter", value=100, min_value=1)
 
 with col_p2:
     if model_type == "logreg":
         C = st.number_input("C (регуляризация)", value=1.0, min_value=0.0001, format="%.6f")
+    elif model_type == "sgd":
+        alpha = st.number_input("alpha (регуляризация)", value=0.0001, min_value=0.0, format="%.6f")
 
 if st.button("Обучить модель", type="primary"):
     if not token:
@@ -113,6 +118,10 @@ if st.button("Обучить модель", type="primary"):
                 params["n_estimators"] = int(n_estimators)
                 if max_depth is not None:
                     params["max_depth"] = int(max_depth)
+            elif model_type == "sgd":
+                params["chunk_rows"] = int(chunk_rows)
+                params["epochs"] = int(epochs)
+                params["alpha"] = float(alpha)
             else:
                 params["max_iter"] = int(max_iter)
                 params["C"] = float(C)
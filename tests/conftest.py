@@ -0,0 +1,100 @@
+"""
+Общие фикстуры: мокнутое хранилище с моделью, сервер moto и gRPC сервер
+в процессе.
+"""
+import grpc
+import numpy as np
+import pytest
+import requests
+from moto import mock_aws
+from sklearn.ensemble import RandomForestClassifier
+from app import model_service_pb2_grpc
+
+X_TRAIN = np.array([
+    [5.1, 3.5, 1.4, 0.2],
+    [4.9, 3.0, 1.4, 0.2],
+    [7.0, 3.2, 4.7, 1.4],
+    [6.4, 3.2, 4.5, 1.5],
+])
+Y_TRAIN = np.array([0, 0, 1, 1])
+
+
+@pytest.fixture(autouse=True)
+def mlflow_spool(monkeypatch, tmp_path):
+    """Буфер фонового логгера MLflow — во временном каталоге теста."""
+    from app.tracking import tracker
+    monkeypatch.setattr(tracker, "spool_dir", str(tmp_path / "mlflow-spool"))
+    yield
+    tracker.flush(10)
+
+
+@pytest.fixture(autouse=True)
+def model_file_cache(monkeypatch, tmp_path):
+    """Дисковый кэш артефактов — свой у каждого теста, а не общий /tmp/mlops-models."""
+    monkeypatch.setattr("app.storage.MODEL_FILE_CACHE_DIR", str(tmp_path / "model-files"))
+
+
+@pytest.fixture
+def forest():
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X_TRAIN, Y_TRAIN)
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path, forest):
+    """Мокнутый S3 с сохранённой моделью forest и файловый MLflow."""
+    monkeypatch.setenv("MINIO_ENDPOINT", "https://s3.amazonaws.com")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path}/mlruns")
+    with mock_aws():
+        from app.model_cache import model_cache
+        from app.storage import get_storage, reset_storage
+        reset_storage()
+        model_cache.clear()
+        from app.tracking import tracker
+        get_storage().save("forest", forest)
+        yield get_storage()
+        # Фоновый логгер дописывает запуски, пока S3 ещё мокнут
+        tracker.flush(10)
+        model_cache.clear()
+        reset_storage()
+
+
+@pytest.fixture(scope="session")
+def moto_url():
+    """Сервер moto: aiohttp (AsyncStorage) не перехватывается mock_aws."""
+    from moto.server import ThreadedMotoServer
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def moto_s3(moto_url, monkeypatch):
+    """Пустой S3 на сервере moto для Storage и AsyncStorage."""
+    requests.post(f"{moto_url}/moto-api/reset")
+    monkeypatch.setenv("MINIO_ENDPOINT", moto_url)
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    from app import async_storage
+    from app.model_cache import model_cache
+    from app.storage import reset_storage
+    reset_storage()
+    model_cache.clear()
+    yield moto_url
+    model_cache.clear()
+    reset_storage()
+    async_storage._storages.clear()
+    async_storage._locks.clear()
+
+
+@pytest.fixture
+def stub(storage):
+    """Синхронный gRPC сервер в процессе."""
+    from app.grpc_server import create_server
+    server, port = create_server("127.0.0.1:0")
+    server.start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    yield model_service_pb2_grpc.ModelServiceStub(channel)
+    channel.close()
+    server.stop(0)
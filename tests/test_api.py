@@ -56,6 +56,19 @@ def test_list_models(auth_headers):
     assert "logreg" in data["available_models"]
 
 
+def test_list_models_storage_unavailable(auth_headers, monkeypatch):
+    """Без хранилища /models/ отдаёт типы моделей и пустой список обученных."""
+    async def unavailable():
+        raise Exception("MinIO connection failed")
+
+    monkeypatch.setattr("app.api.get_async_storage", unavailable)
+    response = client.get("/models/", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert {"forest", "logreg"} <= set(data["available_models"])
+    assert data["models"] == []
+
+
 def test_train_model_forest(auth_headers):
     """Тест обучения RandomForest."""
     train_data = {
@@ -203,3 +216,68 @@ def test_unauthorized_access():
     """Тест доступа без токена."""
     response = client.get("/models/")
     assert response.status_code == 401
+
+
+def test_train_predict_flow_on_moto(moto_s3, monkeypatch, tmp_path):
+    """
+    Синхронный /train/ целиком без Minio: обучение в пуле процессов,
+    сохранение через AsyncStorage из потока задачи, затем предсказание,
+    версии, подбор, метрики и удаление.
+    """
+    import time
+    from app.jobs import JobManager
+    from app.preload import Readiness
+    pytest.importorskip("aiobotocore")
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path}/mlruns")
+    # Остановка приложения гасит очередь задач и прогрев: у теста свои
+    monkeypatch.setattr("app.api.job_manager", JobManager())
+    monkeypatch.setattr("app.api.readiness", Readiness())
+    saves = []
+    monkeypatch.setattr("app.storage.Storage.save", lambda *args: pytest.fail("sync save"))
+    from app.async_storage import AsyncStorage
+    original_save = AsyncStorage.save
+
+    async def spy_save(self, *args, **kwargs):
+        saves.append(args[0])
+        return await original_save(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncStorage, "save", spy_save)
+    data = {
+        "X": [[5.1, 3.5, 1.4, 0.2], [4.9, 3.0, 1.4, 0.2], [7.0, 3.2, 4.7, 1.4], [6.4, 3.2, 4.5, 1.5]] * 3,
+        "y": [0, 0, 1, 1] * 3,
+    }
+
+    with TestClient(app) as api:
+        api.headers["Authorization"] = f"Bearer {api.post('/token').json()['access_token']}"
+        for version in (1, 2):
+            response = api.post("/train/", json={"model_type": "forest", "params": {"n_estimators": 5}, "data": data})
+            assert response.status_code == 200
+            assert response.json() == {"model_id": "forest", "version": version, "status": "trained"}
+        assert saves == ["forest", "forest"]
+
+        response = api.post("/predict/forest", json={"features": [6.8, 3.1, 4.8, 1.5]})
+        assert response.status_code == 200
+        assert response.json()["prediction"] == 1
+        versions = api.get("/models/forest/versions").json()["versions"]
+        assert [v["version"] for v in versions] == [1, 2]
+        assert [m["name"] for m in api.get("/models/").json()["models"]] == ["forest"]
+
+        response = api.post("/search/", json={
+            "model_type": "logreg", "space": {"C": [0.1, 1.0]}, "cv": 2, "n_jobs": 1, "data": data,
+        })
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        deadline = time.monotonic() + 60
+        while api.get(f"/train/jobs/{job_id}").json()["status"] in ("queued", "running"):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        job = api.get(f"/train/jobs/{job_id}").json()
+        assert job["status"] == "succeeded", job["error"]
+        assert job["result"]["best_params"]["C"] in (0.1, 1.0)
+        assert saves == ["forest", "forest", "logreg"]
+
+        assert 'training_job_duration_seconds_count{model_type="forest",status="succeeded"}' in api.get("/metrics").text
+        assert api.delete("/delete/forest?version=1").status_code == 200
+        assert [v["version"] for v in api.get("/models/forest/versions").json()["versions"]] == [2]
+        assert api.delete("/delete/forest").status_code == 200
+        assert api.post("/predict/forest", json={"features": [6.8, 3.1, 4.8, 1.5]}).status_code == 404
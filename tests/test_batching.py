@@ -0,0 +1,88 @@
+"""
+Тесты для микробатчинга одиночных предсказаний.
+"""
+import asyncio
+import pytest
+from app.batching import MicroBatcher
+
+
+class CountingInfer:
+    """Подмена infer, запоминающая размеры пришедших батчей."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    async def __call__(self, model_id, X, proba=False, storage=None):
+        self.calls.append(len(X))
+        if self.error is not None:
+            raise self.error
+        return X.sum(axis=1), None, None
+
+
+def test_flush_on_max_batch_size():
+    """Полный батч сбрасывается сразу, каждый получает свою строку."""
+    infer = CountingInfer()
+    batcher = MicroBatcher(max_batch_size=4, max_wait_ms=10_000, infer=infer)
+    # Гистограммы общие на процесс — сравниваем приросты
+    batches, enqueued = batcher.batch_size.count, batcher.queue_depth.count
+
+    async def run():
+        rows = [[i, i] for i in range(4)]
+        return await asyncio.gather(*(batcher.predict("m", r) for r in rows))
+
+    results = asyncio.run(run())
+    assert results == [0, 2, 4, 6]
+    assert infer.calls == [4]
+    assert batcher.batch_size.count - batches == 1
+    assert batcher.queue_depth.count - enqueued == 4
+
+
+def test_flush_on_max_wait():
+    """Неполный батч сбрасывается по таймеру."""
+    infer = CountingInfer()
+    batcher = MicroBatcher(max_batch_size=100, max_wait_ms=10, infer=infer)
+
+    async def run():
+        return await asyncio.gather(*(batcher.predict("m", [1, i]) for i in range(3)))
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    assert infer.calls == [3]
+    assert batcher.pending == 0
+
+
+def test_rows_of_different_shape_are_not_mixed():
+    """Строки разной длины попадают в разные батчи."""
+    infer = CountingInfer()
+    batcher = MicroBatcher(max_batch_size=100, max_wait_ms=5, infer=infer)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.predict("m", [1, 1]),
+            batcher.predict("m", [1, 1, 1]),
+        )
+
+    assert asyncio.run(run()) == [2, 3]
+    assert sorted(infer.calls) == [1, 1]
+
+
+def test_errors_reach_every_caller():
+    """Ошибка модели возвращается всем запросам батча."""
+    batcher = MicroBatcher(max_batch_size=2, max_wait_ms=10_000, infer=CountingInfer(RuntimeError("boom")))
+
+    async def run():
+        return await asyncio.gather(
+            batcher.predict("m", [1.0]),
+            batcher.predict("m", [2.0]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_invalid_row_rejected_before_queueing():
+    batcher = MicroBatcher(infer=CountingInfer())
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.predict("m", [[1.0, 2.0]]))
+    assert batcher.pending == 0
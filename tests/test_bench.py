@@ -0,0 +1,118 @@
+"""
+Тесты для нагрузочного стенда: сводка, сравнение с baseline, проигрывание.
+"""
+import asyncio
+import time
+from bench import report, workload
+from bench.runner import Result, replay
+
+
+def test_summarize_percentiles_and_errors():
+    results = [Result("predict", i / 1000, None) for i in range(1, 101)]
+    results.append(Result("predict", 0.5, "HTTP 500"))
+    summary = report.summarize(results, wall_time=2.0, concurrency=4, rate=None)
+
+    assert summary["requests"] == 101
+    assert summary["errors"] == 1
+    assert summary["error_kinds"] == {"HTTP 500": 1}
+    assert summary["throughput_rps"] == 50.0
+    assert abs(summary["p50_ms"] - 50.5) < 1e-6
+    assert 99 < summary["p99_ms"] <= 100
+    assert summary["concurrency"] == 4
+
+
+def test_compare_flags_regressions():
+    base = {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_rps": 100.0,
+            "error_rate": 0.0, "concurrency": 8, "rate": None}
+    same = dict(base, p99_ms=33.0)
+    slow = dict(base, p95_ms=40.0, throughput_rps=50.0, error_rate=0.1)
+
+    assert report.compare({"predict": same}, {"predict": base}) == []
+    regressions = report.compare({"predict": slow}, {"predict": base})
+    assert len(regressions) == 3
+    assert any("p95_ms" in r for r in regressions)
+    # Другая нагрузка — сравнивать нечего
+    assert report.compare({"predict": dict(slow, concurrency=1)}, {"predict": base}) == []
+
+
+def test_replay_limits_concurrency():
+    in_flight = []
+    peak = []
+
+    async def send(request):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        if request["features"][0] > 10:
+            raise RuntimeError("boom")
+
+    requests = list(workload.synthetic("predict", 20, n_features=2))
+    requests[0]["features"][0] = 100
+    results, _ = asyncio.run(replay(requests, send, concurrency=3))
+
+    assert len(results) == 20
+    assert max(peak) == 3
+    assert [r.error for r in results].count("RuntimeError") == 1
+
+
+def test_replay_respects_rate():
+    async def send(request):
+        pass
+
+    requests = list(workload.synthetic("predict", 11))
+    start = time.perf_counter()
+    asyncio.run(replay(requests, send, concurrency=4, rate=100))
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_workload_roundtrip(tmp_path):
+    path = tmp_path / "stream.jsonl"
+    requests = list(workload.synthetic("grpc_train", 2, model="logreg", train_rows=10))
+    workload.save(path, requests)
+    assert workload.load(path) == requests
+
+
+def test_codec_benchmark(monkeypatch):
+    from bench import codecs
+    monkeypatch.delenv("MINIO_ENDPOINT", raising=False)
+    results = codecs.run(["gzip", "gzip:1"], trees=5, rows=200, n_features=4, repeats=1)
+    assert list(results) == ["none", "gzip", "gzip:1"]
+    assert results["none"]["ratio"] == 1.0
+    assert results["gzip"]["size_bytes"] < results["none"]["size_bytes"]
+    assert all(r["est_load_ms"] > r["load_ms"] > 0 for r in results.values())
+    assert "gzip:1" in codecs.format_table(results, 1000)
+
+
+def test_import_benchmark():
+    """Точки входа не тянут sklearn, pandas и boto3 при импорте."""
+    from bench import imports
+    results = {module: imports.measure(module, repeats=1) for module in ("app.api", "app.grpc_server")}
+    for result in results.values():
+        assert result["total_ms"] > 0
+        assert not {"sklearn", "scipy", "pandas", "boto3", "mlflow"} & set(result["packages"])
+    assert "fastapi" in results["app.api"]["packages"]
+    assert "app.api" in imports.format_table(results)
+
+
+def test_missing_baseline_fails_unless_allowed(tmp_path, monkeypatch):
+    """Прогон без baseline не проходит молча: код 2, если это явно не разрешено."""
+    from bench import __main__ as cli
+
+    async def fake_run(streams, base_url, grpc_target, args, stack=None):
+        summary = {"requests": 1, "errors": 0, "error_rate": 0.0, "throughput_rps": 10.0,
+                   "p50_ms": 1.0, "p95_ms": 1.0, "p99_ms": 1.0, "concurrency": 16, "rate": None}
+        return {scenario: summary for scenario in streams}
+
+    monkeypatch.setattr(cli, "run_scenarios", fake_run)
+
+    def run(scenarios, *flags):
+        return cli.main(["--url", "http://unused", "--scenarios", scenarios, "--requests", "1",
+                         "--baseline", str(tmp_path / "baseline.json"), *flags])
+
+    assert run("predict") == 2
+    assert run("predict", "--allow-missing-baseline") == 0
+    assert run("predict", "--update-baseline") == 0
+    assert run("predict") == 0
+    # Сценарий, которого нет в baseline, — тоже ошибка
+    assert run("predict,grpc_predict") == 2
@@ -0,0 +1,77 @@
+"""
+Тесты для сжатия артефактов моделей.
+"""
+import io
+from importlib.util import find_spec
+import numpy as np
+import pytest
+from app.codecs import CODECS, get_codec
+
+# Кодеки на необязательных пакетах пропускаются, если пакет не установлен
+OPTIONAL = {"zstd": "zstandard", "lz4": "lz4"}
+ALL_CODECS = [
+    pytest.param(name, marks=pytest.mark.skipif(
+        name in OPTIONAL and find_spec(OPTIONAL[name]) is None,
+        reason=f"{OPTIONAL.get(name)} not installed",
+    ))
+    for name in CODECS
+]
+
+
+@pytest.mark.parametrize("name", ALL_CODECS)
+def test_codec_roundtrip(name):
+    codec = get_codec(name)
+    data = np.arange(100_000).tobytes()
+    out = io.BytesIO()
+    with codec.writer(out) as f:
+        f.write(data)
+    assert not out.closed
+    if name != "none":
+        assert len(out.getvalue()) < len(data)
+    out.seek(0)
+    assert codec.reader(out).read() == data
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec("brotli")
+    assert get_codec("").name == "none"
+
+
+@pytest.mark.parametrize("fmt", ["pickle", "mmap"])
+@pytest.mark.parametrize("cached", [False, True])
+def test_compressed_artifact_roundtrip(storage, forest, monkeypatch, tmp_path, fmt, cached):
+    """Кодек пишется в метаданные и манифест, загрузка распаковывает поток."""
+    from app.disk_cache import DiskCache
+    monkeypatch.setattr("app.storage.MODEL_COMPRESSION", "gzip")
+    monkeypatch.setattr("app.storage.MODEL_ARTIFACT_FORMAT", fmt)
+    storage.disk_cache = DiskCache(str(tmp_path)) if cached else None
+
+    entry = storage.save("forest", forest)
+    head = storage.s3.head_object(Bucket="models", Key=entry["key"])
+    assert head["Metadata"]["codec"] == "gzip" and entry["codec"] == "gzip"
+
+    X = np.random.rand(20, 4)
+    loaded, etag = storage.load_with_etag("forest")
+    np.testing.assert_array_equal(loaded.predict(X), forest.predict(X))
+    if cached:
+        # В кэше лежит распакованный артефакт: повторная загрузка — 304 и mmap
+        [path] = tmp_path.glob("forest_*.art")
+        assert path.stat().st_size > entry["size"]
+        again, again_etag = storage.load_with_etag("forest")
+        assert again_etag == etag
+        np.testing.assert_array_equal(again.predict(X), forest.predict(X))
+
+
+def test_large_compressed_artifact_is_fetched_in_order(storage, monkeypatch):
+    """Сжатый объект из многих кусков распаковывается в исходном порядке."""
+    monkeypatch.setattr("app.storage.MODEL_COMPRESSION", "gzip")
+    storage.disk_cache = None
+    storage.multipart_threshold = storage.chunk_size = 64 * 1024
+    weights = np.random.default_rng(0).integers(0, 16, size=400_000)
+
+    storage.save("forest", {"weights": weights})
+    calls = []
+    storage.s3.meta.events.register("before-call.s3.GetObject", lambda **kwargs: calls.append(1))
+    np.testing.assert_array_equal(storage.load("forest")["weights"], weights)
+    assert len(calls) > 3
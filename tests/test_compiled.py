@@ -0,0 +1,91 @@
+"""
+Тесты для скомпилированного инференса.
+"""
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from app.compiled import CompiledForest, CompiledLogReg, CompiledModel, compile_model
+
+
+@pytest.fixture(scope="module")
+def data():
+    X, y = make_classification(400, 8, n_informative=5, n_classes=3, random_state=0)
+    return X, y
+
+
+@pytest.mark.parametrize("make_model", [
+    lambda: RandomForestClassifier(n_estimators=20, random_state=0),
+    lambda: RandomForestClassifier(n_estimators=10, max_depth=3, random_state=0),
+    lambda: LogisticRegression(max_iter=500),
+    lambda: LogisticRegression(solver="liblinear"),
+])
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_compiled_matches_sklearn(data, make_model, n_classes):
+    """Скомпилированная модель отвечает так же, как sklearn."""
+    X, y = data
+    y = y % n_classes
+    try:
+        model = make_model().fit(X, y)
+    except ValueError as e:
+        # liblinear в новых sklearn не поддерживает мультикласс
+        pytest.skip(str(e))
+    compiled = compile_model(model)
+    assert isinstance(compiled, (CompiledForest, CompiledLogReg))
+
+    X_test = np.random.default_rng(1).normal(size=(100, X.shape[1]))
+    np.testing.assert_array_equal(compiled.predict(X_test), model.predict(X_test))
+    np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(X_test), atol=1e-9)
+    np.testing.assert_array_equal(compiled.predict(X_test[:1]), model.predict(X_test[:1]))
+    np.testing.assert_array_equal(compiled.classes_, model.classes_)
+
+
+@pytest.mark.parametrize("multi_class", ["auto", "deprecated", None])
+def test_logreg_scheme_follows_fitted_model(data, multi_class):
+    """Softmax или one-vs-rest решают классы и решатель модели, а не значение multi_class."""
+    X, y = data
+    model = LogisticRegression(max_iter=500).fit(X, y)
+    model.multi_class = multi_class
+    assert not CompiledLogReg(model).ovr
+    model.solver = "liblinear"
+    assert CompiledLogReg(model).ovr
+
+
+def test_large_batches_fall_back_to_sklearn(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    compiled = CompiledForest(model, max_rows=10)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_forest_keeps_only_leaf_probabilities(data):
+    """Вероятности хранятся только для листьев: узлы дерева уже есть у исходной модели."""
+    X, y = data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    compiled = CompiledForest(model)
+    n_leaves = sum(e.tree_.n_leaves for e in model.estimators_)
+    assert compiled.proba.shape == (n_leaves, 3)
+    assert len(compiled.left) == sum(e.tree_.node_count for e in model.estimators_)
+
+
+def test_unsupported_model_is_returned_as_is(data):
+    X, y = data
+    model = DecisionTreeClassifier().fit(X, y)
+    assert compile_model(model) is model
+
+
+def test_failed_parity_keeps_sklearn(data, monkeypatch):
+    X, y = data
+    model = LogisticRegression(max_iter=500).fit(X, y)
+    monkeypatch.setattr("app.compiled.check_parity", lambda compiled: False)
+    assert compile_model(model) is model
+
+
+def test_wrong_feature_count_rejected(data):
+    X, y = data
+    compiled = compile_model(LogisticRegression(max_iter=500).fit(X, y))
+    assert isinstance(compiled, CompiledModel)
+    with pytest.raises(ValueError):
+        compiled.predict([[1.0, 2.0]])
@@ -0,0 +1,140 @@
+"""
+Тесты загрузки датасетов: разбор CSV, кэш по md5 из DVC и обучение на датасете.
+"""
+import os
+import numpy as np
+import pytest
+from app import datasets
+
+CSV = "a,b,target\n1,2,0\n3,4,1\n5,6,0\n7,8,1\n"
+
+
+@pytest.fixture
+def dataset_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(datasets, "DATASETS_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setattr(datasets, "DATASET_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "datasets").mkdir()
+    datasets.clear_memory_cache()
+    yield tmp_path / "datasets"
+    datasets.clear_memory_cache()
+
+
+def write_dvc(path, md5):
+    path.with_name(path.name + ".dvc").write_text(
+        f"outs:\n- md5: {md5}\n  size: {path.stat().st_size}\n  hash: md5\n  path: {path.name}\n"
+    )
+
+
+def test_load_splits_target(dataset_dir):
+    (dataset_dir / "data.csv").write_text(CSV)
+    X, y = datasets.load_dataset("data")
+    np.testing.assert_array_equal(X, [[1, 2], [3, 4], [5, 6], [7, 8]])
+    np.testing.assert_array_equal(y, [0, 1, 0, 1])
+    assert X.dtype == np.float64
+
+
+def test_missing_target(dataset_dir):
+    (dataset_dir / "data.csv").write_text("a,b\n1,2\n")
+    with pytest.raises(ValueError, match="target"):
+        datasets.load_dataset("data.csv")
+
+
+def test_cache_keyed_by_dvc_md5(dataset_dir, monkeypatch):
+    path = dataset_dir / "data.csv"
+    path.write_text(CSV)
+    write_dvc(path, "0123456789abcdef0123456789abcdef")
+    first = datasets.load_dataset("data")
+    assert (dataset_dir.parent / "cache" / "0123456789abcdef0123456789abcdef.X.npy").exists()
+    # Из памяти — тот же объект, CSV не разбирается
+    monkeypatch.setattr(datasets, "parse_csv", lambda path: pytest.fail("CSV parsed again"))
+    assert datasets.load_dataset("data") is first
+
+    # Новый процесс: только дисковый кэш, X отображается через mmap
+    datasets.clear_memory_cache()
+    X, y = datasets.load_dataset("data")
+    assert isinstance(X, np.memmap)
+    np.testing.assert_array_equal(X, first[0])
+    np.testing.assert_array_equal(y, first[1])
+
+
+def test_memory_cache_evicts_least_recently_used(dataset_dir, monkeypatch):
+    """Часто читаемый датасет переживает вытеснение, уходит давно не читанный."""
+    monkeypatch.setattr(datasets, "DATASET_MEMORY_CACHE_SIZE", 2)
+    monkeypatch.setattr(datasets, "DATASET_CACHE_DIR", "")
+    for i, name in enumerate(("hot", "cold", "new")):
+        (dataset_dir / f"{name}.csv").write_text(CSV + f"{i},{i},1\n")
+    hot = datasets.load_dataset("hot")
+    datasets.load_dataset("cold")
+    assert datasets.load_dataset("hot") is hot
+    datasets.load_dataset("new")
+
+    parsed = []
+    monkeypatch.setattr(datasets, "parse_csv", lambda path: parsed.append(os.path.basename(path)) or hot)
+    assert datasets.load_dataset("hot") is hot
+    datasets.load_dataset("cold")
+    assert parsed == ["cold.csv"]
+
+
+def test_rewritten_csv_is_reparsed(dataset_dir):
+    """CSV новее .dvc-файла: md5 считается по содержимому, старый кэш не используется."""
+    path = dataset_dir / "data.csv"
+    path.write_text(CSV)
+    write_dvc(path, "0123456789abcdef0123456789abcdef")
+    datasets.load_dataset("data")
+    path.write_text("a,target\n9,1\n")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    X, y = datasets.load_dataset("data")
+    np.testing.assert_array_equal(X, [[9]])
+
+
+def test_missing_dataset(dataset_dir, monkeypatch):
+    monkeypatch.setattr(datasets, "DVC_CWD", str(dataset_dir.parent))
+    monkeypatch.setattr(datasets.subprocess, "run", lambda *a, **kw: (_ for _ in ()).throw(FileNotFoundError()))
+    with pytest.raises(datasets.DatasetNotFoundError):
+        datasets.load_dataset("missing")
+
+
+def test_train_uses_passed_data(dataset_dir):
+    """train обучает на переданных X, y, а без них — на датасете по имени."""
+    from app.models import ModelTrainer
+    (dataset_dir / "data.csv").write_text(CSV)
+    trainer = ModelTrainer()
+
+    X = np.array([[0.0], [1.0], [2.0], [3.0]])
+    model = trainer.train("logreg", X, np.array([0, 0, 1, 1]))
+    assert model.n_features_in_ == 1
+    assert "load_dataset" not in trainer.stage_timings
+
+    model = trainer.train("logreg", dataset_name="data")
+    assert model.n_features_in_ == 2
+    assert trainer.stage_timings["load_dataset"] >= 0
+
+
+def test_iter_chunks(dataset_dir):
+    (dataset_dir / "data.csv").write_text(CSV)
+    chunks = list(datasets.iter_chunks("data", 3))
+    assert [len(y) for _, y in chunks] == [3, 1]
+    np.testing.assert_array_equal(chunks[1][0], [[7, 8]])
+    np.testing.assert_array_equal(datasets.dataset_classes("data", 3), [0, 1])
+
+
+def test_streaming_sgd(dataset_dir, monkeypatch):
+    """sgd обучается порциями через partial_fit, не загружая датасет целиком."""
+    from app.models import ModelTrainer
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 3))
+    y = np.where(X[:, 0] > 0, 2, 5)
+    rows = "\n".join(f"{a},{b},{c},{t}" for (a, b, c), t in zip(X, y))
+    (dataset_dir / "big.csv").write_text(f"a,b,c,target\n{rows}\n")
+    monkeypatch.setattr(datasets, "load_dataset", lambda name: pytest.fail("dataset loaded whole"))
+
+    trainer = ModelTrainer()
+    model = trainer.train("sgd", dataset_name="big", chunk_rows=100, epochs=2, random_state=0)
+    np.testing.assert_array_equal(model.classes_, [2, 5])
+    assert trainer.metrics["accuracy"] > 0.9
+    assert model.predict_proba(X[:2]).shape == (2, 2)
+
+    assert trainer.run.params["rows"] == "500"
+    assert trainer.run.params["chunks"] == "10"
+    steps = [step for key, _, _, step in trainer.run.metrics if key == "chunk_rows_per_sec"]
+    assert steps == list(range(10))
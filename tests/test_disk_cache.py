@@ -0,0 +1,70 @@
+"""
+Тесты для локального дискового кэша артефактов.
+"""
+import os
+import time
+from app.disk_cache import DiskCache
+
+
+def _put(cache, key, etag, size):
+    return cache.put(key, etag, [b"x" * size])
+
+
+def test_put_and_lookup(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    assert cache.lookup("forest.pkl") == (None, None)
+
+    path = _put(cache, "forest.pkl", '"abc"', 10)
+    assert cache.lookup("forest.pkl") == (path, '"abc"')
+    assert not list(tmp_path.glob("*.tmp"))
+
+    # Новая версия вытесняет старую
+    new_path = _put(cache, "forest.pkl", '"def"', 10)
+    assert cache.lookup("forest.pkl") == (new_path, '"def"')
+    assert not os.path.exists(path)
+
+
+def test_lookup_does_not_match_key_prefix(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    _put(cache, "forest-big.pkl", '"1"', 1)
+    assert cache.lookup("forest") == (None, None)
+
+
+def test_distinct_keys_do_not_collide(tmp_path):
+    """Ключи, совпадающие после замены "/" на "_", хранятся в разных файлах."""
+    cache = DiskCache(str(tmp_path))
+    nested = _put(cache, "a/b.pkl", '"1"', 1)
+    flat = _put(cache, "a_b.pkl", '"2"', 2)
+    assert nested != flat
+    assert cache.lookup("a/b.pkl") == (nested, '"1"')
+    assert cache.lookup("a_b.pkl") == (flat, '"2"')
+
+
+def test_lru_eviction_by_bytes(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    a = _put(cache, "a", '"1"', 100)
+    b = _put(cache, "b", '"1"', 100)
+    # Обращение к a делает b самым давним
+    past = time.time() - 60
+    os.utime(b, (past, past))
+    cache.touch(a)
+
+    c = _put(cache, "c", '"1"', 100)
+    assert os.path.exists(a) and os.path.exists(c)
+    assert not os.path.exists(b)
+    assert cache.size() <= 250
+
+
+def test_new_file_is_kept_even_over_budget(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=50)
+    path = _put(cache, "big", '"1"', 100)
+    assert os.path.exists(path)
+
+
+def test_stale_temp_files_are_cleaned(tmp_path):
+    stale = tmp_path / "x.art.123.tmp"
+    stale.write_bytes(b"partial")
+    past = time.time() - 2 * 3600
+    os.utime(stale, (past, past))
+    DiskCache(str(tmp_path)).evict()
+    assert not stale.exists()
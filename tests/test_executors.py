@@ -0,0 +1,61 @@
+"""
+Тесты для пулов исполнения и асинхронных подпроцессов.
+"""
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app import executors
+from app.executors import run_command, run_io
+
+
+def test_run_io_runs_outside_event_loop_thread():
+    async def run():
+        return await run_io(threading.current_thread)
+
+    assert asyncio.run(run()) is not threading.main_thread()
+
+
+def test_run_command_captures_output():
+    """run_command возвращает CompletedProcess, как subprocess.run."""
+    result = asyncio.run(run_command(sys.executable, "-c", "print('ok')", cwd="."))
+    assert result.returncode == 0
+    assert result.stdout.strip() == "ok"
+
+    result = asyncio.run(run_command(sys.executable, "-c", "import sys; sys.exit(3)", cwd="."))
+    assert result.returncode == 3
+
+
+def test_slow_command_does_not_block_loop():
+    """Пока идёт подпроцесс, event loop обслуживает другие корутины."""
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await run_command(sys.executable, "-c", "import time; time.sleep(0.3)", cwd=".")
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 10
+
+
+def test_broken_process_pool_is_replaced(monkeypatch):
+    """Умерший процесс обучения роняет свою задачу, но не следующие."""
+    monkeypatch.setattr(executors, "TRAIN_PROCESSES", 1)
+    monkeypatch.delitem(executors._pools, "training", raising=False)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            executors.submit_to("training", os._exit, 1).result(timeout=60)
+        broken = executors._pools["training"]
+        assert executors.submit_to("training", os.getpid).result(timeout=60) != os.getpid()
+        assert executors._pools["training"] is not broken
+    finally:
+        executors._pools.pop("training").shutdown()
@@ -0,0 +1,179 @@
+"""
+Тесты для пакетного и потокового предсказания через gRPC.
+"""
+import asyncio
+import time
+import grpc
+import numpy as np
+import pytest
+from app import model_service_pb2, model_service_pb2_grpc
+from app.upload import train_chunks
+
+ROWS = np.array([[5.5, 3.0, 1.5, 0.3], [6.8, 3.1, 4.8, 1.5], [5.0, 3.4, 1.5, 0.2]])
+
+
+def _batch(rows, **kwargs):
+    return model_service_pb2.PredictBatchRequest(
+        features=np.asarray(rows).ravel(), rows=len(rows), cols=len(rows[0]), **kwargs
+    )
+
+
+def test_predict_batch(stub, forest):
+    response = stub.PredictBatch(_batch(ROWS, name="forest", proba=True))
+    assert response.rows == 3
+    assert list(response.predictions) == forest.predict(ROWS).tolist()
+    probabilities = np.array(response.probabilities).reshape(response.rows, -1)
+    np.testing.assert_array_equal(probabilities, forest.predict_proba(ROWS))
+    assert list(response.classes) == [0, 1]
+
+
+def test_predict_batch_double_precision(stub, storage):
+    """Признаки и вероятности идут в double: ответ совпадает с REST и sklearn бит в бит."""
+    from sklearn.linear_model import LogisticRegression
+    logreg = LogisticRegression().fit(ROWS, [0, 1, 0])
+    storage.save("logreg", logreg)
+    rows = ROWS + 1e-9
+    response = stub.PredictBatch(_batch(rows, name="logreg", proba=True))
+    probabilities = np.array(response.probabilities).reshape(response.rows, -1)
+    np.testing.assert_array_equal(probabilities, logreg.predict_proba(rows))
+
+
+def test_predict_batch_string_labels(stub, storage):
+    """Строковые метки классов приходят в prediction_labels и class_labels."""
+    from sklearn.ensemble import RandomForestClassifier
+    labelled = RandomForestClassifier(n_estimators=5, random_state=0).fit(ROWS, ["a", "b", "a"])
+    storage.save("labelled", labelled)
+    response = stub.PredictBatch(_batch(ROWS, name="labelled", proba=True))
+    assert list(response.prediction_labels) == labelled.predict(ROWS).tolist()
+    assert list(response.class_labels) == ["a", "b"]
+    assert not response.predictions and not response.classes
+
+
+def test_predict_batch_errors(stub):
+    with pytest.raises(grpc.RpcError) as e:
+        stub.PredictBatch(_batch(ROWS, name="missing"))
+    assert e.value.code() == grpc.StatusCode.NOT_FOUND
+
+    bad = _batch(ROWS, name="forest")
+    bad.cols = 5
+    with pytest.raises(grpc.RpcError) as e:
+        stub.PredictBatch(bad)
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_predict_errors_match_aio(stub, forest, monkeypatch):
+    """Синхронный Predict идёт через тот же инференс и те же коды ошибок, что и aio."""
+    from app.compiled import CompiledModel
+    seen = []
+    original = CompiledModel.predict
+    monkeypatch.setattr(CompiledModel, "predict", lambda self, X: seen.append(X.shape) or original(self, X))
+    assert stub.Predict(model_service_pb2.PredictRequest(name="forest", features=ROWS[1])).pred == 1
+    assert seen == [(1, 4)]
+
+    with pytest.raises(grpc.RpcError) as e:
+        stub.Predict(model_service_pb2.PredictRequest(name="missing", features=ROWS[1]))
+    assert e.value.code() == grpc.StatusCode.NOT_FOUND
+    with pytest.raises(grpc.RpcError) as e:
+        stub.Predict(model_service_pb2.PredictRequest(name="forest", features=[1.0, 2.0]))
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_predict_stream(stub, forest):
+    """Ответы приходят на каждую порцию строк, по порядку, с тем же request_id."""
+    chunks = [ROWS[:1], ROWS[1:], ROWS]
+
+    def requests():
+        for i, chunk in enumerate(chunks):
+            yield _batch(chunk, name="forest" if i == 0 else "", request_id=i)
+
+    responses = list(stub.PredictStream(requests()))
+    assert [r.request_id for r in responses] == [0, 1, 2]
+    for chunk, response in zip(chunks, responses):
+        assert list(response.predictions) == forest.predict(chunk).tolist()
+
+
+def test_aio_server(storage, forest, monkeypatch):
+    """grpc.aio: предсказания отвечают, пока идёт долгое обучение."""
+    import app.grpc_server as grpc_server
+
+    def slow_training(job, *args):
+        time.sleep(1.0)
+        return "forest.pkl"
+
+    monkeypatch.setattr(grpc_server, "train_and_save", slow_training)
+
+    async def run():
+        server, port = await grpc_server.create_aio_server("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = model_service_pb2_grpc.ModelServiceStub(channel)
+                training = asyncio.ensure_future(
+                    stub.TrainModel(model_service_pb2.TrainRequest(name="forest"))
+                )
+                started = time.perf_counter()
+                single = await stub.Predict(model_service_pb2.PredictRequest(name="forest", features=ROWS[1]))
+                batch = await stub.PredictBatch(_batch(ROWS, name="forest"))
+                stream = [r async for r in stub.PredictStream(iter([_batch(ROWS, name="forest")]))]
+                predict_time = time.perf_counter() - started
+                with pytest.raises(grpc.RpcError) as e:
+                    await stub.PredictBatch(_batch(ROWS, name="missing"))
+                trained = await training
+                streamed = await stub.TrainModelStream(train_chunks("forest", ROWS, [0, 1, 0]))
+            return single, batch, stream, predict_time, e.value.code(), trained, streamed
+        finally:
+            await server.stop(0)
+
+    single, batch, stream, predict_time, missing_code, trained, streamed = asyncio.run(run())
+    assert single.pred == forest.predict(ROWS[1:2])[0]
+    assert list(batch.predictions) == forest.predict(ROWS).tolist()
+    assert list(stream[0].predictions) == forest.predict(ROWS).tolist()
+    assert predict_time < 1.0
+    assert missing_code == grpc.StatusCode.NOT_FOUND
+    assert trained.status == "ok"
+    assert streamed.status == "ok"
+
+
+def test_aio_search_and_list_status(storage):
+    """grpc.aio: SearchModel и ListModels выставляют статус из event loop, а не из потока."""
+    import app.grpc_server as grpc_server
+
+    async def run():
+        server, port = await grpc_server.create_aio_server("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = model_service_pb2_grpc.ModelServiceStub(channel)
+                listed = await stub.ListModels(model_service_pb2.ListRequest())
+                with pytest.raises(grpc.RpcError) as e:
+                    await stub.SearchModel(model_service_pb2.SearchRequest(name="xgboost"))
+            return listed, e.value
+        finally:
+            await server.stop(0)
+
+    listed, error = asyncio.run(run())
+    assert [m.name for m in listed.trained] == ["forest"]
+    assert error.code() == grpc.StatusCode.INVALID_ARGUMENT
+    assert "xgboost" in error.details()
+
+
+def test_predict_pinned_version(stub, storage, forest):
+    """version выбирает версию из реестра; 0 — последняя."""
+    from sklearn.dummy import DummyClassifier
+    from app.model_cache import model_cache
+    storage.save("forest", DummyClassifier(strategy="constant", constant=1).fit(ROWS, [1, 0, 1]))
+    model_cache.invalidate("forest")
+    row = [5.1, 3.5, 1.4, 0.2]
+
+    assert stub.Predict(model_service_pb2.PredictRequest(name="forest", features=row)).pred == 1
+    pinned = stub.Predict(model_service_pb2.PredictRequest(name="forest", features=row, version=1))
+    assert pinned.pred == forest.predict([row])[0] == 0
+    response = stub.PredictBatch(_batch(ROWS, name="forest", version=1))
+    assert list(response.predictions) == forest.predict(ROWS).tolist()
+
+    with pytest.raises(grpc.RpcError) as e:
+        stub.PredictBatch(_batch(ROWS, name="forest", version=7))
+    assert e.value.code() == grpc.StatusCode.NOT_FOUND
+
+    listed = stub.ListModels(model_service_pb2.ListRequest())
+    assert [(m.name, m.version) for m in listed.trained] == [("forest", 2)]
@@ -0,0 +1,78 @@
+"""
+Тесты для векторизованного инференса и /predict_batch.
+"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.inference import predict_rows, to_matrix
+
+
+def test_predict_rows_chunked_matches_single_call(forest):
+    """Разбиение на куски не меняет результат."""
+    X = np.random.RandomState(0).uniform(4, 7, size=(101, 4))
+    predictions, probabilities = predict_rows(forest, X, proba=True, chunk_size=7)
+    np.testing.assert_array_equal(predictions, forest.predict(X))
+    np.testing.assert_allclose(probabilities, forest.predict_proba(X))
+
+
+def test_to_matrix_rejects_non_2d():
+    with pytest.raises(ValueError):
+        to_matrix([1.0, 2.0])
+    with pytest.raises(ValueError):
+        to_matrix([[1.0, 2.0], [3.0]])
+
+
+@pytest.fixture
+def api_client(moto_s3, forest):
+    """Клиент API с S3 на сервере moto и сохранённой моделью forest."""
+    from app.api import app
+    from app.storage import get_storage
+    pytest.importorskip("aiobotocore")
+    get_storage().save("forest", forest)
+    client = TestClient(app)
+    token = client.post("/token").json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_predict_batch(api_client, forest):
+    """Пакетное предсказание возвращает по результату на строку."""
+    rows = [[5.5, 3.0, 1.5, 0.3], [6.8, 3.1, 4.8, 1.5], [5.0, 3.4, 1.5, 0.2]]
+    response = api_client.post("/predict_batch/forest", json={"features": rows, "proba": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["predictions"] == forest.predict(rows).tolist()
+    assert np.allclose(data["probabilities"], forest.predict_proba(rows))
+    assert data["classes"] == [0, 1]
+
+
+def test_predict_batch_validation(api_client, monkeypatch):
+    """Неверная форма и превышение лимита отклоняются."""
+    response = api_client.post("/predict_batch/forest", json={"features": [1.0, 2.0]})
+    assert response.status_code == 422
+
+    monkeypatch.setattr("app.api.MAX_BATCH_SIZE", 2)
+    response = api_client.post("/predict_batch/forest", json={"features": [[1.0] * 4] * 3})
+    assert response.status_code == 413
+
+    response = api_client.post("/predict_batch/nonexistent", json={"features": [[1.0] * 4]})
+    assert response.status_code == 404
+
+
+def test_predict_batch_wrong_width(api_client):
+    """Число признаков не совпадает с моделью — 422, как у /predict."""
+    response = api_client.post("/predict_batch/forest", json={"features": [[1.0, 2.0]]})
+    assert response.status_code == 422
+    response = api_client.post("/predict/forest", json={"features": [1.0, 2.0]})
+    assert response.status_code == 422
+
+
+def test_predict_single_row(api_client, forest):
+    """Одиночное предсказание идёт через тот же кэш и пул инференса."""
+    features = [6.8, 3.1, 4.8, 1.5]
+    response = api_client.post("/predict/forest", json={"features": features})
+    assert response.status_code == 200
+    assert response.json()["prediction"] == int(forest.predict([features])[0])
+
+    response = api_client.post("/predict/nonexistent", json={"features": features})
+    assert response.status_code == 404
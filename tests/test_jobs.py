@@ -0,0 +1,223 @@
+"""
+Тесты для очереди задач обучения.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.jobs import CANCELLED, FAILED, SUCCEEDED, JobManager
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while job.status not in (SUCCEEDED, FAILED, CANCELLED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_lifecycle():
+    """Задача проходит очередь, получает прогресс и ключ модели."""
+    manager = JobManager(max_workers=1)
+
+    def fake_train(job, value):
+        job.update("training", 0.5)
+        return f"{job.model_type}-{value}.pkl"
+
+    job = wait_for(manager.submit("forest", fake_train, 42))
+    assert job.status == SUCCEEDED
+    assert job.model_key == "forest-42.pkl"
+    assert job.progress == 1.0
+    assert job.duration is not None and job.duration >= 0
+    assert manager.get(job.job_id) is job
+    manager.shutdown()
+
+
+def test_failed_job_keeps_error():
+    manager = JobManager(max_workers=1)
+
+    def broken(job):
+        raise ValueError("Unknown model type: svm")
+
+    job = wait_for(manager.submit("svm", broken))
+    assert job.status == FAILED
+    assert "svm" in job.error
+    manager.shutdown()
+
+
+def test_only_queued_jobs_can_be_cancelled():
+    """Занятый воркер держит вторую задачу в очереди, её можно отменить."""
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+
+    def blocking(job):
+        release.wait(5)
+        return "done"
+
+    running = manager.submit("forest", blocking)
+    queued = manager.submit("logreg", blocking)
+    time.sleep(0.05)
+
+    assert manager.cancel(queued.job_id)
+    assert queued.status == CANCELLED
+    assert not manager.cancel(running.job_id)
+
+    release.set()
+    assert wait_for(running).status == SUCCEEDED
+    manager.shutdown()
+
+
+def test_dropped_waiter_keeps_job(busy_manager):
+    """Ушедший клиент синхронного запроса не отменяет задачу в очереди."""
+    manager, release = busy_manager
+    queued = manager.submit("logreg", lambda job: "logreg.pkl")
+
+    async def drop_waiter():
+        waiter = asyncio.ensure_future(queued.wait())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(drop_waiter())
+    assert not queued.future.cancelled()
+    release.set()
+    assert wait_for(queued).status == SUCCEEDED
+    assert queued.model_key == "logreg.pkl"
+
+
+def test_history_is_bounded():
+    manager = JobManager(max_workers=1, history=2)
+    jobs = [wait_for(manager.submit("forest", lambda job: "k")) for _ in range(4)]
+    manager.submit("forest", lambda job: "k")
+    assert len(manager.list()) <= 3
+    assert manager.get(jobs[-1].job_id) is not None
+    manager.shutdown()
+
+
+@pytest.fixture
+def api_client(monkeypatch):
+    from app.api import app
+    client = TestClient(app)
+    token = client.post("/token").json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_train_job_endpoints(api_client, monkeypatch):
+    """POST /train/jobs сразу возвращает id, статус опрашивается отдельно."""
+    release = threading.Event()
+
+    def fake_train_and_save(job, X, y, dataset_name, params):
+        release.wait(5)
+        return f"{job.model_type}.pkl"
+
+    monkeypatch.setattr("app.api.train_and_save", fake_train_and_save)
+    train_data = {"model_type": "forest", "params": {"n_estimators": 10}}
+
+    response = api_client.post("/train/jobs", json=train_data)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    response = api_client.get(f"/train/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] in ("queued", "running")
+
+    release.set()
+    from app.jobs import job_manager
+    wait_for(job_manager.get(job_id))
+    data = api_client.get(f"/train/jobs/{job_id}").json()
+    assert data["status"] == "succeeded"
+    assert data["model_key"] == "forest.pkl"
+
+    assert api_client.delete(f"/train/jobs/{job_id}").status_code == 409
+    assert api_client.get("/train/jobs/unknown").status_code == 404
+    assert job_id in [j["job_id"] for j in api_client.get("/train/jobs").json()["jobs"]]
+
+
+@pytest.fixture
+def busy_manager(monkeypatch):
+    """Очередь из одного воркера, занятого задачей до release.set()."""
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    manager.submit("forest", lambda job: release.wait(5))
+    yield manager, release
+    release.set()
+    manager.shutdown()
+
+
+def cancel_queued(manager, timeout=5.0):
+    """Отменяет задачу, которую поставил ожидающий её запрос."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        queued = [job for job in manager.list() if job.status == "queued"]
+        if queued:
+            assert manager.cancel(queued[0].job_id)
+            return
+        time.sleep(0.01)
+    pytest.fail("no queued job")
+
+
+def test_sync_train_cancelled_in_queue(api_client, busy_manager, monkeypatch):
+    """Синхронный /train/, чью задачу отменили в очереди, получает 409."""
+    manager, _ = busy_manager
+    monkeypatch.setattr("app.api.job_manager", manager)
+    monkeypatch.setattr("app.api.train_and_save", lambda *args: pytest.fail("cancelled job ran"))
+    response = {}
+    thread = threading.Thread(target=lambda: response.update(
+        r=api_client.post("/train/", json={"model_type": "forest", "params": {}})
+    ))
+    thread.start()
+    cancel_queued(manager)
+    thread.join(5)
+    assert response["r"].status_code == 409
+    assert "cancelled" in response["r"].json()["detail"]
+
+
+def test_sync_train_cancelled_in_queue_grpc(stub, busy_manager, monkeypatch):
+    """Синхронный TrainModel по gRPC, чью задачу отменили в очереди, получает CANCELLED."""
+    import grpc
+    from app import model_service_pb2
+    manager, _ = busy_manager
+    monkeypatch.setattr("app.grpc_server.job_manager", manager)
+    call = stub.TrainModel.future(model_service_pb2.TrainRequest(name="forest"))
+    cancel_queued(manager)
+    with pytest.raises(grpc.RpcError) as e:
+        call.result(timeout=5)
+    assert e.value.code() == grpc.StatusCode.CANCELLED
+
+
+def test_unknown_model_type_rejected(api_client, monkeypatch):
+    """Неизвестный тип модели отклоняется с 422 и не попадает в очередь."""
+    from app.jobs import job_manager
+    monkeypatch.setattr("app.api.train_and_save", lambda *args: pytest.fail("job queued"))
+    before = len(job_manager.list())
+    for path in ("/train/jobs", "/train/"):
+        response = api_client.post(path, json={"model_type": "xgboost", "params": {}})
+        assert response.status_code == 422
+        assert "xgboost" in response.json()["detail"]
+    response = api_client.post("/search/", json={"model_type": "xgboost", "space": {"C": [1.0]}})
+    assert response.status_code == 422
+    assert len(job_manager.list()) == before
+
+
+def test_unknown_model_type_rejected_grpc(stub, monkeypatch):
+    """gRPC отвечает INVALID_ARGUMENT и тоже не ставит задачу в очередь."""
+    import grpc
+    from app import model_service_pb2
+    from app.jobs import job_manager
+    from app.upload import train_chunks
+    monkeypatch.setattr("app.grpc_server.train_and_save", lambda *args: pytest.fail("job queued"))
+    before = len(job_manager.list())
+    calls = [
+        lambda: stub.TrainModel(model_service_pb2.TrainRequest(name="xgboost")),
+        lambda: stub.SubmitTrainJob(model_service_pb2.TrainRequest(name="xgboost")),
+        lambda: stub.TrainModelStream(train_chunks("xgboost", [[1.0]], [0])),
+        lambda: stub.SearchModel(model_service_pb2.SearchRequest(name="xgboost")),
+    ]
+    for call in calls:
+        with pytest.raises(grpc.RpcError) as e:
+            call()
+        assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert "xgboost" in e.value.details()
+    assert len(job_manager.list()) == before
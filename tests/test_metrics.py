@@ -0,0 +1,73 @@
+"""
+Тесты для метрик Prometheus.
+"""
+from fastapi.testclient import TestClient
+from app.metrics import CallbackMetric, Counter, Histogram, Registry, model_label, register_model
+
+
+def test_histogram_render():
+    """Корзины кумулятивные, есть _sum, _count и +Inf."""
+    registry = Registry()
+    hist = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0), registry=registry)
+    child = hist.labels("fetch")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="fetch",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="fetch"} 4' in text
+    assert child.count == 4
+
+
+def test_counter_and_callback():
+    registry = Registry()
+    counter = Counter("events_total", "Events", registry=registry)
+    counter.inc(3)
+    CallbackMetric("cache_entries", "Entries", lambda: 7, registry=registry)
+
+    text = registry.render()
+    assert "events_total 3" in text
+    assert "# TYPE cache_entries gauge" in text
+    assert "cache_entries 7" in text
+
+
+def test_label_values_escaped():
+    registry = Registry()
+    counter = Counter("errors_total", "Errors", ("model",), registry=registry)
+    counter.labels('a"b').inc()
+    assert 'errors_total{model="a\\"b"} 1' in registry.render()
+
+
+def test_metrics_endpoint():
+    """REST-запросы попадают в гистограмму с шаблоном маршрута и моделью."""
+    from app.api import app
+
+    register_model("forest")
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {client.post('/token').json()['access_token']}"
+    client.get("/health")
+    client.post("/predict_batch/forest", json={"features": []})
+    for i in range(3):
+        client.post(f"/predict_batch/bogus-{i}", json={"features": []})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'route="/health",model="",status="200"' in text
+    assert 'route="/predict_batch/{model_id}",model="forest",status="422"' in text
+    # Произвольные имена из запроса не создают новых серий
+    assert "bogus" not in text
+    assert 'route="/predict_batch/{model_id}",model="other",status="422"' in text
+    assert "model_cache_hits_total" in text
+    assert 'stage_duration_seconds_bucket{stage="inference"' in text
+
+
+def test_model_label_only_for_known_models():
+    register_model("logreg@3")
+    assert model_label("logreg") == "logreg"
+    assert model_label("") == ""
+    assert model_label("no-such-model") == "other"
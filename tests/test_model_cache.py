@@ -0,0 +1,192 @@
+"""
+Тесты для кэша моделей.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from app.model_cache import ModelCache
+
+
+class FakeStorage:
+    """Хранилище в памяти, считающее обращения к S3."""
+
+    def __init__(self, delay=0.0):
+        self.objects = {}
+        self.gets = 0
+        self.heads = 0
+        self.delay = delay
+
+    def put(self, name, model, etag):
+        self.objects[name] = (model, etag)
+
+    def load_with_etag(self, name):
+        self.gets += 1
+        time.sleep(self.delay)
+        return self.objects.get(name, (None, None))
+
+    def head(self, name, etag=None):
+        self.heads += 1
+        obj = self.objects.get(name)
+        return obj[1] if obj else None
+
+
+def test_cache_hit_skips_storage():
+    """Повторный запрос в пределах TTL не ходит в хранилище."""
+    storage = FakeStorage()
+    storage.put("forest", "model-v1", '"1"')
+    cache = ModelCache(max_size=2, ttl=60)
+
+    assert cache.get(storage, "forest") == "model-v1"
+    assert cache.get(storage, "forest") == "model-v1"
+    assert storage.gets == 1
+    assert storage.heads == 0
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_missing_model_returns_none():
+    """Отсутствующая модель не кэшируется."""
+    storage = FakeStorage()
+    cache = ModelCache(max_size=2, ttl=60)
+    assert cache.get(storage, "nonexistent") is None
+    assert "nonexistent" not in cache
+
+
+def test_revalidation_after_ttl():
+    """После TTL модель перепроверяется HEAD и перезагружается при смене ETag."""
+    storage = FakeStorage()
+    storage.put("forest", "model-v1", '"1"')
+    cache = ModelCache(max_size=2, ttl=0)
+
+    assert cache.get(storage, "forest") == "model-v1"
+    assert cache.get(storage, "forest") == "model-v1"
+    assert storage.gets == 1
+    assert storage.heads == 1
+
+    storage.put("forest", "model-v2", '"2"')
+    assert cache.get(storage, "forest") == "model-v2"
+    assert storage.gets == 2
+
+
+def test_lru_eviction():
+    """При переполнении вытесняется давно не использованная модель."""
+    storage = FakeStorage()
+    for name in ("a", "b", "c"):
+        storage.put(name, name, f'"{name}"')
+    cache = ModelCache(max_size=2, ttl=60)
+
+    cache.get(storage, "a")
+    cache.get(storage, "b")
+    cache.get(storage, "a")
+    cache.get(storage, "c")
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+
+
+def test_single_flight_loading():
+    """Пачка запросов к холодной модели приводит к одной загрузке."""
+    storage = FakeStorage(delay=0.2)
+    storage.put("forest", "model-v1", '"1"')
+    cache = ModelCache(max_size=2, ttl=60)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(storage, "forest")))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["model-v1"] * 10
+    assert storage.gets == 1
+
+
+def test_single_flight_propagates_errors():
+    """Ошибка загрузки получают все ожидающие запросы, кэш не портится."""
+    class BrokenStorage(FakeStorage):
+        def load_with_etag(self, name):
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+    storage = BrokenStorage()
+    cache = ModelCache(max_size=2, ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.get(storage, "forest")
+    assert len(cache) == 0
+
+
+def test_prepare_applied_once_per_load():
+    """prepare (компиляция) выполняется при загрузке, а не на каждый hit."""
+    storage = FakeStorage()
+    storage.put("forest", "model-v1", '"1"')
+    prepared = []
+    cache = ModelCache(max_size=2, ttl=60, prepare=lambda m: prepared.append(m) or f"compiled-{m}")
+
+    assert cache.get(storage, "forest") == "compiled-model-v1"
+    assert cache.get(storage, "forest") == "compiled-model-v1"
+    assert prepared == ["model-v1"]
+
+
+class AsyncFakeStorage(FakeStorage):
+    """То же хранилище с корутинами, как у AsyncStorage."""
+
+    async def load_with_etag(self, name):
+        self.gets += 1
+        await asyncio.sleep(self.delay)
+        return self.objects.get(name, (None, None))
+
+    async def head(self, name, etag=None):
+        return FakeStorage.head(self, name, etag)
+
+
+def test_async_single_flight_and_revalidation():
+    """aget: одна загрузка на пачку корутин, после TTL — HEAD и перезагрузка."""
+    storage = AsyncFakeStorage(delay=0.1)
+    storage.put("forest", "model-v1", '"1"')
+    cache = ModelCache(max_size=2, ttl=0)
+
+    async def burst():
+        return await asyncio.gather(*(cache.aget(storage, "forest") for _ in range(10)))
+
+    assert asyncio.run(burst()) == ["model-v1"] * 10
+    assert storage.gets == 1
+    storage.put("forest", "model-v2", '"2"')
+    assert asyncio.run(cache.aget(storage, "forest")) == "model-v2"
+    assert (storage.gets, storage.heads) == (2, 1)
+
+
+def test_async_waits_for_thread_loading():
+    """Корутина дожидается загрузки, которую ведёт поток (прогрев), не загружая модель второй раз."""
+    storage = FakeStorage(delay=0.2)
+    storage.put("forest", "model-v1", '"1"')
+    cache = ModelCache(max_size=2, ttl=60)
+
+    thread = threading.Thread(target=cache.get, args=(storage, "forest"))
+    thread.start()
+    time.sleep(0.05)
+    assert asyncio.run(cache.aget(AsyncFakeStorage(), "forest")) == "model-v1"
+    thread.join()
+    assert storage.gets == 1
+
+
+def test_async_leader_cancelled():
+    """Ушедший клиент запроса-лидера не отменяет загрузку для остальных ожидающих."""
+    storage = AsyncFakeStorage(delay=0.1)
+    storage.put("forest", "model-v1", '"1"')
+    cache = ModelCache(max_size=2, ttl=60)
+
+    async def run():
+        leader = asyncio.ensure_future(cache.aget(storage, "forest"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.aget(storage, "forest"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(run()) == "model-v1"
+    assert storage.gets == 1
+    assert "forest" in cache
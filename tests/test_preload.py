@@ -0,0 +1,170 @@
+"""
+Тесты для прогрева моделей и readiness.
+"""
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+from app.model_cache import ModelCache
+from app.preload import FAILED, READY, Readiness, preload_models, select_models
+
+NOW = datetime(2025, 1, 1)
+MODELS = [
+    {"name": "forest", "size": 10, "last_modified": NOW - timedelta(days=2)},
+    {"name": "logreg", "size": 10, "last_modified": NOW},
+    {"name": "old", "size": 10, "last_modified": NOW - timedelta(days=9)},
+]
+
+
+def test_select_models():
+    assert select_models(MODELS, "all") == ["forest", "logreg", "old"]
+    assert select_models(MODELS, "none") == []
+    assert select_models(MODELS, "recent:2") == ["logreg", "forest"]
+    assert select_models(MODELS, "logreg, missing") == ["logreg"]
+    # recent — столько последних моделей, сколько вмещает кэш; больше не загружается
+    assert select_models(MODELS, "recent", cache_size=2) == ["logreg", "forest"]
+    assert select_models(MODELS, "recent") == ["logreg", "forest", "old"]
+    assert select_models(MODELS, "all", cache_size=1) == ["forest"]
+
+
+class FakeStorage:
+    def __init__(self, models):
+        self.models = models
+        self.loaded = []
+
+    def list_models(self):
+        return [{"name": n, "size": 1, "last_modified": NOW} for n in self.models]
+
+    def load_with_etag(self, name):
+        self.loaded.append(name)
+        model = self.models[name]
+        if isinstance(model, Exception):
+            raise model
+        return model, f'"{name}"'
+
+
+def test_preload_fills_cache_and_marks_ready():
+    """Модели попадают в кэш, сломанная модель не мешает готовности."""
+    model = LogisticRegression().fit(np.array([[0.0], [1.0]]), [0, 1])
+    storage = FakeStorage({"logreg": model, "broken": RuntimeError("corrupted")})
+    cache = ModelCache(max_size=4, ttl=60)
+    state = Readiness()
+
+    preload_models(cache, "all", state, storage=storage)
+    assert state.state == READY
+    assert state.loaded == ["logreg"]
+    assert "broken" in state.errors
+    assert "logreg" in cache
+
+
+def test_preload_fails_when_storage_unavailable(monkeypatch):
+    monkeypatch.setattr("app.preload.PRELOAD_RETRIES", 2)
+    monkeypatch.setattr("app.preload.PRELOAD_RETRY_DELAY", 0)
+
+    class DownStorage:
+        def list_models(self):
+            raise ConnectionError("minio is down")
+
+    state = Readiness()
+    preload_models(ModelCache(), "all", state, storage=DownStorage())
+    assert state.state == FAILED
+    assert not state.is_ready
+    state.stop()
+
+
+def test_preload_recovers_after_failure(monkeypatch):
+    """После FAILED повторы идут в фоне: хранилище поднялось — модели загружены, процесс готов."""
+    monkeypatch.setattr("app.preload.PRELOAD_RETRIES", 2)
+    monkeypatch.setattr("app.preload.PRELOAD_RETRY_DELAY", 0.01)
+    monkeypatch.setattr("app.preload.PRELOAD_RETRY_MAX_DELAY", 0.01)
+    model = LogisticRegression().fit(np.array([[0.0], [1.0]]), [0, 1])
+    up = threading.Event()
+
+    class FlakyStorage(FakeStorage):
+        def list_models(self):
+            if not up.is_set():
+                raise ConnectionError("minio is down")
+            return super().list_models()
+
+    state = Readiness()
+    preload_models(ModelCache(), "all", state, storage=FlakyStorage({"logreg": model}))
+    try:
+        assert state.state == FAILED
+        assert state.to_dict()["errors"]["storage"] == "minio is down"
+        up.set()
+        deadline = time.monotonic() + 5
+        while not state.is_ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert state.is_ready
+        assert state.loaded == ["logreg"]
+        assert "storage" not in state.errors
+    finally:
+        state.stop()
+
+
+def _cached_in_worker(name):
+    from app.model_cache import model_cache
+    return os.getpid(), name in model_cache
+
+
+def test_preload_warms_inference_workers(moto_s3, forest, monkeypatch, tmp_path):
+    """При INFERENCE_PROCESSES > 0 модели прогреваются в каждом воркере пула, а не в основном процессе."""
+    from app import executors
+    from app.model_cache import model_cache
+    from app.storage import get_storage
+    get_storage().save("forest", forest)
+    monkeypatch.setenv("MODEL_FILE_CACHE_DIR", str(tmp_path / "worker-files"))
+    monkeypatch.setattr(executors, "INFERENCE_PROCESSES", 2)
+    monkeypatch.delitem(executors._pools, "inference", raising=False)
+    state = Readiness()
+    try:
+        preload_models(state=state)
+        assert state.state == READY
+        assert state.loaded == ["forest"]
+        assert "forest" not in model_cache
+        pool = executors._pools["inference"]
+        assert len(pool._processes) == 2
+        results = [pool.submit(_cached_in_worker, "forest") for _ in range(8)]
+        assert all(cached for _, cached in (r.result(timeout=60) for r in results))
+    finally:
+        executors._pools.pop("inference").shutdown()
+
+
+def test_ready_endpoint(monkeypatch):
+    """/ready отвечает 503, пока модели не прогреты, /health — сразу."""
+    from app.api import app
+    state = Readiness()
+    monkeypatch.setattr("app.api.readiness", state)
+    client = TestClient(app)
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 503
+    state.state = READY
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_retry_backs_off_until_success(monkeypatch):
+    from app import retry
+    sleeps = []
+    monkeypatch.setattr(retry.time, "sleep", sleeps.append)
+    calls = iter([ConnectionError("down"), ConnectionError("down"), ConnectionError("down"), "ok"])
+
+    def connect():
+        result = next(calls)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert retry.retry(connect, attempts=5, base_delay=1, max_delay=3) == "ok"
+    # Задержка растёт вдвое до потолка, случайна вторая половина
+    assert 0.5 <= sleeps[0] <= 1 and 1 <= sleeps[1] <= 2 and 1.5 <= sleeps[2] <= 3
+
+    with pytest.raises(StopIteration):
+        retry.retry(connect, attempts=1, base_delay=1, max_delay=3)
+    assert len(sleeps) == 3
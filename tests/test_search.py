@@ -0,0 +1,195 @@
+"""
+Тесты подбора гиперпараметров последовательным отсевом.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from app import model_service_pb2
+from app.search import WorkerBudget, parse_space
+from app.tensors import to_params, to_tensor
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(300, 4))
+Y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int)
+
+
+def test_parse_space():
+    parsed = parse_space({"C": {"low": 0.01, "high": 10, "log": True}, "max_iter": [50, 100]}, n_candidates=4)
+    assert parsed["max_iter"] == [50, 100]
+    assert 0.01 <= parsed["C"].rvs(random_state=0) <= 10
+
+    with pytest.raises(ValueError, match="n_candidates"):
+        parse_space({"C": {"low": 0.01, "high": 10}})
+    with pytest.raises(ValueError, match="empty"):
+        parse_space({})
+    with pytest.raises(ValueError, match="max_depth"):
+        parse_space({"max_depth": 5})
+    with pytest.raises(ValueError, match="log"):
+        parse_space({"n_estimators": {"low": 1, "high": 100, "log": True, "integer": True}}, 3)
+
+
+def test_worker_budget_shared_between_searches():
+    budget = WorkerBudget(4)
+    granted, release = [], threading.Event()
+
+    def search(wanted):
+        with budget.reserve(wanted) as n_jobs:
+            granted.append(n_jobs)
+            release.wait(5)
+
+    with budget.reserve() as first:
+        assert first == 4
+        waiter = threading.Thread(target=search, args=(2,))
+        waiter.start()
+        waiter.join(0.2)
+        # Свободных процессов нет: второй поиск ждёт, а не берёт сверх бюджета
+        assert waiter.is_alive() and not granted
+    for _ in range(50):
+        if granted:
+            break
+        waiter.join(0.05)
+    assert granted == [2]
+    with budget.reserve() as rest:
+        assert rest == 2
+    release.set()
+    waiter.join(5)
+    assert budget.free == 4
+
+
+def test_worker_budget_clamps_n_jobs():
+    budget = WorkerBudget(4)
+    with budget.reserve(-1) as n_jobs:
+        assert n_jobs == 1 and budget.free == 3
+    with budget.reserve(100) as n_jobs:
+        assert n_jobs == 4
+    assert budget.free == 4
+
+
+def test_build_search_clamps_n_jobs():
+    from sklearn.linear_model import LogisticRegression
+    from app.search import build_search
+
+    assert build_search(LogisticRegression(), {"C": [1.0]}, n_jobs=-1).n_jobs == 1
+
+
+def test_search_logs_nested_trials():
+    """Лучшая модель переобучена на всех данных, кандидаты — вложенные запуски MLflow."""
+    from app.models import ModelTrainer
+
+    trainer = ModelTrainer()
+    model, summary = trainer.search(
+        "logreg", X, Y, space={"C": [0.001, 0.01, 1.0, 10.0]}, factor=2, cv=3, n_jobs=2,
+    )
+    assert summary["best_params"]["C"] in (1.0, 10.0)
+    assert summary["n_candidates"] == 4 and summary["n_iterations"] >= 2
+    assert trainer.metrics == {"accuracy": summary["best_score"]}
+    assert model.score(X, Y) > 0.9
+
+    run = trainer.run
+    assert run.params["best_C"] == str(summary["best_params"]["C"])
+    assert run.metric_values("accuracy") == [summary["best_score"]]
+    # Кандидат оценивается в каждом пройденном раунде: раундов больше одного
+    assert len(run.children) > summary["n_candidates"]
+    assert all(child.metric_values("mean_test_score") for child in run.children)
+    assert {child.params["iter"] for child in run.children} == {str(i) for i in range(summary["n_iterations"])}
+
+
+def test_search_job_saves_best_model(storage, monkeypatch):
+    """search_and_save сохраняет лучшую модель новой версией со сводкой в задаче."""
+    from app.jobs import Job, search_and_save
+
+    monkeypatch.setattr("app.jobs.submit_to", lambda name, fn, *args: ThreadPoolExecutor(1).submit(fn, *args))
+    job = Job("forest")
+    spec = {"space": {"max_depth": [1, 4]}, "params": {"n_estimators": 5, "random_state": 0},
+            "n_candidates": 0, "cv": 3, "factor": 2}
+    key = search_and_save(job, X, Y, "data", spec)
+
+    assert job.version == 2
+    assert job.result["best_params"]["max_depth"] in (1, 4)
+    assert job.to_dict()["result"] == job.result
+    assert storage.load("forest").n_estimators == 5
+    assert storage.versions("forest")[-1]["metrics"] == {"accuracy": job.result["best_score"]}
+    assert key.startswith("forest/")
+
+
+def test_search_endpoint(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api import app
+    from app.jobs import job_manager
+    from tests.test_jobs import wait_for
+
+    received = {}
+
+    def fake_search(job, X, y, dataset_name, spec):
+        received.update(dataset_name=dataset_name, spec=spec)
+        job.result = {"best_params": {"C": 1.0}, "best_score": 0.9}
+        return "logreg.pkl"
+
+    monkeypatch.setattr("app.api.search_and_save", fake_search)
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {client.post('/token').json()['access_token']}"
+
+    response = client.post("/search/", json={"model_type": "logreg", "space": {"C": {"low": 0.1, "high": 10}}})
+    assert response.status_code == 422
+    response = client.post("/search/", json={"model_type": "logreg", "space": {"C": [1.0]}, "n_jobs": -1})
+    assert response.status_code == 422
+
+    response = client.post("/search/", json={
+        "model_type": "logreg", "space": {"C": {"low": 0.1, "high": 10}}, "n_candidates": 8, "n_jobs": 2,
+    })
+    assert response.status_code == 202
+    wait_for(job_manager.get(response.json()["job_id"]))
+    assert received["dataset_name"] == "data"
+    assert received["spec"]["n_candidates"] == 8 and received["spec"]["n_jobs"] == 2
+    data = client.get(f"/train/jobs/{response.json()['job_id']}").json()
+    assert data["result"] == {"best_params": {"C": 1.0}, "best_score": 0.9}
+
+
+def test_search_rpc(stub, monkeypatch):
+    import grpc
+    import app.grpc_server as grpc_server
+
+    received = {}
+    done = threading.Event()
+
+    def fake_search(job, X, y, dataset_name, spec):
+        received.update(X=X, dataset_name=dataset_name, spec=spec)
+        job.result = {"best_params": {"max_depth": 4, "criterion": "gini"}, "best_score": 0.8}
+        done.set()
+        return "forest.pkl"
+
+    monkeypatch.setattr(grpc_server, "search_and_save", fake_search)
+    request = model_service_pb2.SearchRequest(
+        name="forest",
+        space={
+            "max_depth": model_service_pb2.ParamSpace(values=model_service_pb2.ParamValues(
+                values=list(to_params({"a": 2, "b": 4}).values()))),
+            "max_features": model_service_pb2.ParamSpace(range=model_service_pb2.ParamRange(low=0.1, high=1.0)),
+        },
+        typed_params=to_params({"n_estimators": 10}),
+        X=to_tensor(X), y=to_tensor(Y),
+        n_candidates=6, random_state=0,
+    )
+    status = stub.SearchModel(request)
+    assert status.job_id
+    assert done.wait(5)
+    np.testing.assert_array_equal(received["X"], X)
+    assert received["dataset_name"] == "data_grpc"
+    assert received["spec"]["space"] == {
+        "max_depth": [2, 4], "max_features": {"low": 0.1, "high": 1.0, "log": False, "integer": False},
+    }
+    assert received["spec"]["params"] == {"n_estimators": 10}
+    assert (received["spec"]["random_state"], received["spec"]["factor"]) == (0, None)
+
+    from app.jobs import job_manager
+    from tests.test_jobs import wait_for
+    wait_for(job_manager.get(status.job_id))
+    status = stub.GetTrainJob(model_service_pb2.JobRequest(job_id=status.job_id))
+    assert status.best_params["max_depth"].int_value == 4
+    assert status.best_score == pytest.approx(0.8)
+
+    request.n_candidates = 0
+    with pytest.raises(grpc.RpcError) as e:
+        stub.SearchModel(request)
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
@@ -0,0 +1,248 @@
+"""
+Контрактные тесты хранилища против сервера moto: одни и те же сценарии
+каталога и артефактов для Storage и AsyncStorage.
+
+AsyncStorage ходит в S3 через aiohttp, поэтому нужен настоящий HTTP
+сервер (фикстура moto_url), а не mock_aws. Без aiobotocore асинхронный
+вариант пропускается.
+"""
+import asyncio
+import numpy as np
+import pytest
+
+
+class SyncStore:
+    """Единый вызов методов для обеих реализаций: store.call('versions', ...)."""
+
+    def __init__(self):
+        from app.storage import Storage
+        self.store = Storage()
+
+    def call(self, method, *args, **kwargs):
+        return getattr(self.store, method)(*args, **kwargs)
+
+    def close(self):
+        pass
+
+
+class AsyncStore:
+    def __init__(self):
+        from app.async_storage import AsyncStorage
+        self.loop = asyncio.new_event_loop()
+        self.store = self.loop.run_until_complete(AsyncStorage().open())
+
+    def call(self, method, *args, **kwargs):
+        return self.loop.run_until_complete(getattr(self.store, method)(*args, **kwargs))
+
+    def close(self):
+        self.loop.run_until_complete(self.store.close())
+        self.loop.close()
+
+
+@pytest.fixture
+def sync_store(moto_s3):
+    return SyncStore()
+
+
+@pytest.fixture(params=["sync", "async"])
+def store(request, sync_store):
+    """Проверяемая реализация."""
+    if request.param == "sync":
+        yield sync_store
+        return
+    pytest.importorskip("aiobotocore")
+    wrapper = AsyncStore()
+    yield wrapper
+    wrapper.close()
+
+
+def test_save_and_load_versions(store):
+    first = store.call("save", "forest", {"weights": [1]}, {"accuracy": 0.5})
+    second = store.call("save", "forest", {"weights": [2]})
+    assert (first["version"], second["version"]) == (1, 2)
+
+    assert store.call("load", "forest") == {"weights": [2]}
+    assert store.call("load", "forest@1") == {"weights": [1]}
+    model, etag = store.call("load_with_etag", "forest")
+    assert etag == second["etag"] == store.call("head", "forest")
+    # Повторная загрузка — из дискового кэша после 304
+    assert store.call("load_with_etag", "forest") == (model, etag)
+
+
+def test_missing_model(store):
+    assert store.call("load_with_etag", "missing") == (None, None)
+    assert store.call("load", "forest@3") is None
+    assert store.call("head", "missing") is None
+    assert store.call("versions", "missing") == []
+    assert store.call("delete", "missing") is False
+
+
+def test_list_and_versions(store):
+    entry = store.call("save", "forest", {"weights": [1]}, {"accuracy": 0.5})
+    store.call("save", "forest", {"weights": [2]}, {"accuracy": 0.7})
+    store.call("save", "logreg", {"weights": [3]})
+
+    listed = {m["name"]: m for m in store.call("list_models")}
+    assert set(listed) == {"forest", "logreg"}
+    assert (listed["forest"]["version"], listed["forest"]["versions"]) == (2, 2)
+    assert listed["forest"]["metrics"] == {"accuracy": 0.7}
+    assert listed["logreg"]["size"] > 0
+
+    versions = store.call("versions", "forest")
+    assert [v["version"] for v in versions] == [1, 2]
+    assert versions[0]["created_at"] <= versions[1]["created_at"]
+    assert store.call("head", "forest@1") == entry["etag"]
+
+
+def test_delete(store):
+    store.call("save", "forest", {"weights": [1]})
+    store.call("save", "forest", {"weights": [2]})
+
+    assert store.call("delete", "forest@2") is True
+    assert store.call("load", "forest") == {"weights": [1]}
+    assert store.call("delete", "forest") is True
+    assert store.call("list_models") == []
+    assert store.call("load", "forest") is None
+
+
+def test_legacy_model(store, sync_store):
+    """Модель {имя}.pkl без манифеста видна, читается и удаляется обеими реализациями."""
+    import pickle
+    inner = sync_store.store
+    inner.s3.put_object(Bucket=inner.bucket, Key="old.pkl", Body=pickle.dumps({"weights": [0]}))
+    assert [m["name"] for m in store.call("list_models")] == ["old"]
+    assert store.call("head", "old") is not None
+    assert store.call("load", "old") == {"weights": [0]}
+    assert store.call("delete", "old") is True
+    assert store.call("head", "old") is None
+
+
+def test_large_artifact(store):
+    """Multipart-загрузка и параллельные Range GET дают тот же объект."""
+    from boto3.s3.transfer import TransferConfig
+    mb = 1024 * 1024
+    inner = store.store
+    inner.multipart_threshold = inner.chunk_size = 5 * mb
+    if isinstance(store, SyncStore):
+        inner.transfer_config = TransferConfig(multipart_threshold=5 * mb, multipart_chunksize=5 * mb)
+    weights = np.random.rand(12 * mb // 8)
+
+    entry = store.call("save", "forest", {"weights": weights})
+    # ETag multipart-объекта: хэш частей и их число
+    assert entry["etag"].strip('"').endswith("-3")
+    np.testing.assert_array_equal(store.call("load", "forest")["weights"], weights)
+    # Без дискового кэша объект собирается в памяти
+    inner.disk_cache = None
+    np.testing.assert_array_equal(store.call("load", "forest")["weights"], weights)
+
+
+def test_compressed_artifact(store, monkeypatch):
+    monkeypatch.setattr("app.storage.MODEL_COMPRESSION", "gzip")
+    model = {"weights": list(range(10000))}
+    entry = store.call("save", "forest", model)
+    assert entry["codec"] == "gzip"
+    assert store.call("load", "forest") == model
+    assert store.call("load", "forest") == model
+
+
+def test_failed_serialization_leaves_no_version(store):
+    """Ошибка сериализации прерывает загрузку: версия не появляется."""
+    with pytest.raises(Exception):
+        store.call("save", "forest", {"weights": lambda: None})
+    assert store.call("versions", "forest") == []
+
+
+def test_shared_instance_per_event_loop(moto_s3):
+    """Каждый event loop получает свой открытый клиент; закрытые loop забываются."""
+    pytest.importorskip("aiobotocore")
+    from app import async_storage
+    SyncStore().call("save", "forest", {"weights": [1]})
+
+    async def listed():
+        storage = await async_storage.get_async_storage()
+        assert storage is await async_storage.get_async_storage()
+        return [m["name"] for m in await storage.list_models()]
+
+    # Как у TestClient без контекста: новый loop на каждый запрос
+    for _ in range(2):
+        assert asyncio.run(listed()) == ["forest"]
+    assert asyncio.run(listed()) == ["forest"]
+    assert len(async_storage._storages) == 1
+
+
+@pytest.fixture
+def api_client(moto_s3):
+    from fastapi.testclient import TestClient
+    from app.api import app
+    pytest.importorskip("aiobotocore")
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {client.post('/token').json()['access_token']}"
+    return client
+
+
+def test_api_catalog_endpoints_across_requests(api_client):
+    """TestClient без контекста ведёт каждый запрос в новом loop: /models/ и /delete/ работают повторно."""
+    seed = SyncStore()
+    seed.call("save", "forest", {"weights": [1]})
+    seed.call("save", "logreg", {"weights": [2]})
+
+    for _ in range(2):
+        response = api_client.get("/models/")
+        assert response.status_code == 200
+        assert [m["name"] for m in response.json()["models"]] == ["forest", "logreg"]
+    assert api_client.delete("/delete/forest").status_code == 200
+    assert api_client.delete("/delete/forest").status_code == 404
+    assert [m["name"] for m in api_client.get("/models/").json()["models"]] == ["logreg"]
+
+
+def spy(monkeypatch, calls, *methods):
+    """Записывает в calls вызовы методов AsyncStorage."""
+    from app.async_storage import AsyncStorage
+    for method in methods:
+        async def wrapper(self, *args, _method=method, _original=getattr(AsyncStorage, method), **kwargs):
+            calls.append(_method)
+            return await _original(self, *args, **kwargs)
+        monkeypatch.setattr(AsyncStorage, method, wrapper)
+
+
+def test_api_predict_loads_through_async_storage(api_client, forest, monkeypatch):
+    """Холодная загрузка модели для /predict и /predict_batch идёт через AsyncStorage."""
+    SyncStore().call("save", "forest", forest)
+    calls = []
+    spy(monkeypatch, calls, "load_with_etag")
+    monkeypatch.setattr("app.storage.Storage.load_with_etag", lambda *args: pytest.fail("sync load"))
+
+    features = [6.8, 3.1, 4.8, 1.5]
+    response = api_client.post("/predict/forest", json={"features": features})
+    assert response.status_code == 200
+    assert response.json()["prediction"] == int(forest.predict([features])[0])
+    response = api_client.post("/predict_batch/forest", json={"features": [features]})
+    assert response.json()["predictions"] == forest.predict([features]).tolist()
+    assert api_client.post("/predict/missing", json={"features": features}).status_code == 404
+    # /predict_batch берёт forest из кэша процесса, missing не кэшируется
+    assert calls == ["load_with_etag", "load_with_etag"]
+
+
+def test_job_saves_through_event_loop(moto_s3, forest, monkeypatch):
+    """После save_in_loop задачи обучения сохраняют модели через AsyncStorage этого loop."""
+    import threading
+    from app.jobs import save_in_loop, save_model
+    pytest.importorskip("aiobotocore")
+    calls = []
+    spy(monkeypatch, calls, "save")
+    monkeypatch.setattr("app.storage.Storage.save", lambda *args: pytest.fail("sync save"))
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    save_in_loop(loop)
+    try:
+        entry = save_model("forest", forest, {"accuracy": 1.0})
+    finally:
+        save_in_loop(None)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    assert calls == ["save"]
+    assert (entry["version"], entry["metrics"]) == (1, {"accuracy": 1.0})
+    assert SyncStore().call("load", "forest").n_estimators == forest.n_estimators
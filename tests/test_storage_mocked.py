@@ -39,4 +39,229 @@ def test_upload_to_s3(mock_s3_client):
     )
 
     obj = s3_client.get_object(Bucket=bucket_name, Key=key)
-    assert obj['ContentLength'] > 0
\ No newline at end of file
+    assert obj['ContentLength'] > 0
+
+@pytest.fixture
+def storage(monkeypatch):
+    """Storage поверх мокнутого S3."""
+    monkeypatch.setenv("MINIO_ENDPOINT", "https://s3.amazonaws.com")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        from app.storage import Storage
+        yield Storage()
+
+
+def test_storage_head_is_conditional(storage):
+    """HEAD возвращает ETag, на совпадающий ETag — тот же ETag (304)."""
+    assert storage.head("forest") is None
+
+    storage.save("forest", {"weights": [1, 2, 3]})
+    model, etag = storage.load_with_etag("forest")
+    assert model == {"weights": [1, 2, 3]}
+    assert storage.head("forest") == etag
+    assert storage.head("forest", etag) == etag
+
+    storage.save("forest", {"weights": [4, 5, 6]})
+    assert storage.head("forest", etag) != etag
+
+
+def test_get_storage_is_shared(monkeypatch):
+    """get_storage создаёт клиент и проверяет бакет один раз на процесс."""
+    monkeypatch.setenv("MINIO_ENDPOINT", "https://s3.amazonaws.com")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        from app.storage import get_storage, reset_storage
+        reset_storage()
+        storage = get_storage()
+        assert get_storage() is storage
+        assert storage.s3.meta.config.max_pool_connections >= 10
+
+        calls = []
+        storage.s3.meta.events.register(
+            "before-call.s3", lambda model, **kwargs: calls.append(model.name)
+        )
+        storage.save("forest", {"weights": [1]})
+        calls.clear()
+        # Манифест (условный GET) и сам артефакт — без перебора бакета
+        assert get_storage().load("forest") == {"weights": [1]}
+        assert calls == ["GetObject", "GetObject"]
+        reset_storage()
+
+
+def test_mmap_artifact_roundtrip(storage, monkeypatch, tmp_path):
+    """mmap-артефакт кладётся в локальный кэш и отображается в память."""
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression
+    from app.disk_cache import DiskCache
+    monkeypatch.setattr("app.storage.MODEL_ARTIFACT_FORMAT", "mmap")
+    storage.disk_cache = DiskCache(str(tmp_path))
+
+    X = np.array([[0.0, 1.0], [1.0, 0.0], [0.0, 2.0], [2.0, 0.0]])
+    y = np.array([0, 1, 0, 1])
+    model = LogisticRegression().fit(X, y)
+    storage.save("logreg", model)
+
+    loaded, etag = storage.load_with_etag("logreg")
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    assert not loaded.coef_.flags.writeable
+    assert len(list(tmp_path.glob("logreg_*@*.art"))) == 1
+
+    # Повторная загрузка: 304 на If-None-Match и для манифеста, и для тела
+    calls = []
+    storage.s3.meta.events.register(
+        "after-call.s3.GetObject", lambda http_response, **kwargs: calls.append(http_response.status_code)
+    )
+    again, again_etag = storage.load_with_etag("logreg")
+    assert again_etag == etag
+    assert calls == [304, 304]
+    np.testing.assert_array_equal(again.coef_, model.coef_)
+
+    storage.delete("logreg")
+    assert not list(tmp_path.glob("logreg_*@*.art"))
+
+
+def test_legacy_pickle_still_loads(storage, monkeypatch, tmp_path):
+    """Старые артефакты — обычный pickle без метаданных — читаются как раньше."""
+    import pickle
+    from app.disk_cache import DiskCache
+    storage.disk_cache = DiskCache(str(tmp_path))
+    storage.s3.put_object(Bucket="models", Key="forest.pkl", Body=pickle.dumps({"legacy": True}))
+    assert storage.load("forest") == {"legacy": True}
+
+
+def test_disk_cache_shared_between_instances(storage, tmp_path):
+    """Второй экземпляр (другой процесс) с тем же каталогом не скачивает тело заново."""
+    from app.disk_cache import DiskCache
+    from app.storage import Storage
+    storage.disk_cache = DiskCache(str(tmp_path))
+    storage.save("forest", {"weights": [1, 2]})
+    storage.load("forest")
+
+    other = Storage()
+    other.disk_cache = DiskCache(str(tmp_path))
+    statuses = []
+    other.s3.meta.events.register(
+        "after-call.s3.GetObject", lambda http_response, **kwargs: statuses.append(http_response.status_code)
+    )
+    assert other.load("forest") == {"weights": [1, 2]}
+    # Манифест новый экземпляр читает целиком, тело модели — нет
+    assert statuses == [200, 304]
+
+    # Версии лежат под разными ключами: прежняя остаётся в кэше для отката,
+    # место освобождает вытеснение по бюджету
+    storage.save("forest", {"weights": [3]})
+    assert other.load("forest") == {"weights": [3]}
+    assert other.load("forest@1") == {"weights": [1, 2]}
+    assert len(list(tmp_path.glob("forest_*@*.art"))) == 2
+
+
+def test_cached_file_evicted_after_304(storage, tmp_path, monkeypatch):
+    """Файл удалён другим процессом между 304 и чтением: объект скачивается заново."""
+    from app.disk_cache import DiskCache, _remove
+    storage.disk_cache = DiskCache(str(tmp_path))
+    storage.save("forest", {"weights": [1, 2]})
+    storage.load("forest")
+
+    statuses = []
+    storage.s3.meta.events.register(
+        "after-call.s3.GetObject", lambda http_response, **kwargs: statuses.append(http_response.status_code)
+    )
+    monkeypatch.setattr(DiskCache, "touch", lambda self, path: _remove(path))
+    assert storage.load("forest") == {"weights": [1, 2]}
+    assert statuses[-2] == 304 and statuses[-1] in (200, 206)
+    assert len(list(tmp_path.glob("forest_*@*.art"))) == 1
+
+
+def test_multipart_upload_and_ranged_download(storage, tmp_path):
+    """Большой артефакт уходит multipart и скачивается параллельными Range GET."""
+    import numpy as np
+    from boto3.s3.transfer import TransferConfig
+    from app.disk_cache import DiskCache
+    mb = 1024 * 1024
+    storage.transfer_config = TransferConfig(
+        multipart_threshold=5 * mb, multipart_chunksize=5 * mb, max_concurrency=4
+    )
+    storage.multipart_threshold = 2 * mb
+    storage.chunk_size = mb
+    model = {"weights": np.random.rand(12 * mb // 8)}
+
+    calls = []
+    storage.s3.meta.events.register("before-call.s3", lambda model, **kwargs: calls.append(model.name))
+    storage.save("forest", model)
+    assert calls.count("UploadPart") >= 2
+
+    calls.clear()
+    loaded, etag = storage.load_with_etag("forest")
+    np.testing.assert_array_equal(loaded["weights"], model["weights"])
+    assert calls.count("GetObject") >= 12
+
+    # С дисковым кэшем куски пишутся по смещениям в один файл
+    storage.disk_cache = DiskCache(str(tmp_path))
+    cached, cached_etag = storage.load_with_etag("forest")
+    assert cached_etag == etag
+    np.testing.assert_array_equal(cached["weights"], model["weights"])
+
+
+def test_failed_serialization_aborts_upload(storage):
+    """Ошибка сериализации не оставляет в бакете обрезанный объект."""
+    import threading
+
+    class Unpicklable:
+        def __reduce__(self):
+            raise TypeError("cannot pickle")
+
+    with pytest.raises(TypeError):
+        storage.save("broken", [b"x" * 1024, Unpicklable()])
+    assert storage.head("broken") is None
+    assert not [t for t in threading.enumerate() if t.name == "serialize"]
+
+
+def test_versioned_registry(storage):
+    """Каждое сохранение — новая неизменяемая версия; latest в манифесте."""
+    first = storage.save("forest", {"weights": [1]}, metrics={"accuracy": 0.5})
+    second = storage.save("forest", {"weights": [2]}, metrics={"accuracy": 0.9})
+    assert (first["version"], second["version"]) == (1, 2)
+    assert first["key"] != second["key"]
+
+    assert storage.load("forest") == {"weights": [2]}
+    assert storage.load("forest@1") == {"weights": [1]}
+    assert storage.load("forest@3") is None
+    assert storage.head("forest") == second["etag"]
+
+    [model] = storage.list_models()
+    assert (model["name"], model["version"], model["versions"]) == ("forest", 2, 2)
+    assert model["metrics"] == {"accuracy": 0.9}
+    assert [v["version"] for v in storage.versions("forest")] == [1, 2]
+
+    # Удаление последней версии откатывает latest на предыдущую
+    assert storage.delete("forest@2")
+    assert storage.load("forest") == {"weights": [1]}
+    assert storage.delete("forest")
+    assert storage.list_models() == [] and storage.load("forest") is None
+    assert not storage.delete("forest")
+
+
+def test_manifest_update_is_conditional(storage, monkeypatch):
+    """Версия, записанная другим процессом между чтением и PUT, не теряется."""
+    from app.storage import Storage
+    other = Storage()
+    storage.save("forest", {"weights": [1]})
+
+    # other прочитал манифест до записи storage и пишет следом со старым ETag
+    stale = iter([other._read_manifest()])
+    read = other._read_manifest
+    monkeypatch.setattr(other, "_read_manifest", lambda: next(stale, None) or read())
+    storage.save("logreg", {"weights": [2]})
+    other.save("forest", {"weights": [3]})
+
+    assert {m["name"]: m["version"] for m in storage.list_models()} == {"forest": 2, "logreg": 1}
+
+
+def test_legacy_unversioned_model_is_listed_and_loaded(storage):
+    """Бакет без манифеста: старые {имя}.pkl находятся перебором ключей."""
+    import pickle
+    storage.s3.put_object(Bucket="models", Key="forest.pkl", Body=pickle.dumps({"legacy": True}))
+    assert [m["name"] for m in storage.list_models()] == ["forest"]
+    assert storage.head("forest") is not None
+    assert storage.delete("forest")
+    assert storage.head("forest") is None
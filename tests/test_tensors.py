@@ -0,0 +1,77 @@
+"""
+Тесты для типизированных тензоров и параметров TrainRequest.
+"""
+import pickle
+import numpy as np
+import pytest
+from app import model_service_pb2
+from app.grpc_server import ModelService
+from app.tensors import from_params, from_tensor, to_params, to_tensor
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64", "int32", "int64", "bool"])
+def test_tensor_roundtrip(dtype):
+    array = (np.arange(12).reshape(3, 4) % 3).astype(dtype)
+    tensor = to_tensor(array)
+    assert list(tensor.shape) == [3, 4]
+
+    decoded = from_tensor(model_service_pb2.Tensor.FromString(tensor.SerializeToString()))
+    assert decoded.dtype == array.dtype
+    np.testing.assert_array_equal(decoded, array)
+
+
+def test_tensor_is_little_endian_and_zero_copy():
+    array = np.array([1.0, 2.0], dtype=">f8")
+    tensor = to_tensor(array)
+    assert tensor.data == np.array([1.0, 2.0], dtype="<f8").tobytes()
+
+    decoded = from_tensor(tensor)
+    # Массив смотрит в байты сообщения, а не в свою копию
+    assert not decoded.flags.owndata
+    assert not decoded.flags.writeable
+
+
+def test_tensor_validation():
+    tensor = to_tensor(np.zeros((2, 2)))
+    tensor.shape[:] = [3, 2]
+    with pytest.raises(ValueError):
+        from_tensor(tensor)
+    with pytest.raises(ValueError):
+        to_tensor(np.array(["a", "b"]))
+
+
+def test_params_roundtrip():
+    params = {"n_estimators": 10, "C": 0.5, "criterion": "gini", "bootstrap": False}
+    decoded = from_params(to_params(params))
+    assert decoded == params
+    assert type(decoded["n_estimators"]) is int
+    assert type(decoded["bootstrap"]) is bool
+
+
+def test_train_request_typed():
+    X, y = np.random.rand(5, 3), np.array([0, 1, 0, 1, 1])
+    request = model_service_pb2.TrainRequest(
+        name="forest", X=to_tensor(X), y=to_tensor(y), typed_params=to_params({"max_depth": 3})
+    )
+    X_decoded, y_decoded = ModelService._train_data(request)
+    np.testing.assert_array_equal(X_decoded, X)
+    np.testing.assert_array_equal(y_decoded, y)
+    assert ModelService._train_params(request) == {"max_depth": 3}
+
+
+def test_train_request_legacy():
+    """Старые клиенты: pickle в data и float-параметры."""
+    X, y = np.random.rand(5, 3), np.array([0, 1, 0, 1, 1])
+    request = model_service_pb2.TrainRequest(
+        name="forest", data=pickle.dumps({"X": X, "y": y}), params={"n_estimators": 10.0}
+    )
+    X_decoded, _ = ModelService._train_data(request)
+    np.testing.assert_array_equal(X_decoded, X)
+    params = ModelService._train_params(request)
+    assert params == {"n_estimators": 10} and type(params["n_estimators"]) is int
+
+
+def test_train_request_requires_both_tensors():
+    request = model_service_pb2.TrainRequest(name="forest", X=to_tensor(np.zeros((2, 2))))
+    with pytest.raises(ValueError):
+        ModelService._train_data(request)
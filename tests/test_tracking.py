@@ -0,0 +1,151 @@
+"""
+Тесты фоновой записи в MLflow: пакетная отправка, артефакт из хранилища,
+буфер на диске и повтор.
+"""
+import json
+import os
+import mlflow
+import pytest
+from mlflow.tracking import MlflowClient
+from app.tracking import RunRecord, TrackingLogger
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{tmp_path}/mlruns")
+    logger = TrackingLogger(spool_dir=str(tmp_path / "spool"), replay_seconds=60)
+    yield logger
+    logger.close()
+
+
+def make_record():
+    record = RunRecord("train")
+    record.log_params({"n_estimators": 5, "model_type": "forest"})
+    record.log_metric("accuracy", 0.75)
+    for step in range(3):
+        record.log_metric("chunk_rows_per_sec", 100.0 + step, step=step)
+    trial = record.child("trial-0")
+    trial.log_param("C", 1.0)
+    trial.log_metric("mean_test_score", 0.5)
+    record.finish()
+    return record
+
+
+def runs():
+    return mlflow.search_runs(experiment_names=["mlops-hw2"], output_format="list")
+
+
+def test_record_roundtrip():
+    record = make_record()
+    restored = RunRecord.from_dict(json.loads(json.dumps(record.to_dict())))
+    assert restored.to_dict() == record.to_dict()
+    assert restored.children[0].params == {"C": "1.0"}
+
+
+def test_submit_sends_batched_run(logger, monkeypatch):
+    batches = []
+    original = MlflowClient.log_batch
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        batches.append(run_id)
+        return original(self, run_id, metrics=metrics, params=params, tags=tags)
+
+    monkeypatch.setattr(MlflowClient, "log_batch", log_batch)
+    logger.submit(make_record())
+    assert logger.flush(10)
+
+    parent = [r for r in runs() if "mlflow.parentRunId" not in r.data.tags]
+    child = [r for r in runs() if "mlflow.parentRunId" in r.data.tags]
+    assert len(parent) == 1 and len(child) == 1
+    assert parent[0].data.params == {"n_estimators": "5", "model_type": "forest"}
+    assert parent[0].data.metrics["accuracy"] == 0.75
+    assert parent[0].info.status == "FINISHED"
+    history = MlflowClient().get_metric_history(parent[0].info.run_id, "chunk_rows_per_sec")
+    assert [m.step for m in history] == [0, 1, 2]
+    assert child[0].data.tags["mlflow.parentRunId"] == parent[0].info.run_id
+    # Один log_batch на запуск
+    assert len(batches) == 2
+
+
+def test_artifact_reuses_stored_object(logger, storage, tmp_path):
+    """Артефакт запуска — тот же объект, что сохранил Storage, байт в байт."""
+    key = storage.resolve("forest")[0]
+    record = make_record()
+    record.artifact = {"key": key}
+    logger.submit(record)
+    assert logger.flush(10)
+
+    run_id = [r for r in runs() if "mlflow.parentRunId" not in r.data.tags][0].info.run_id
+    path = MlflowClient().download_artifacts(run_id, f"artifact/{os.path.basename(key)}", str(tmp_path))
+    with open(path, "rb") as f:
+        stored = storage.s3.get_object(Bucket=storage.bucket, Key=key)["Body"].read()
+        assert f.read() == stored
+
+
+def test_unavailable_server_spools_and_replays(logger, monkeypatch):
+    """Сбой после create_run: запись уходит на диск с run_id, повтор дописывает тот же запуск."""
+    failures = {"left": 1}
+    original = MlflowClient.log_batch
+
+    def flaky_log_batch(self, *args, **kwargs):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise ConnectionError("tracking server is down")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(MlflowClient, "log_batch", flaky_log_batch)
+    logger.submit(make_record())
+    assert logger.flush(10)
+
+    spooled = logger.spooled()
+    assert len(spooled) == 1
+    with open(spooled[0]) as f:
+        assert json.load(f)["run_id"]
+
+    assert logger.replay() == 1
+    assert logger.spooled() == []
+    parent = [r for r in runs() if "mlflow.parentRunId" not in r.data.tags]
+    assert len(parent) == 1
+    assert parent[0].data.metrics["accuracy"] == 0.75
+    assert len(runs()) == 2
+
+
+def test_replay_claims_files(logger):
+    """Файл, захваченный другим процессом, не отправляется повторно."""
+    logger._spool(make_record())
+    (path,) = logger.spooled()
+    assert TrackingLogger._claim(path) is not None
+    assert TrackingLogger._claim(path) is None
+    assert logger.replay() == 0
+    assert runs() == []
+
+
+def test_artifact_copied_inside_s3(logger, storage):
+    """Артефакты MLflow в том же S3: объект копируется на стороне сервера."""
+    storage.s3.create_bucket(Bucket="mlflow-artifacts")
+    MlflowClient().create_experiment("mlops-hw2", artifact_location="s3://mlflow-artifacts/exp")
+    key = storage.resolve("forest")[0]
+    record = make_record()
+    record.artifact = {"key": key}
+    logger.submit(record)
+    assert logger.flush(10)
+
+    run_id = [r for r in runs() if "mlflow.parentRunId" not in r.data.tags][0].info.run_id
+    copied = storage.s3.get_object(
+        Bucket="mlflow-artifacts", Key=f"exp/{run_id}/artifacts/artifact/{os.path.basename(key)}"
+    )["Body"].read()
+    assert copied == storage.s3.get_object(Bucket=storage.bucket, Key=key)["Body"].read()
+    assert logger.spooled() == []
+
+
+def test_replay_skips_deleted_artifact(logger, storage):
+    """Объект версии удалён до повтора: запуск пишется без артефакта и уходит из буфера."""
+    record = make_record()
+    record.artifact = {"key": "forest/deleted.art"}
+    logger._spool(record)
+
+    assert logger.replay() == 1
+    assert logger.spooled() == []
+    parent = [r for r in runs() if "mlflow.parentRunId" not in r.data.tags][0]
+    assert parent.info.status == "FINISHED"
+    assert MlflowClient().list_artifacts(parent.info.run_id) == []
@@ -0,0 +1,151 @@
+"""
+Тесты для потоковой загрузки обучающих данных (TrainModelStream).
+"""
+import os
+import numpy as np
+import pytest
+from app.upload import MemmapRef, RowBuffer, train_chunks
+
+
+def _append_in_chunks(buffer, X, y, step):
+    for start in range(0, len(X), step):
+        buffer.append(X[start:start + step], y[start:start + step])
+
+
+def test_row_buffer_grows_in_memory():
+    X = np.random.rand(5000, 3)
+    y = np.arange(5000)
+    buffer = RowBuffer(3)
+    _append_in_chunks(buffer, X, y, 700)
+
+    X_out, y_out = buffer.arrays()
+    assert not buffer.spilled
+    np.testing.assert_array_equal(X_out, X)
+    np.testing.assert_array_equal(y_out, y)
+
+
+def test_row_buffer_preallocates_known_rows():
+    buffer = RowBuffer(2, expected_rows=3000)
+    _append_in_chunks(buffer, np.ones((3000, 2)), np.zeros(3000), 1000)
+    assert buffer.capacity == 3000
+
+
+def test_row_buffer_spills_to_disk(tmp_path):
+    """Сверх порога X переезжает в memmap-файл, который растёт без потери строк."""
+    X = np.random.rand(10000, 4)
+    y = np.arange(10000)
+    buffer = RowBuffer(4, spill_bytes=100_000, spill_dir=str(tmp_path))
+    _append_in_chunks(buffer, X, y, 1500)
+
+    assert buffer.spilled
+    X_ref, y_out = buffer.arrays()
+    assert isinstance(X_ref, MemmapRef)
+    np.testing.assert_array_equal(X_ref.open(), X)
+    np.testing.assert_array_equal(y_out, y)
+
+    # Файл принадлежит ссылке: буфер его не удаляет
+    buffer.close()
+    assert os.path.exists(X_ref.path)
+    X_ref.remove()
+    assert not os.path.exists(X_ref.path)
+
+
+def test_spill_file_outlives_stream(tmp_path, monkeypatch):
+    """Оборванный RPC закрывает буфер, но задача в очереди читает файл, а затем удаляет его."""
+    import threading
+    import app.grpc_server as grpc_server
+    from app import model_service_pb2
+    from tests.test_jobs import wait_for
+
+    started, release, received = threading.Event(), threading.Event(), {}
+
+    def fake_train(job, X, y, dataset_name, params):
+        started.set()
+        release.wait(5)
+        received["X"] = np.array(X.open())
+        return "forest.pkl"
+
+    monkeypatch.setattr(grpc_server, "train_and_save", fake_train)
+    X = np.random.rand(2000, 4)
+    buffer = RowBuffer(4, spill_bytes=1000, spill_dir=str(tmp_path))
+    buffer.append(X, np.zeros(2000))
+    header = model_service_pb2.TrainHeader(name="forest", n_features=4)
+    job = grpc_server.ModelService._submit_upload((header, buffer))
+    started.wait(5)
+    buffer.close()
+    release.set()
+    wait_for(job)
+
+    np.testing.assert_array_equal(received["X"], X)
+    # Колбэк future выполняется сразу после завершения задачи
+    for _ in range(100):
+        if not os.listdir(tmp_path):
+            break
+        started.wait(0.01)
+    assert os.listdir(tmp_path) == []
+
+
+def test_row_buffer_limits_rows():
+    """n_rows из заголовка не выделяется сверх предела, и данные его не превышают."""
+    with pytest.raises(ValueError):
+        RowBuffer(3, expected_rows=10**12, max_rows=1000)
+    buffer = RowBuffer(3, max_rows=1000)
+    buffer.append(np.ones((1000, 3)), np.ones(1000))
+    with pytest.raises(ValueError):
+        buffer.append(np.ones((1, 3)), np.ones(1))
+
+
+def test_train_model_stream_rejects_huge_header(stub):
+    import grpc
+    from app import model_service_pb2
+    header = model_service_pb2.TrainChunk(header=model_service_pb2.TrainHeader(
+        name="forest", n_features=4, n_rows=2**62,
+    ))
+    with pytest.raises(grpc.RpcError) as e:
+        stub.TrainModelStream(iter([header]))
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_row_buffer_rejects_bad_chunks():
+    buffer = RowBuffer(3)
+    with pytest.raises(ValueError):
+        buffer.append(np.ones((2, 4)), np.ones(2))
+    with pytest.raises(ValueError):
+        buffer.append(np.ones((2, 3)), np.ones(3))
+
+
+def test_train_chunks_split_by_bytes():
+    X = np.random.rand(100, 4)
+    chunks = list(train_chunks("forest", X, np.arange(100), {"max_depth": 3}, chunk_bytes=32 * 10))
+    header = chunks[0].header
+    assert (header.name, header.n_rows, header.n_features) == ("forest", 100, 4)
+    assert len(chunks) == 1 + 10
+
+
+def test_train_model_stream(stub, monkeypatch):
+    """Сервер собирает порции в один массив и отдаёт его в обучение."""
+    import app.grpc_server as grpc_server
+
+    received = {}
+
+    def fake_train(job, X, y, dataset_name, params):
+        received.update(X=np.array(X), y=np.array(y), params=params)
+        return "forest.pkl"
+
+    monkeypatch.setattr(grpc_server, "train_and_save", fake_train)
+    X = np.random.rand(1000, 4)
+    y = (X[:, 0] > 0.5).astype(int)
+
+    response = stub.TrainModelStream(train_chunks("forest", X, y, {"n_estimators": 5}, chunk_bytes=4096))
+    assert response.status == "ok"
+    np.testing.assert_array_equal(received["X"], X)
+    np.testing.assert_array_equal(received["y"], y)
+    assert received["params"] == {"n_estimators": 5}
+
+
+def test_train_model_stream_requires_header(stub):
+    import grpc
+    chunks = list(train_chunks("forest", np.ones((2, 2)), np.ones(2)))[1:]
+    with pytest.raises(grpc.RpcError) as e:
+        stub.TrainModelStream(iter(chunks))
+    assert e.value.code() == grpc.StatusCode.INVALID_ARGUMENT